@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+def is_shared_cache(alias='default'):
+    """
+    Check whether a cache is visible to every process (e.g. Redis), rather
+    than private to this one
+    """
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+def shared_timeout(timeout, alias='default'):
+    """
+    Return ``timeout`` for a shared cache; for a per-process cache, cap it at
+    ``LOCAL_CACHE_TIMEOUT`` seconds, since other processes' invalidations
+    never reach it
+    """
+    if is_shared_cache(alias):
+        return timeout
+    local_timeout = getattr(settings, 'LOCAL_CACHE_TIMEOUT', 5)
+    return local_timeout if timeout is None else min(timeout, local_timeout)
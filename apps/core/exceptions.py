@@ -71,3 +71,11 @@ class InvalidRequestError(APIException):
     status_code = status.HTTP_400_BAD_REQUEST
     default_detail = 'Invalid request data'
     default_code = 'invalid_request'
+
+class ConflictError(APIException):
+    """
+    Exception for when a resource was modified concurrently
+    """
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The resource was modified by another request'
+    default_code = 'conflict'
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class EventsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.events'
+    
+    def ready(self):
+        """
+        Connect signal handlers when the app is ready
+        """
+        # Import signal handlers
+        import apps.events.signals
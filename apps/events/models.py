@@ -52,10 +52,43 @@ class Event(models.Model):
     class Meta:
         db_table = 'events'
         ordering = ['-date']
+        indexes = [
+            # Range scans by the reminder scheduler's incremental refreshes
+            models.Index(fields=['date'], name='event_date_idx'),
+            models.Index(fields=['updated_at'], name='event_updated_at_idx'),
+        ]
+    
+    # Changes to these fields are announced to guests
+    GUEST_VISIBLE_FIELDS = ('title', 'date', 'location')
     
     def __str__(self):
         return self.title
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_guest_fields()
+        return instance
+    
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_guest_fields()
+    
+    def _remember_guest_fields(self):
+        self._loaded_guest_fields = {
+            field: self.__dict__[field] for field in self.GUEST_VISIBLE_FIELDS if field in self.__dict__
+        }
+    
+    def changed_guest_fields(self):
+        """
+        Guest-visible fields that differ from the values loaded from the database
+        """
+        loaded = getattr(self, '_loaded_guest_fields', {})
+        return [
+            field for field, value in loaded.items()
+            if self.__dict__.get(field, value) != value
+        ]
+    
     # Add a property to get current RSVP count
     @property
     def rsvp_count(self):
@@ -75,26 +108,19 @@ class Event(models.Model):
     @property
     def has_payment_link(self):
         """Check if this event has a payment link"""
-        return self.payments.filter(
-            user=self.created_by,
-            payment_link__isnull=False
-        ).exists()
+        # Reverse one-to-one; cached when loaded with select_related('payment_link')
+        return hasattr(self, 'payment_link')
     
     @property
     def payment_info(self):
         """Get payment details for this event"""
-        payment = self.payments.filter(
-            user=self.created_by,
-            payment_link__isnull=False
-        ).first()
-        
-        if not payment:
+        if not self.has_payment_link:
             return None
             
         return {
-            'amount': payment.amount,
-            'payment_link': payment.payment_link,
-            'description': payment.description
+            'amount': self.payment_link.amount,
+            'payment_link': self.payment_link.url,
+            'description': self.payment_link.description
         }
     
     @property
@@ -76,12 +76,9 @@ class EventDetailSerializer(serializers.ModelSerializer):
         
         # Add user's payment status if they're logged in
         if user.is_authenticated:
-            user_paid = obj.payments.filter(
-                user=user,
-                status='PAID'
-            ).exists()
+            from apps.payments.services import PaidUserSet
             
-            result['user_has_paid'] = user_paid
+            result['user_has_paid'] = PaidUserSet.has_paid(obj.pk, user.pk)
         
         return result
     
@@ -91,9 +88,9 @@ class EventWithPaymentSerializer(serializers.ModelSerializer):
     """
     Serializer for creating an event with payment information
     """
-    payment_link = serializers.URLField(required=False, allow_null=True)
-    payment_amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, allow_null=True)
-    payment_description = serializers.CharField(max_length=255, required=False, allow_null=True)
+    payment_link = serializers.URLField(required=False, allow_null=True, write_only=True)
+    payment_amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, allow_null=True, write_only=True)
+    payment_description = serializers.CharField(max_length=255, required=False, allow_null=True, write_only=True)
     
     class Meta:
         model = Event
@@ -116,17 +113,15 @@ class EventWithPaymentSerializer(serializers.ModelSerializer):
         # Create the event
         event = super().create(validated_data)
         
-        # Create payment if link is provided
+        # Create payment link if provided
         if payment_link:
-            from apps.payments.models import Payment
+            from apps.payments.models import EventPaymentLink
             
-            Payment.objects.create(
+            EventPaymentLink.objects.create(
                 event=event,
-                user=self.context['request'].user,  # Host is creating the payment link
-                payment_link=payment_link,
+                url=payment_link,
                 amount=payment_amount,
-                description=payment_description,
-                status='PENDING'
+                description=payment_description
             )
         
         return event
\ No newline at end of file
@@ -0,0 +1,27 @@
+# apps/events/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import Event
+
+@receiver(post_save, sender=Event)
+def handle_event_save(sender, instance, created, **kwargs):
+    """
+    Queue an update notification for guests when a guest-visible field changes
+
+    Only one outbox row is written here; the ``process_notification_jobs``
+    worker fans it out to the attendees.
+    """
+    if created:
+        instance._remember_guest_fields()
+        return
+    
+    changes = instance.changed_guest_fields()
+    instance._remember_guest_fields()
+    if not changes:
+        return
+    
+    from apps.notifications.models import NotificationJob
+    
+    payload = {'event_id': str(instance.pk), 'changes': changes}
+    transaction.on_commit(lambda: NotificationJob.objects.create(kind='EVENT_UPDATE', payload=payload))
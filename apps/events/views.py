@@ -73,7 +73,7 @@ class EventViewSet(viewsets.ModelViewSet):
         """
         Filter events based on privacy settings and user authentication
         """
-        queryset = Event.objects.all()
+        queryset = Event.objects.select_related('created_by', 'payment_link')
         
         # If user is not authenticated, show only public events
         if not self.request.user.is_authenticated:
@@ -215,17 +215,18 @@ class EventViewSet(viewsets.ModelViewSet):
         
         # Get all RSVPs for this event
         from apps.rsvp.models import RSVP
-        rsvps = RSVP.objects.filter(event=event)
+        rsvps = RSVP.objects.filter(event=event).select_related('user')
         
-        # Enhance with payment information
+        # Enhance with payment information, loaded once for the whole list
         from apps.payments.models import Payment
+        payments = {
+            payment.user_id: payment
+            for payment in Payment.objects.filter(event=event)
+        }
         
         result = []
         for rsvp in rsvps:
-            payment = Payment.objects.filter(
-                event=event,
-                user=rsvp.user
-            ).first()
+            payment = payments.get(rsvp.user_id)
             
             payment_status = "NOT_STARTED"
             if payment:
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Notification
+from .models import Device, Notification, NotificationJob, NotificationPreference
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
@@ -10,7 +10,7 @@ class NotificationAdmin(admin.ModelAdmin):
     readonly_fields = ('created_at',)
     fieldsets = (
         (None, {
-            'fields': ('user', 'event', 'type', 'title', 'message')
+            'fields': ('user', 'event', 'type', 'title', 'message', 'template', 'params')
         }),
         ('Actions', {
             'fields': ('action_link', 'action_text', 'is_read')
@@ -18,4 +18,21 @@ class NotificationAdmin(admin.ModelAdmin):
         ('Metadata', {
             'fields': ('created_at',)
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(NotificationJob)
+class NotificationJobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'status', 'attempts', 'created_at', 'processed_at')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('created_at', 'processed_at')
+
+@admin.register(NotificationPreference)
+class NotificationPreferenceAdmin(admin.ModelAdmin):
+    list_display = ('user', 'muted', 'digest', 'updated_at')
+    raw_id_fields = ('user',)
+
+@admin.register(Device)
+class DeviceAdmin(admin.ModelAdmin):
+    list_display = ('user', 'platform', 'created_at', 'last_seen_at')
+    list_filter = ('platform',)
+    raw_id_fields = ('user',)
@@ -7,8 +7,7 @@ class NotificationsConfig(AppConfig):
     
     def ready(self):
         """
-        Connect signal handlers or perform other initialization
+        Connect signal handlers when the app is ready
         """
-        # Import any signal handlers if needed
-        # No signals defined yet but may be added in the future
-        pass
\ No newline at end of file
+        # Import signal handlers
+        import apps.notifications.signals
\ No newline at end of file
@@ -0,0 +1,151 @@
+# apps/notifications/broker.py
+import asyncio
+import json
+import threading
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+class InMemoryBroker:
+    """
+    In-process pub/sub for notification events
+
+    Subscribers are asyncio queues owned by the event loop serving the
+    stream, so an idle connection costs a queue rather than a thread.
+    ``publish`` may be called from any thread (e.g. a sync view or worker)
+    and hands each event to the subscriber's loop.
+    """
+    def __init__(self, max_queue_size=100, **options):
+        self.max_queue_size = max_queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        """
+        Register a subscriber for a user's events; call from the event loop
+        """
+        queue = asyncio.Queue(maxsize=self.max_queue_size)
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.setdefault(str(user_id), set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, user_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(str(user_id))
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[str(user_id)]
+
+    @staticmethod
+    def _offer(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A client that stopped reading loses events rather than memory
+            pass
+
+    def publish(self, user_id, event):
+        """
+        Deliver an event to every local subscriber of a user
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(str(user_id), ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # The subscriber's loop has already been closed
+                pass
+
+    def publish_many(self, events):
+        """
+        Deliver ``(user_id, event)`` pairs
+        """
+        for user_id, event in events:
+            self.publish(user_id, event)
+
+
+class RedisBroker(InMemoryBroker):
+    """
+    Cross-process broker: events are published to Redis and each process
+    relays them to its own subscribers through a single pattern subscription
+
+    Requires the ``redis`` package, which is imported only when this backend
+    is configured.
+    """
+    CHANNEL_PREFIX = 'notifications:'
+
+    def __init__(self, url='redis://localhost:6379/0', **options):
+        super().__init__(**options)
+        self.url = url
+        self._client = None
+        self._listeners = {}
+
+    def _get_client(self):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self.url)
+        return self._client
+
+    def subscribe(self, user_id):
+        subscriber = super().subscribe(user_id)
+        loop = subscriber[0]
+        with self._lock:
+            if loop not in self._listeners:
+                self._listeners[loop] = loop.create_task(self._listen())
+        return subscriber
+
+    def unsubscribe(self, user_id, subscriber):
+        super().unsubscribe(user_id, subscriber)
+        loop = subscriber[0]
+        with self._lock:
+            if any(other[0] is loop for subscribers in self._subscribers.values() for other in subscribers):
+                return
+            # The loop's last stream has gone; stop relaying to it
+            listener = self._listeners.pop(loop, None)
+        if listener is not None:
+            try:
+                loop.call_soon_threadsafe(listener.cancel)
+            except RuntimeError:
+                # The loop has already been closed
+                pass
+
+    async def _listen(self):
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.psubscribe(f'{self.CHANNEL_PREFIX}*')
+            async for message in pubsub.listen():
+                if message['type'] != 'pmessage':
+                    continue
+                channel = message['channel'].decode()
+                super().publish(channel[len(self.CHANNEL_PREFIX):], json.loads(message['data']))
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+    def publish(self, user_id, event):
+        self.publish_many([(user_id, event)])
+
+    def publish_many(self, events):
+        pipeline = self._get_client().pipeline(transaction=False)
+        for user_id, event in events:
+            pipeline.publish(f'{self.CHANNEL_PREFIX}{user_id}', json.dumps(event))
+        pipeline.execute()
+
+
+_broker = None
+
+def get_broker():
+    """
+    Return the process-wide broker configured by ``NOTIFICATION_BROKER``
+    """
+    global _broker
+    if _broker is None:
+        backend = getattr(settings, 'NOTIFICATION_BROKER', 'apps.notifications.broker.InMemoryBroker')
+        options = getattr(settings, 'NOTIFICATION_BROKER_OPTIONS', {})
+        _broker = import_string(backend)(**options)
+    return _broker
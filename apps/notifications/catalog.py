@@ -0,0 +1,139 @@
+# apps/notifications/catalog.py
+"""
+Registry of notification templates
+
+System notifications are stored as a template name plus compact JSON params
+and rendered when read, so rows stay small and wording can be translated or
+changed without touching stored data. Notifications without a template
+(e.g. host messages) keep their stored title and message.
+"""
+from functools import lru_cache
+from django.utils import translation
+from django.utils.translation import gettext_lazy as _
+
+TEMPLATES = {
+    'rsvp_created_host': (
+        _('New RSVP for your event'),
+        _("{guest} has RSVP'd {status} to your event '{event}'."),
+    ),
+    'rsvp_created_guest': (
+        _('RSVP Confirmation'),
+        _("You have RSVP'd {status} to '{event}'."),
+    ),
+    'rsvp_digest': (
+        _('New RSVPs for your event'),
+        _("{count} new RSVPs for your event '{event}'."),
+    ),
+    'rsvp_updated_host': (
+        _('RSVP Updated'),
+        _("{guest} has updated their RSVP to {status} for your event '{event}'."),
+    ),
+    'rsvp_updated_guest': (
+        _('RSVP Update Confirmation'),
+        _("You have updated your RSVP to {status} for '{event}'."),
+    ),
+    'rsvp_approved': (
+        _('RSVP Approved'),
+        _("Your RSVP to '{event}' has been approved."),
+    ),
+    'rsvp_rejected': (
+        _('RSVP Rejected'),
+        _("Your RSVP to '{event}' has been rejected."),
+    ),
+    'event_reminder': (
+        _('Event Reminder'),
+        _("Reminder: '{event}' is starting soon!"),
+    ),
+    'payment_reminder': (
+        _('Payment Reminder'),
+        _("Don't forget to pay for '{event}'."),
+    ),
+    'event_updated': (
+        _('Event Updated'),
+        _("The host updated '{event}': {changes} changed."),
+    ),
+}
+
+# Templates a coalesced row switches to once it stands for several notifications
+DIGEST_TEMPLATES = {
+    'rsvp_created_host': 'rsvp_digest',
+}
+
+# Params stored as codes and shown through translated labels
+PARAM_LABELS = {
+    'status': {
+        'YES': _('Yes'),
+        'NO': _('No'),
+        'MAYBE': _('Maybe'),
+    },
+    'changes': {
+        'title': _('title'),
+        'date': _('date'),
+        'location': _('location'),
+    },
+}
+
+
+class _Params(dict):
+    """
+    Leaves unknown placeholders visible instead of failing to render
+    """
+    def __missing__(self, key):
+        return '{' + key + '}'
+
+
+@lru_cache(maxsize=None)
+def _compiled(template, language):
+    """
+    Translated title and message format strings for one template and language
+    """
+    title, message = TEMPLATES[template]
+    with translation.override(language):
+        return str(title), str(message)
+
+
+@lru_cache(maxsize=None)
+def _label(name, value, language):
+    with translation.override(language):
+        return str(PARAM_LABELS[name][value])
+
+
+def render(template, params, language=None, count=1):
+    """
+    Render a template's ``(title, message)`` in ``language`` (default: the
+    active language)
+    """
+    if language is None:
+        language = translation.get_language()
+    if count > 1:
+        template = DIGEST_TEMPLATES.get(template, template)
+
+    title, message = _compiled(template, language)
+
+    values = _Params(params, count=count)
+    for name, labels in PARAM_LABELS.items():
+        value = values.get(name)
+        if isinstance(value, list):
+            values[name] = ', '.join(
+                _label(name, item, language) if item in labels else str(item) for item in value
+            )
+        elif value in labels:
+            values[name] = _label(name, value, language)
+
+    return title.format_map(values), message.format_map(values)
+
+
+def render_notification(notification, language=None):
+    """
+    Title and message of a (live or archived) notification
+
+    The event title comes from the notification's event rather than its
+    params, so load events with ``select_related`` when rendering many.
+    """
+    if not notification.template:
+        return notification.title, notification.message
+
+    params = notification.params
+    if 'event' not in params and notification.event_id:
+        params = dict(params, event=notification.event.title)
+    return render(notification.template, params, language, notification.coalesced_count)
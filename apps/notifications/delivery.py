@@ -0,0 +1,317 @@
+# apps/notifications/delivery.py
+"""
+Off-platform delivery of notifications
+
+New notifications a channel carries (see each channel's ``eligible``) are
+queued as ``NotificationDelivery`` rows. ``deliver`` claims a batch of due rows,
+holds back recipients over the channel's hourly cap, hands the rest to the
+channel in one call and records the outcome, retrying failures with
+exponential backoff. No transaction is open while the channel sends: claimed
+rows are marked ``SENDING`` under a lease, so a worker that dies mid-batch
+only delays them until the lease runs out.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from .catalog import render_notification
+from .models import Device, Notification, NotificationDelivery
+
+DEFAULT_EMAIL_TYPES = ('EVENT_INVITE', 'EVENT_REMINDER', 'EVENT_UPDATE', 'PAYMENT_REMINDER', 'HOST_MESSAGE')
+DEFAULT_PUSH_COLLAPSE_TYPES = ('RSVP_UPDATE', 'EVENT_UPDATE', 'EVENT_REMINDER')
+
+class EmailChannel:
+    """
+    Sends each batch over a single connection of the configured email backend
+    """
+    name = 'EMAIL'
+
+    def __init__(self, connection=None):
+        self.connection = connection
+        self.types = getattr(settings, 'NOTIFICATION_EMAIL_TYPES', DEFAULT_EMAIL_TYPES)
+        self.hourly_cap = getattr(settings, 'NOTIFICATION_EMAIL_HOURLY_CAP', 10)
+        self.link_base = getattr(settings, 'NOTIFICATION_EMAIL_LINK_BASE', '')
+
+    def eligible(self, notifications):
+        return [notification for notification in notifications if notification.type in self.types]
+
+    def prepare(self):
+        """
+        Resolve the email backend before any delivery is claimed
+        """
+        from django.core.mail import get_connection
+
+        if self.connection is None:
+            self.connection = get_connection()
+
+    def message(self, delivery):
+        from django.core.mail import EmailMessage
+
+        notification = delivery.notification
+        subject, body = render_notification(notification)
+        if notification.action_link:
+            body += f"\n\n{notification.action_text or 'Open'}: {self.link_base}{notification.action_link}"
+        return EmailMessage(subject, body, to=[delivery.user.email])
+
+    def send(self, deliveries):
+        """
+        Send the deliveries; returns ``{delivery_id: error}`` for those that failed
+        """
+        self.prepare()
+        connection = self.connection
+        errors = {}
+        try:
+            # Opened once for the whole batch rather than once per message
+            with connection:
+                for delivery in deliveries:
+                    if not delivery.user.email:
+                        errors[delivery.id] = 'Recipient has no email address'
+                        continue
+                    try:
+                        connection.send_messages([self.message(delivery)])
+                    except Exception as exc:
+                        errors[delivery.id] = str(exc)
+        except Exception as exc:
+            # The connection itself failed; retry everything not yet sent or failed
+            for delivery in deliveries:
+                errors.setdefault(delivery.id, str(exc))
+        return errors
+
+
+class PushChannel:
+    """
+    Pushes to every registered device of the recipients, as few provider
+    requests per batch as the provider's batch size allows
+
+    Repeated notifications of a collapsible type for one event share a
+    collapse key, so a device shows only the latest. Devices whose token
+    the provider rejects as invalid are deleted.
+    """
+    name = 'PUSH'
+
+    def __init__(self, provider=None):
+        self.provider = provider
+        self.types = getattr(settings, 'NOTIFICATION_PUSH_TYPES', [code for code, _ in Notification.NOTIFICATION_TYPES])
+        self.collapse_types = getattr(settings, 'NOTIFICATION_PUSH_COLLAPSE_TYPES', DEFAULT_PUSH_COLLAPSE_TYPES)
+        self.hourly_cap = getattr(settings, 'NOTIFICATION_PUSH_HOURLY_CAP', None)
+
+    def eligible(self, notifications):
+        notifications = [notification for notification in notifications if notification.type in self.types]
+        if not notifications:
+            return []
+        with_devices = set(Device.objects.filter(
+            user_id__in={notification.user_id for notification in notifications}
+        ).values_list('user_id', flat=True))
+        return [notification for notification in notifications if notification.user_id in with_devices]
+
+    def prepare(self):
+        """
+        Resolve the push provider before any delivery is claimed; raises
+        ``ImproperlyConfigured`` when there is none, leaving the queue as it is
+        """
+        from .push import get_push_provider
+
+        if self.provider is None:
+            self.provider = get_push_provider()
+
+    def collapse_key(self, notification):
+        if notification.type in self.collapse_types and notification.event_id:
+            return f'{notification.type}:{notification.event_id}'
+        return None
+
+    def message(self, delivery, token):
+        notification = delivery.notification
+        title, body = render_notification(notification)
+        return {
+            'token': token,
+            'title': title,
+            'body': body,
+            'collapse_key': self.collapse_key(notification),
+            'data': {
+                'notification_id': str(notification.id),
+                'type': notification.type,
+                'event_id': str(notification.event_id) if notification.event_id else None,
+                'action_link': notification.action_link,
+            },
+        }
+
+    def send(self, deliveries):
+        """
+        Push the deliveries; returns ``{delivery_id: error}`` for those no
+        device accepted, including those whose every device was invalid
+        """
+        self.prepare()
+        provider = self.provider
+
+        devices = {}
+        for device_id, user_id, token in Device.objects.filter(
+            user_id__in={delivery.user_id for delivery in deliveries}
+        ).values_list('id', 'user_id', 'token'):
+            devices.setdefault(user_id, []).append((device_id, token))
+
+        messages = []
+        targets = []
+        for delivery in deliveries:
+            for device_id, token in devices.get(delivery.user_id, ()):
+                messages.append(self.message(delivery, token))
+                targets.append((delivery.id, device_id))
+
+        delivered = set()
+        errors = {}
+        dead = []
+        for (delivery_id, device_id), result in zip(targets, provider.send(messages) if messages else []):
+            if result == 'ok':
+                delivered.add(delivery_id)
+            elif result == 'invalid_token':
+                dead.append(device_id)
+            else:
+                errors[delivery_id] = result
+
+        if dead:
+            Device.objects.filter(id__in=dead).delete()
+
+        # A push has arrived once any of the user's devices accepted it; one
+        # with no device left to try, or only rejected tokens, never will
+        return {
+            delivery.id: errors.get(delivery.id, 'No valid device')
+            for delivery in deliveries
+            if delivery.id not in delivered
+        }
+
+
+CHANNELS = {
+    'EMAIL': EmailChannel,
+    'PUSH': PushChannel,
+}
+
+def enqueue(notifications):
+    """
+    Queue deliveries for new notifications on every channel that carries them
+    """
+    deliveries = []
+    for channel_class in CHANNELS.values():
+        deliveries.extend(
+            NotificationDelivery(notification_id=notification.id, user_id=notification.user_id, channel=channel_class.name)
+            for notification in channel_class().eligible(notifications)
+        )
+    if deliveries:
+        NotificationDelivery.objects.bulk_create(deliveries)
+
+def _hold_over_cap(deliveries, cap, now):
+    """
+    Postpone deliveries that would take a recipient over ``cap`` sends in
+    the last hour until their oldest send leaves the window; returns the
+    deliveries that may go now
+
+    Deliveries other workers are sending count towards the cap, but those
+    they are claiming at this very moment are not yet visible, so workers
+    running side by side can each let a few of a recipient's deliveries
+    through and take them past the cap by up to one batch each.
+    """
+    if cap is None:
+        return deliveries
+
+    window = timedelta(hours=1)
+    recent = {
+        user_id: (total, oldest or now)
+        for user_id, total, oldest in NotificationDelivery.objects.filter(
+            Q(status='SENT', sent_at__gte=now - window) | Q(status='SENDING', next_attempt_at__gt=now),
+            user_id__in={delivery.user_id for delivery in deliveries},
+            channel=deliveries[0].channel
+        ).order_by().values_list('user_id').annotate(total=Count('id'), oldest=Min('sent_at'))
+    }
+
+    allowed = []
+    for delivery in deliveries:
+        total, oldest = recent.get(delivery.user_id, (0, now))
+        if total >= cap:
+            delivery.status = 'PENDING'
+            delivery.next_attempt_at = oldest + window
+        else:
+            recent[delivery.user_id] = (total + 1, oldest)
+            allowed.append(delivery)
+    return allowed
+
+def _claim(channel, batch_size, max_attempts, now):
+    """
+    Claim a batch of due deliveries in one short transaction; returns
+    ``(claimed, held)``
+
+    Claimed rows are marked ``SENDING`` with ``next_attempt_at`` moved to
+    the end of a ``NOTIFICATION_DELIVERY_LEASE`` second lease. If the worker
+    never records their outcome they are claimed again once it runs out,
+    unless that was their last attempt.
+    """
+    lease = timedelta(seconds=getattr(settings, 'NOTIFICATION_DELIVERY_LEASE', 300))
+
+    with transaction.atomic():
+        NotificationDelivery.objects.filter(
+            channel=channel.name,
+            status='SENDING',
+            next_attempt_at__lte=now,
+            attempts__gte=max_attempts
+        ).update(status='FAILED', last_error='Lease expired')
+
+        # skip_locked lets several workers drain the queue side by side
+        deliveries = list(
+            NotificationDelivery.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+                channel=channel.name,
+                status__in=('PENDING', 'SENDING'),
+                next_attempt_at__lte=now
+            ).select_related('notification__event', 'user').order_by('next_attempt_at')[:batch_size]
+        )
+        if not deliveries:
+            return [], []
+
+        claimed = _hold_over_cap(deliveries, channel.hourly_cap, now)
+        for delivery in claimed:
+            delivery.status = 'SENDING'
+            delivery.attempts += 1
+            delivery.next_attempt_at = now + lease
+        NotificationDelivery.objects.bulk_update(deliveries, ['status', 'attempts', 'next_attempt_at'])
+
+    claimed_ids = {delivery.id for delivery in claimed}
+    return claimed, [delivery for delivery in deliveries if delivery.id not in claimed_ids]
+
+def deliver(channel='EMAIL', batch_size=100, max_attempts=5, **options):
+    """
+    Send one batch of due deliveries for a channel; returns
+    ``(sent, failed, held)``, where ``held`` were postponed by the hourly cap
+
+    A failed delivery is retried after ``NOTIFICATION_DELIVERY_RETRY_DELAY``
+    seconds, doubling with each attempt, until it has used ``max_attempts``.
+    ``options`` are passed to the channel (e.g. an email ``connection`` or a
+    push ``provider``).
+    """
+    channel = CHANNELS[channel](**options)
+    channel.prepare()
+    retry_delay = getattr(settings, 'NOTIFICATION_DELIVERY_RETRY_DELAY', 60)
+
+    claimed, held = _claim(channel, batch_size, max_attempts, timezone.now())
+    errors = channel.send(claimed) if claimed else {}
+
+    sent_at = timezone.now()
+    failed = []
+    for delivery in claimed:
+        error = errors.get(delivery.id)
+        if error is None:
+            continue
+
+        delivery.last_error = error
+        if delivery.attempts >= max_attempts:
+            delivery.status = 'FAILED'
+        else:
+            delivery.status = 'PENDING'
+            delivery.next_attempt_at = sent_at + timedelta(seconds=retry_delay * 2 ** (delivery.attempts - 1))
+        failed.append(delivery)
+
+    with transaction.atomic():
+        # Successes share one plain UPDATE; only failures need per-row values
+        NotificationDelivery.objects.filter(
+            id__in=[delivery.id for delivery in claimed if delivery.id not in errors]
+        ).update(status='SENT', sent_at=sent_at)
+        if failed:
+            NotificationDelivery.objects.bulk_update(failed, ['status', 'next_attempt_at', 'last_error'])
+
+    return len(claimed) - len(errors), len(errors), len(held)
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from apps.notifications.tasks import archive_notifications
+
+class Command(BaseCommand):
+    help = 'Move old read notifications and notifications for past events into the archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--read-after-days', type=int, default=None, help='Archive read notifications older than this')
+        parser.add_argument('--past-event-days', type=int, default=None, help='Archive notifications for events that ended this long ago')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Stop after this many batches; the next run resumes where this one stopped'
+        )
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to wait between batches')
+
+    def handle(self, *args, **options):
+        """
+        Execute the command to archive notifications
+        """
+        archived, seconds = archive_notifications(
+            read_after_days=options['read_after_days'],
+            past_event_days=options['past_event_days'],
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+            pause=options['pause']
+        )
+        
+        rate = archived / seconds if seconds else 0
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully archived {archived} notifications in {seconds:.1f}s ({rate:.0f}/s)')
+        )
@@ -0,0 +1,35 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.notifications.tasks import deliver_notifications
+
+class Command(BaseCommand):
+    help = 'Send queued notification deliveries, such as emails, in batches over one connection each'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--channel', default='EMAIL', help='Delivery channel to process')
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for due deliveries instead of exiting after the queue is drained'
+        )
+        parser.add_argument('--sleep', type=float, default=5.0, help='Seconds to wait when nothing is due')
+
+    def handle(self, *args, **options):
+        """
+        Execute the command to deliver notifications
+        """
+        while True:
+            sent, failed, held = deliver_notifications(
+                channel=options['channel'],
+                batch_size=options['batch_size']
+            )
+            
+            if sent or failed or held:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Successfully sent {sent} deliveries ({failed} failed, {held} held by the hourly cap)')
+                )
+            
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.notifications.tasks import process_notification_jobs
+
+class Command(BaseCommand):
+    help = 'Process queued notification jobs such as RSVP notifications and large fan-outs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new jobs instead of exiting after one pass'
+        )
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+
+    def handle(self, *args, **options):
+        """
+        Execute the command to process notification jobs
+        """
+        while True:
+            job_count = process_notification_jobs(batch_size=options['batch_size'])
+            
+            if job_count:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Successfully processed {job_count} notification jobs')
+                )
+            
+            if not options['loop']:
+                break
+            if not job_count:
+                time.sleep(options['sleep'])
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from apps.notifications.services import UnreadCounts
+
+class Command(BaseCommand):
+    help = 'Recount per-user unread notification counters and fix any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        """
+        Execute the command to reconcile unread counters
+        """
+        fixed = UnreadCounts.reconcile(batch_size=options['batch_size'])
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully reconciled unread counters ({fixed} fixed)')
+        )
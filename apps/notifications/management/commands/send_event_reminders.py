@@ -4,12 +4,27 @@ from apps.notifications.tasks import send_event_reminders
 class Command(BaseCommand):
     help = 'Send reminders for upcoming events'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scheduler',
+            action='store_true',
+            help='Keep running and send each reminder (24h, 1h, 10m before by default) when it is due'
+        )
+        parser.add_argument('--refresh-interval', type=int, default=60, help='Seconds between checks for new or rescheduled events')
+
     def handle(self, *args, **options):
         """
         Execute the command to send event reminders
         """
+        if options['scheduler']:
+            from apps.notifications.scheduler import ReminderScheduler
+            
+            self.stdout.write('Reminder scheduler started')
+            ReminderScheduler(refresh_interval=options['refresh_interval']).run()
+            return
+        
         event_count = send_event_reminders()
         
         self.stdout.write(
             self.style.SUCCESS(f'Successfully sent reminders for {event_count} upcoming events')
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from apps.notifications.tasks import send_payment_reminders
+
+class Command(BaseCommand):
+    help = 'Remind guests who RSVP\'d YES to paid events but have not paid yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--max-per-guest',
+            type=int,
+            default=None,
+            help='Maximum number of events a single guest is reminded about per run'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Execute the command to send payment reminders
+        """
+        reminder_count = send_payment_reminders(
+            batch_size=options['batch_size'],
+            max_per_guest=options['max_per_guest']
+        )
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully sent {reminder_count} payment reminders')
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-19 02:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='type',
+            field=models.CharField(choices=[('EVENT_INVITE', 'Event Invitation'), ('RSVP_CONFIRMATION', 'RSVP Confirmation'), ('RSVP_UPDATE', 'RSVP Status Update'), ('EVENT_REMINDER', 'Event Reminder'), ('PAYMENT_CONFIRMATION', 'Payment Confirmation'), ('PAYMENT_REMINDER', 'Payment Reminder'), ('HOST_MESSAGE', 'Host Message'), ('EVENT_UPDATE', 'Event Update'), ('SYSTEM', 'System Notification')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-19 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_reminder_ledger'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notificationjob',
+            name='kind',
+            field=models.CharField(choices=[('FANOUT', 'Notification Fan-out'), ('RSVP_CREATED', 'RSVP Created'), ('RSVP_UPDATED', 'RSVP Updated'), ('RSVP_APPROVAL', 'RSVP Approval')], max_length=30),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def backfill_unread_counters(apps, schema_editor):
+    """
+    Seed a counter for every user with unread notifications
+    """
+    Notification = apps.get_model('notifications', 'Notification')
+    UnreadCounter = apps.get_model('notifications', 'UnreadCounter')
+
+    counts = Notification.objects.filter(is_read=False).order_by().values('user_id').annotate(unread=Count('id'))
+
+    batch = []
+    for row in counts.iterator(chunk_size=2000):
+        batch.append(UnreadCounter(user_id=row['user_id'], unread=row['unread']))
+        if len(batch) >= 1000:
+            UnreadCounter.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+
+    if batch:
+        UnreadCounter.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_unread_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_unread_counters, migrations.RunPython.noop),
+    ]
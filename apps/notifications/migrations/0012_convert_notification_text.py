@@ -0,0 +1,127 @@
+import re
+
+from django.db import migrations
+
+
+# Stored text as formatted by earlier releases, matched back to templates.
+# The English formats double as the reverse conversion.
+STATUS_CODES = {'Yes': 'YES', 'No': 'NO', 'Maybe': 'MAYBE'}
+STATUS_LABELS = {code: label for label, code in STATUS_CODES.items()}
+
+PATTERNS = [
+    ('rsvp_created_host', 'New RSVP for your event',
+     r"(?P<guest>.*) has RSVP'd (?P<status>Yes|No|Maybe) to your event '(?P<event>.*)'\.",
+     "{guest} has RSVP'd {status} to your event '{event}'."),
+    ('rsvp_created_guest', 'RSVP Confirmation',
+     r"You have RSVP'd (?P<status>Yes|No|Maybe) to '(?P<event>.*)'\.",
+     "You have RSVP'd {status} to '{event}'."),
+    ('rsvp_digest', 'New RSVPs for your event',
+     r"\d+ new RSVPs for your event '(?P<event>.*)'\.",
+     "{count} new RSVPs for your event '{event}'."),
+    ('rsvp_updated_host', 'RSVP Updated',
+     r"(?P<guest>.*) has updated their RSVP to (?P<status>Yes|No|Maybe) for your event '(?P<event>.*)'\.",
+     "{guest} has updated their RSVP to {status} for your event '{event}'."),
+    ('rsvp_updated_guest', 'RSVP Update Confirmation',
+     r"You have updated your RSVP to (?P<status>Yes|No|Maybe) for '(?P<event>.*)'\.",
+     "You have updated your RSVP to {status} for '{event}'."),
+    ('rsvp_approved', 'RSVP Approved',
+     r"Your RSVP to '(?P<event>.*)' has been approved\.",
+     "Your RSVP to '{event}' has been approved."),
+    ('rsvp_rejected', 'RSVP Rejected',
+     r"Your RSVP to '(?P<event>.*)' has been rejected\.",
+     "Your RSVP to '{event}' has been rejected."),
+    ('event_reminder', 'Event Reminder',
+     r"Reminder: '(?P<event>.*)' is starting soon!",
+     "Reminder: '{event}' is starting soon!"),
+    ('payment_reminder', 'Payment Reminder',
+     r"Don't forget to pay for '(?P<event>.*)'\.",
+     "Don't forget to pay for '{event}'."),
+]
+
+BY_TITLE = {title: (template, re.compile(pattern, re.DOTALL)) for template, title, pattern, _ in PATTERNS}
+BY_TEMPLATE = {template: (title, message) for template, title, _, message in PATTERNS}
+
+BATCH_SIZE = 2000
+
+
+def _convert(model, transform, fields):
+    """
+    Rewrite rows in primary-key order, one batch per query
+    """
+    rows = model.objects.select_related('event').order_by('pk')
+    last_pk = None
+    while True:
+        batch = rows if last_pk is None else rows.filter(pk__gt=last_pk)
+        batch = list(batch[:BATCH_SIZE])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+
+        changed = [row for row in batch if transform(row)]
+        if changed:
+            model.objects.bulk_update(changed, fields, batch_size=100)
+
+
+def to_template(row):
+    if row.template or row.title not in BY_TITLE:
+        return False
+
+    template, pattern = BY_TITLE[row.title]
+    match = pattern.fullmatch(row.message)
+    if match is None:
+        # Reworded by hand - keep the stored text
+        return False
+
+    params = match.groupdict()
+    if 'status' in params:
+        params['status'] = STATUS_CODES[params['status']]
+    if row.event_id is not None:
+        # Rendered from the event itself
+        params.pop('event', None)
+
+    row.template = template
+    row.params = params
+    row.title = ''
+    row.message = ''
+    return True
+
+
+def to_text(row):
+    if row.template not in BY_TEMPLATE:
+        return False
+
+    title, message = BY_TEMPLATE[row.template]
+    params = dict(row.params, count=row.coalesced_count)
+    if 'event' not in params:
+        params['event'] = row.event.title if row.event_id else ''
+    if 'status' in params:
+        params['status'] = STATUS_LABELS.get(params['status'], params['status'])
+
+    row.title = title
+    row.message = message.format(**params)
+    row.template = ''
+    row.params = {}
+    return True
+
+
+def templatize_notifications(apps, schema_editor):
+    fields = ['title', 'message', 'template', 'params']
+    for name in ('Notification', 'ArchivedNotification'):
+        _convert(apps.get_model('notifications', name), to_template, fields)
+
+
+def format_notifications(apps, schema_editor):
+    fields = ['title', 'message', 'template', 'params']
+    for name in ('Notification', 'ArchivedNotification'):
+        _convert(apps.get_model('notifications', name), to_text, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0011_notification_templates'),
+    ]
+
+    operations = [
+        migrations.RunPython(templatize_notifications, format_notifications),
+    ]
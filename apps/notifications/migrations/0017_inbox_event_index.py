@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-19 03:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_event_schedule_indexes'),
+        ('notifications', '0016_push_devices'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'event', '-created_at'], name='notif_user_event_created_idx'),
+        ),
+    ]
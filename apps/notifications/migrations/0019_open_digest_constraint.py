@@ -0,0 +1,57 @@
+# Generated by Django 5.1.15 on 2026-10-19 04:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def close_duplicate_digests(apps, schema_editor):
+    """
+    Leave only the newest unread digest per user and key open to merging
+    """
+    Notification = apps.get_model('notifications', 'Notification')
+    rows = Notification.objects.filter(
+        coalescing_key__isnull=False,
+        is_read=False
+    ).order_by('user_id', 'coalescing_key', '-created_at').values_list('id', 'user_id', 'coalescing_key')
+
+    seen = set()
+    closed = []
+    for notification_id, user_id, key in rows.iterator(chunk_size=2000):
+        if (user_id, key) in seen:
+            closed.append(notification_id)
+        else:
+            seen.add((user_id, key))
+
+    for start in range(0, len(closed), 500):
+        Notification.objects.filter(id__in=closed[start:start + 500]).update(coalescing_key=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_event_schedule_indexes'),
+        ('notifications', '0018_notification_job_lease'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notif_user_coalesce_idx',
+        ),
+        migrations.AddField(
+            model_name='archivednotification',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(close_duplicate_digests, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('coalescing_key__isnull', False), ('is_read', False)), fields=('user', 'coalescing_key'), name='notif_user_open_digest_uniq'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.15 on 2026-10-19 04:21
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_event_dates(apps, schema_editor):
+    """
+    Key existing ledger rows by their event's current date
+    """
+    Event = apps.get_model('events', 'Event')
+    ReminderLedger = apps.get_model('notifications', 'ReminderLedger')
+    ReminderLedger.objects.update(
+        event_date=Subquery(Event.objects.filter(pk=OuterRef('event_id')).values('date')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_event_schedule_indexes'),
+        ('notifications', '0019_open_digest_constraint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reminderledger',
+            name='event_date',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(backfill_event_dates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='reminderledger',
+            name='event_date',
+            field=models.DateTimeField(),
+        ),
+        migrations.RemoveConstraint(
+            model_name='reminderledger',
+            name='unique_reminder_per_kind',
+        ),
+        migrations.AddConstraint(
+            model_name='reminderledger',
+            constraint=models.UniqueConstraint(fields=('event', 'user', 'kind', 'event_date'), name='unique_reminder_per_kind_and_date'),
+        ),
+    ]
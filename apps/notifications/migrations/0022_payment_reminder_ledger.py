@@ -0,0 +1,55 @@
+# Generated by Django 5.1.15 on 2026-10-19 04:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_ledger(apps, schema_editor):
+    """
+    Seed the ledger from the payment reminders already in inboxes, so
+    guests reminded recently aren't reminded again straight away
+    """
+    Notification = apps.get_model('notifications', 'Notification')
+    PaymentReminderLedger = apps.get_model('notifications', 'PaymentReminderLedger')
+
+    latest = Notification.objects.filter(
+        type='PAYMENT_REMINDER',
+        event__isnull=False
+    ).order_by().values_list('event_id', 'user_id').annotate(last_reminded_at=Max('created_at'))
+
+    batch = []
+    for event_id, user_id, last_reminded_at in latest.iterator(chunk_size=1000):
+        batch.append(PaymentReminderLedger(event_id=event_id, user_id=user_id, last_reminded_at=last_reminded_at))
+        if len(batch) >= 1000:
+            PaymentReminderLedger.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        PaymentReminderLedger.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_event_schedule_indexes'),
+        ('notifications', '0021_delivery_sending_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentReminderLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_reminded_at', models.DateTimeField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_reminder_ledger', to='events.event')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_reminder_ledger', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'payment_reminder_ledger',
+                'constraints': [models.UniqueConstraint(fields=('event', 'user'), name='unique_payment_reminder_per_guest')],
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
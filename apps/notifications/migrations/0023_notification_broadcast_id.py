@@ -0,0 +1,25 @@
+# Generated by Django 5.1.15 on 2026-10-19 04:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_event_schedule_indexes'),
+        ('notifications', '0022_payment_reminder_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='broadcast_id',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('broadcast_id__isnull', False)), fields=['broadcast_id'], name='notif_broadcast_idx'),
+        ),
+    ]
@@ -1,11 +1,35 @@
 import uuid
 from django.db import models
+from django.utils import timezone
 from apps.users.models import User
 from apps.events.models import Event
+from .catalog import render_notification
+
+class NotificationQuerySet(models.QuerySet):
+    """
+    QuerySet whose bulk deletes keep the unread counters in step
+    """
+    def delete(self):
+        from django.db import transaction
+        from django.db.models import Count
+        from .services import UnreadCounts
+        
+        with transaction.atomic(using=self.db):
+            deltas = {
+                user_id: -total
+                for user_id, total in self.filter(is_read=False).order_by().values_list('user_id').annotate(total=Count('id'))
+            }
+            result = super().delete()
+            UnreadCounts.adjust(deltas)
+        return result
 
 class Notification(models.Model):
     """
     Notification model for tracking user notifications
+
+    Unread counters are maintained by the write paths themselves (no delete
+    signal, so cascades from events and users stay cheap); deletes through
+    ``Notification.delete``, the queryset or an event cascade adjust them.
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     
@@ -20,14 +44,19 @@ class Notification(models.Model):
         ('RSVP_UPDATE', 'RSVP Status Update'),
         ('EVENT_REMINDER', 'Event Reminder'),
         ('PAYMENT_CONFIRMATION', 'Payment Confirmation'),
+        ('PAYMENT_REMINDER', 'Payment Reminder'),
         ('HOST_MESSAGE', 'Host Message'),
         ('EVENT_UPDATE', 'Event Update'),
         ('SYSTEM', 'System Notification'),
     )
     type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES)
     
-    title = models.CharField(max_length=255)
-    message = models.TextField()
+    # Free-form text, or empty when the notification is rendered from a
+    # template in ``catalog`` with the given params
+    title = models.CharField(max_length=255, blank=True, default='')
+    message = models.TextField(blank=True, default='')
+    template = models.CharField(max_length=40, blank=True, default='')
+    params = models.JSONField(default=dict, blank=True)
     
     # For action links, e.g., "View Event" button
     action_link = models.CharField(max_length=255, blank=True, null=True)
@@ -36,12 +65,330 @@ class Notification(models.Model):
     # Read status
     is_read = models.BooleanField(default=False)
     
+    # Notifications sharing a key are merged into one digest row; at most
+    # one unread row per user and key is open to merging
+    coalescing_key = models.CharField(max_length=100, blank=True, null=True)
+    coalesced_count = models.PositiveIntegerField(default=1)
+    
+    # Shared by the rows of one ``NotificationService.broadcast``, which
+    # finds them again by it
+    broadcast_id = models.UUIDField(null=True, blank=True, editable=False)
+    
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
+    # When a digest last absorbed a notification; created_at never moves,
+    # so inbox cursors stay stable
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+    
+    objects = NotificationQuerySet.as_manager()
     
     class Meta:
         db_table = 'notifications'
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Inbox pages are keyset scans of one user's rows
+            models.Index(fields=['user', '-created_at', '-id'], name='notif_user_created_idx'),
+            models.Index(
+                fields=['user', '-created_at', '-id'],
+                condition=models.Q(is_read=False),
+                name='notif_user_unread_idx'
+            ),
+            # Per-event grouping of the inbox (``?group=event``)
+            models.Index(fields=['user', 'event', '-created_at'], name='notif_user_event_created_idx'),
+            models.Index(
+                fields=['broadcast_id'],
+                condition=models.Q(broadcast_id__isnull=False),
+                name='notif_broadcast_idx'
+            ),
+        ]
+        constraints = [
+            # Keeps concurrent workers from opening two digests for one key
+            models.UniqueConstraint(
+                fields=['user', 'coalescing_key'],
+                condition=models.Q(coalescing_key__isnull=False, is_read=False),
+                name='notif_user_open_digest_uniq'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.name} - {render_notification(self)[0]}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored read state so saves can adjust unread counters
+        instance._loaded_is_read = instance.__dict__.get('is_read')
+        return instance
+    
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_is_read = self.__dict__.get('is_read')
+    
+    def delete(self, *args, **kwargs):
+        from django.db import transaction
+        from .services import UnreadCounts
+        
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            if not getattr(self, '_loaded_is_read', self.is_read):
+                UnreadCounts.adjust({self.user_id: -1})
+        return result
+
+
+class ArchivedNotification(models.Model):
+    """
+    Notifications moved out of the live table by the retention job;
+    columns mirror ``Notification`` so rows can be copied across in SQL
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    
+    # Relations
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_notifications')
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='archived_notifications', null=True, blank=True)
+    
+    type = models.CharField(max_length=20, choices=Notification.NOTIFICATION_TYPES)
+    title = models.CharField(max_length=255, blank=True, default='')
+    message = models.TextField(blank=True, default='')
+    template = models.CharField(max_length=40, blank=True, default='')
+    params = models.JSONField(default=dict, blank=True)
+    action_link = models.CharField(max_length=255, blank=True, null=True)
+    action_text = models.CharField(max_length=50, blank=True, null=True)
+    is_read = models.BooleanField(default=False)
+    coalescing_key = models.CharField(max_length=100, blank=True, null=True)
+    coalesced_count = models.PositiveIntegerField(default=1)
+    
+    # Metadata
+    created_at = models.DateTimeField()
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'notifications_archive'
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='notif_archive_user_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.name} - {render_notification(self)[0]}"
+
+
+class UnreadCounter(models.Model):
+    """
+    Running count of a user's unread notifications, kept in step with the
+    notifications table so the unread count is a single key lookup
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='unread_counter')
+    unread = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'notification_unread_counters'
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.unread}"
+
+
+class NotificationPreference(models.Model):
+    """
+    A user's delivery mode for each notification type
+
+    Each type owns one bit, its position in ``Notification.NOTIFICATION_TYPES``
+    (so new types must be appended), in two masks: muted types are never
+    written and digest types are folded into one row per type. Types in
+    neither mask, like users without a row, are delivered immediately.
+    """
+    MODES = ('immediate', 'digest', 'mute')
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_preference')
+    muted = models.PositiveIntegerField(default=0)
+    digest = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'notification_preferences'
+    
+    def __str__(self):
+        return f"{self.user_id} - muted {self.muted:b} - digest {self.digest:b}"
+    
+    @staticmethod
+    def bit(notification_type):
+        """
+        The mask bit of a notification type (0 for unknown types)
+        """
+        for index, (code, _) in enumerate(Notification.NOTIFICATION_TYPES):
+            if code == notification_type:
+                return 1 << index
+        return 0
+    
+    def get_mode(self, notification_type):
+        bit = self.bit(notification_type)
+        if self.muted & bit:
+            return 'mute'
+        if self.digest & bit:
+            return 'digest'
+        return 'immediate'
+    
+    def set_mode(self, notification_type, mode):
+        bit = self.bit(notification_type)
+        self.muted = self.muted | bit if mode == 'mute' else self.muted & ~bit
+        self.digest = self.digest | bit if mode == 'digest' else self.digest & ~bit
+
+
+class ReminderLedger(models.Model):
+    """
+    Records every reminder sent so each one goes out exactly once
+    per (event, user, reminder kind, event date)
+
+    The event's date is part of the key so rescheduling an event lets
+    its guests be reminded again for the new date.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='reminder_ledger')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reminder_ledger')
+    kind = models.CharField(max_length=10)
+    event_date = models.DateTimeField()
+    sent_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'reminder_ledger'
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'user', 'kind', 'event_date'], name='unique_reminder_per_kind_and_date'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.event_id} - {self.kind}"
+
+
+class PaymentReminderLedger(models.Model):
+    """
+    When each guest was last reminded to pay for an event, whether or not
+    their preferences let the reminder through
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='payment_reminder_ledger')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='payment_reminder_ledger')
+    last_reminded_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'payment_reminder_ledger'
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'user'], name='unique_payment_reminder_per_guest'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.event_id} - {self.last_reminded_at}"
+
+
+class NotificationJob(models.Model):
+    """
+    Queued notification work processed outside the request cycle
+    by the ``process_notification_jobs`` command
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    
+    JOB_KINDS = (
+        ('FANOUT', 'Notification Fan-out'),
+        ('RSVP_CREATED', 'RSVP Created'),
+        ('RSVP_UPDATED', 'RSVP Updated'),
+        ('RSVP_APPROVAL', 'RSVP Approval'),
+        ('EVENT_UPDATE', 'Event Update'),
+    )
+    kind = models.CharField(max_length=30, choices=JOB_KINDS)
+    payload = models.JSONField(default=dict)
+    
+    # Processing state
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    # Set while a worker has the job claimed; expired leases are reclaimed
+    locked_until = models.DateTimeField(null=True, blank=True)
+    
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'notification_jobs'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='notif_job_status_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} - {self.status}"
+
+
+class NotificationDelivery(models.Model):
+    """
+    Delivery of a notification over an off-platform channel, queued when the
+    notification is created and sent in batches by the delivery worker
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='deliveries')
+    # The recipient, copied from the notification for the per-user rate cap
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notification_deliveries')
+    
+    CHANNELS = (
+        ('EMAIL', 'Email'),
+        ('PUSH', 'Push'),
+    )
+    channel = models.CharField(max_length=10, choices=CHANNELS)
+    
+    # Delivery state
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # While SENDING, the end of the worker's lease
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, null=True)
+    
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'notification_deliveries'
+        indexes = [
+            models.Index(fields=['channel', 'status', 'next_attempt_at'], name='notif_delivery_due_idx'),
+            models.Index(fields=['user', 'channel', 'sent_at'], name='notif_delivery_user_sent_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.channel} - {self.user_id} - {self.status}"
+
+
+class Device(models.Model):
+    """
+    A push-notification token registered by one of a user's app installs
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='devices')
+    
+    PLATFORM_CHOICES = (
+        ('ANDROID', 'Android'),
+        ('IOS', 'iOS'),
+        ('WEB', 'Web'),
+    )
+    platform = models.CharField(max_length=10, choices=PLATFORM_CHOICES)
+    # Issued by the push provider; a token belongs to one install at a time
+    token = models.CharField(max_length=255, unique=True)
+    
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_seen_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'notification_devices'
     
     def __str__(self):
-        return f"{self.user.name} - {self.title}"
+        return f"{self.user_id} - {self.platform}"
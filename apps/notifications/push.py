@@ -0,0 +1,120 @@
+# apps/notifications/push.py
+import http.client
+import json
+import threading
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+class PushProvider:
+    """
+    Interface of push providers
+
+    ``send`` takes a list of messages (dicts with ``token``, ``title``,
+    ``body``, ``collapse_key`` and ``data``) and returns one result per
+    message, in order: ``'ok'``, ``'invalid_token'`` for tokens the provider
+    no longer knows (their devices are pruned) or any other error string.
+    """
+    batch_size = 500
+
+    def send(self, messages):
+        raise NotImplementedError
+
+
+class DummyPushProvider(PushProvider):
+    """
+    Accepts every message without sending it; only for tests, which
+    configure it explicitly
+    """
+    def __init__(self, **options):
+        self.sent = []
+
+    def send(self, messages):
+        self.sent.extend(messages)
+        return ['ok'] * len(messages)
+
+
+class HTTPPushProvider(PushProvider):
+    """
+    Posts messages in batches to an HTTP push gateway
+
+    Each request is ``{"messages": [...]}`` and the gateway answers with
+    ``{"results": [...]}`` in the same order. The connection is kept alive
+    between requests (one per thread), so a worker pays for the TCP and TLS
+    handshake once rather than per batch.
+    """
+    def __init__(self, url, api_key=None, batch_size=500, timeout=10, **options):
+        self.url = urlsplit(url)
+        self.api_key = api_key
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection_class = http.client.HTTPSConnection if self.url.scheme == 'https' else http.client.HTTPConnection
+            connection = connection_class(self.url.netloc, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def _post(self, body):
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f'Bearer {self.api_key}'
+
+        connection = self._connection()
+        try:
+            connection.request('POST', self.url.path or '/', body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            # Drop the connection so the next batch reconnects
+            connection.close()
+            self._local.connection = None
+            raise
+
+        if response.status != 200:
+            raise http.client.HTTPException(f'Push gateway returned {response.status}')
+        return json.loads(data)['results']
+
+    def send(self, messages):
+        results = []
+        for start in range(0, len(messages), self.batch_size):
+            batch = messages[start:start + self.batch_size]
+            try:
+                batch_results = self._post(json.dumps({'messages': batch}))
+                if len(batch_results) != len(batch):
+                    raise ValueError('Push gateway returned a result count that does not match the batch')
+            except (http.client.HTTPException, OSError, ValueError, KeyError) as exc:
+                batch_results = [str(exc) or exc.__class__.__name__] * len(batch)
+            results.extend(batch_results)
+        return results
+
+
+_provider = None
+
+def get_push_provider():
+    """
+    Return the process-wide provider configured by ``NOTIFICATION_PUSH_PROVIDER``
+
+    There is no default: without a provider, push deliveries must stay
+    queued rather than be marked sent.
+    """
+    global _provider
+    if _provider is None:
+        backend = getattr(settings, 'NOTIFICATION_PUSH_PROVIDER', None)
+        if not backend:
+            raise ImproperlyConfigured('NOTIFICATION_PUSH_PROVIDER must be set to deliver push notifications')
+        options = getattr(settings, 'NOTIFICATION_PUSH_PROVIDER_OPTIONS', {})
+        _provider = import_string(backend)(**options)
+    return _provider
+
+@receiver(setting_changed)
+def reset_push_provider(setting, **kwargs):
+    global _provider
+    if setting.startswith('NOTIFICATION_PUSH_PROVIDER'):
+        _provider = None
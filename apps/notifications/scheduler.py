@@ -0,0 +1,126 @@
+# apps/notifications/scheduler.py
+import heapq
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from apps.events.models import Event
+from .services import NotificationService
+
+DEFAULT_REMINDER_OFFSETS = {
+    '24h': timedelta(hours=24),
+    '1h': timedelta(hours=1),
+    '10m': timedelta(minutes=10),
+}
+
+class ReminderScheduler:
+    """
+    Long-running scheduler that sends each event reminder when it is due
+
+    Fire times for every (event, offset) pair inside a sliding horizon are
+    kept in a heap. Refreshes are incremental: events changed since the last
+    refresh (by ``updated_at``) are rescheduled, and the horizon is extended
+    with an index range scan on ``date``; nothing rescans the whole table.
+    Rescheduled events leave stale heap entries behind, which are skipped
+    when popped. Reminders go through ``NotificationService.send_reminders``
+    and its ledger, so restarts and overlapping runs never send twice.
+    """
+    def __init__(self, offsets=None, lookahead=timedelta(hours=1), refresh_interval=60, clock=timezone.now):
+        if offsets is None:
+            offsets = getattr(settings, 'NOTIFICATION_REMINDER_OFFSETS', DEFAULT_REMINDER_OFFSETS)
+        self.offsets = offsets
+        self.lookahead = lookahead
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+
+        self.heap = []
+        self.scheduled = {}
+        self.horizon = None
+        self.last_refresh = None
+
+    def schedule(self, event_id, date, now):
+        """
+        Queue an event's reminders, replacing any earlier schedule for it
+        """
+        self.scheduled[event_id] = date
+
+        past = [kind for kind, offset in self.offsets.items() if date - offset <= now]
+        for kind, offset in self.offsets.items():
+            if date - offset > now:
+                heapq.heappush(self.heap, (date - offset, str(event_id), kind, event_id, date))
+
+        if past and date > now:
+            # Added or moved inside some offsets: send only the nearest one now
+            kind = min(past, key=lambda kind: self.offsets[kind])
+            heapq.heappush(self.heap, (now, str(event_id), kind, event_id, date))
+
+    def refresh(self):
+        """
+        Pick up new and rescheduled events and extend the horizon
+        """
+        now = self.clock()
+        horizon = now + max(self.offsets.values()) + self.lookahead
+
+        if self.horizon is None:
+            events = Event.objects.filter(date__gt=now, date__lte=horizon)
+        else:
+            # Events entering the horizon, plus anything edited since the last refresh
+            events = Event.objects.filter(date__gt=self.horizon, date__lte=horizon) | Event.objects.filter(
+                updated_at__gte=self.last_refresh - timedelta(seconds=self.refresh_interval)
+            )
+
+        for event_id, date in events.values_list('id', 'date').order_by():
+            if self.scheduled.get(event_id) == date:
+                continue
+            if now < date <= horizon:
+                self.schedule(event_id, date, now)
+            else:
+                self.scheduled.pop(event_id, None)
+
+        self.horizon = horizon
+        self.last_refresh = now
+
+    def run_pending(self):
+        """
+        Send every reminder that is due; returns the number of notifications sent
+        """
+        now = self.clock()
+        due = {}
+        while self.heap and self.heap[0][0] <= now:
+            _, _, kind, event_id, date = heapq.heappop(self.heap)
+            if self.scheduled.get(event_id) != date:
+                # The event was rescheduled or moved out of the horizon
+                continue
+            due.setdefault(kind, []).append(event_id)
+
+        # Forget events once their last reminder has gone out
+        for kind, event_ids in due.items():
+            if kind == min(self.offsets, key=self.offsets.get):
+                for event_id in event_ids:
+                    self.scheduled.pop(event_id, None)
+
+        sent = 0
+        for kind, event_ids in due.items():
+            _, count = NotificationService.send_reminders(kind=kind, event_ids=event_ids)
+            sent += count
+        return sent
+
+    def seconds_until_next(self):
+        """
+        Time to sleep before the next reminder or refresh is due
+        """
+        wait = self.refresh_interval - (self.clock() - self.last_refresh).total_seconds()
+        if self.heap:
+            wait = min(wait, (self.heap[0][0] - self.clock()).total_seconds())
+        return max(wait, 0)
+
+    def run(self, stop=lambda: False):
+        """
+        Refresh and fire reminders until ``stop()`` returns true
+        """
+        self.refresh()
+        while not stop():
+            self.run_pending()
+            time.sleep(self.seconds_until_next())
+            if (self.clock() - self.last_refresh).total_seconds() >= self.refresh_interval:
+                self.refresh()
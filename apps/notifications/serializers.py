@@ -1,22 +1,94 @@
 from rest_framework import serializers
-from .models import Notification
+from rest_framework.exceptions import NotFound
+from django.conf import settings
+from .catalog import render_notification
+from .models import ArchivedNotification, Device, Notification, NotificationJob, NotificationPreference
+from .services import NotificationService
+from apps.core.pagination import KeysetPagination
 from apps.users.serializers import UserSerializer
+from apps.events.models import Event
 from apps.events.serializers import EventSerializer
+from apps.rsvp.models import RSVP
+
+class NotificationEventSerializer(serializers.ModelSerializer):
+    """
+    Compact event summary embedded in notifications
+    """
+    class Meta:
+        model = Event
+        fields = ('id', 'title', 'date')
+        read_only_fields = fields
 
 class NotificationSerializer(serializers.ModelSerializer):
     """
     Serializer for the Notification model
+
+    The event is a compact summary unless ``expand`` in the context contains
+    ``'event'``; expanded events are serialized once per response and shared
+    by every notification that refers to them.
     """
-    event = EventSerializer(read_only=True)
+    event = serializers.SerializerMethodField()
     
     class Meta:
         model = Notification
         fields = (
             'id', 'user', 'event', 'type', 'title', 
             'message', 'action_link', 'action_text',
-            'is_read', 'created_at'
+            'is_read', 'coalesced_count', 'created_at', 'last_activity_at'
         )
-        read_only_fields = ('id', 'user', 'created_at')
+        read_only_fields = ('id', 'user', 'coalesced_count', 'created_at', 'last_activity_at')
+    
+    def get_event(self, obj):
+        if obj.event_id is None:
+            return None
+        
+        if 'event' not in self.context.get('expand', ()):
+            return NotificationEventSerializer(obj.event).data
+        
+        # The context is shared by every row of a list, so it doubles as a
+        # per-response cache of expanded events
+        expanded = self.context.setdefault('expanded_events', {})
+        if obj.event_id not in expanded:
+            expanded[obj.event_id] = EventSerializer(obj.event, context=self.context).data
+        return expanded[obj.event_id]
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Templated notifications are rendered in the request's language
+        data['title'], data['message'] = render_notification(instance)
+        return data
+
+class NotificationGroupSerializer(serializers.Serializer):
+    """
+    Serializer for one event's entry in the grouped inbox
+
+    Rows come from the grouped query in ``NotificationViewSet``; the latest
+    notifications are passed in ``context['latest']``, keyed by id.
+    """
+    event = serializers.SerializerMethodField()
+    latest = serializers.SerializerMethodField()
+    latest_at = serializers.DateTimeField()
+    unread_count = serializers.IntegerField(source='unread')
+    count = serializers.IntegerField(source='total')
+    types = serializers.SerializerMethodField()
+    
+    def get_event(self, row):
+        return NotificationEventSerializer(self.context['latest'][row['latest_id']].event).data
+    
+    def get_latest(self, row):
+        return NotificationSerializer(self.context['latest'][row['latest_id']], context=self.context).data
+    
+    def get_types(self, row):
+        return [code for code, _ in Notification.NOTIFICATION_TYPES if row[f'type_{code}']]
+
+class ArchivedNotificationSerializer(NotificationSerializer):
+    """
+    Serializer for archived notifications (read-only)
+    """
+    class Meta:
+        model = ArchivedNotification
+        fields = NotificationSerializer.Meta.fields + ('archived_at',)
+        read_only_fields = fields
 
 class NotificationCreateSerializer(serializers.ModelSerializer):
     """
@@ -36,18 +108,23 @@ class NotificationCreateSerializer(serializers.ModelSerializer):
             'message', 'action_link', 'action_text'
         )
         read_only_fields = ('id',)
+        # Host messages are free-form text rather than a template
+        extra_kwargs = {
+            'title': {'required': True, 'allow_blank': False},
+            'message': {'required': True, 'allow_blank': False},
+        }
     
     def validate(self, data):
         """
         Validate notification data
         """
-        user_ids = data.pop('user_ids')
-        event_id = data.get('event_id')
+        user_ids = set(data.pop('user_ids'))
+        event_id = data.pop('event_id', None)
         
-        # Check that users exist
+        # Check that users exist without loading their rows
         from apps.users.models import User
-        users = User.objects.filter(id__in=user_ids)
-        if len(users) != len(user_ids):
+        existing_ids = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+        if existing_ids != user_ids:
             raise serializers.ValidationError("Some users do not exist")
         
         # Check that event exists if provided
@@ -59,53 +136,176 @@ class NotificationCreateSerializer(serializers.ModelSerializer):
             except Event.DoesNotExist:
                 raise serializers.ValidationError("Event does not exist")
         
-        # Store users for create method
-        self.users = users
+        # Store user ids for create method
+        self.user_ids = list(existing_ids)
         
         return data
     
     def create(self, validated_data):
         """
         Create notifications for multiple users
+
+        Audiences above ``NOTIFICATION_FANOUT_ASYNC_THRESHOLD`` are queued as a
+        background job (exposed as ``self.job``) and nothing is created inline.
         """
-        users = self.users
-        notifications = []
+        self.job = None
+        threshold = getattr(settings, 'NOTIFICATION_FANOUT_ASYNC_THRESHOLD', 1000)
         
-        # Create a notification for each user
-        for user in users:
-            notification = Notification.objects.create(
-                user=user,
-                **validated_data
+        if len(self.user_ids) > threshold:
+            event = validated_data.pop('event', None)
+            self.job = NotificationJob.objects.create(
+                kind='FANOUT',
+                payload={
+                    'user_ids': [str(user_id) for user_id in self.user_ids],
+                    'event_id': str(event.pk) if event else None,
+                    **validated_data
+                }
             )
-            notifications.append(notification)
+            return []
+        
+        return NotificationService.fan_out(self.user_ids, **validated_data)
+
+class NotificationBroadcastSerializer(serializers.Serializer):
+    """
+    Serializer for a host message to a segment of an event's guests
+
+    Guests are selected by RSVP ``status`` (default: those who said yes),
+    ``is_approved`` and, when ``paid`` is given, whether they have paid.
+    """
+    event_id = serializers.UUIDField()
+    title = serializers.CharField(max_length=255)
+    message = serializers.CharField()
+    action_link = serializers.CharField(max_length=255, required=False, allow_null=True)
+    action_text = serializers.CharField(max_length=50, required=False, allow_null=True)
+    
+    status = serializers.ListField(
+        child=serializers.ChoiceField(choices=RSVP.STATUS_CHOICES),
+        allow_empty=False,
+        default=['YES']
+    )
+    is_approved = serializers.BooleanField(default=True)
+    paid = serializers.BooleanField(required=False, allow_null=True, default=None)
+    
+    def validate_event_id(self, value):
+        try:
+            self.event = Event.objects.get(pk=value)
+        except Event.DoesNotExist:
+            raise serializers.ValidationError("Event does not exist")
+        return value
+    
+    def get_recipients(self):
+        """
+        The segment's RSVPs, as a queryset for ``NotificationService.broadcast``
+        """
+        from django.db.models import Exists, OuterRef
+        from apps.payments.models import Payment
+        
+        recipients = RSVP.objects.filter(
+            event=self.event,
+            status__in=self.validated_data['status'],
+            is_approved=self.validated_data['is_approved']
+        )
+        
+        paid = self.validated_data['paid']
+        if paid is not None:
+            has_paid = Exists(Payment.objects.filter(event=OuterRef('event'), user=OuterRef('user'), status='PAID'))
+            recipients = recipients.filter(has_paid if paid else ~has_paid)
         
-        # Return the first notification for API response
-        # In a real app, might want to return all of them
-        return notifications[0] if notifications else None
+        return recipients
+
+class NotificationPreferenceSerializer(serializers.Serializer):
+    """
+    Serializer for a user's notification preferences as ``{type: mode}``
+
+    Types left out of an update keep their current mode.
+    """
+    preferences = serializers.DictField(
+        child=serializers.ChoiceField(choices=NotificationPreference.MODES)
+    )
+    
+    def validate_preferences(self, value):
+        types = {code for code, _ in Notification.NOTIFICATION_TYPES}
+        unknown = sorted(set(value) - types)
+        if unknown:
+            raise serializers.ValidationError(f"Unknown notification types: {', '.join(unknown)}")
+        return value
+    
+    def to_representation(self, instance):
+        return {
+            'preferences': {
+                code: instance.get_mode(code) for code, _ in Notification.NOTIFICATION_TYPES
+            }
+        }
+    
+    def update(self, instance, validated_data):
+        for notification_type, mode in validated_data['preferences'].items():
+            instance.set_mode(notification_type, mode)
+        instance.save()
+        return instance
 
 class NotificationBatchSerializer(serializers.Serializer):
     """
     Serializer for batch operations on notifications
+
+    Ownership is enforced by the update itself, which only touches the
+    requesting user's notifications.
     """
     notification_ids = serializers.ListField(
         child=serializers.UUIDField(),
-        required=True
+        required=True,
+        allow_empty=False,
+        max_length=1000
     )
+
+class NotificationReadUntilSerializer(serializers.Serializer):
+    """
+    Serializer for marking the inbox read up to a position
+
+    ``cursor`` is an inbox cursor (e.g. from a page's ``next`` link): every
+    notification down to and including that position is marked. ``before``
+    marks everything created at or before a timestamp.
+    """
+    cursor = serializers.CharField(required=False)
+    before = serializers.DateTimeField(required=False)
     
     def validate(self, data):
-        user = self.context['request'].user
-        notification_ids = data['notification_ids']
-        
-        # Check that all notifications belong to the user
-        notifications = Notification.objects.filter(
-            id__in=notification_ids,
-            user=user
-        )
-        
-        if len(notifications) != len(notification_ids):
-            raise serializers.ValidationError("Some notifications do not exist or do not belong to you")
+        if ('cursor' in data) == ('before' in data):
+            raise serializers.ValidationError("Provide either a cursor or a before timestamp")
         
-        # Store notifications for later use
-        self.notifications = notifications
+        if 'cursor' in data:
+            try:
+                data['position'] = KeysetPagination().decode_cursor(Notification.objects.all(), data['cursor'])
+            except NotFound:
+                raise serializers.ValidationError({'cursor': "Invalid cursor"})
         
-        return data
\ No newline at end of file
+        return data
+    
+    def get_queryset(self, queryset):
+        """
+        Restrict ``queryset`` to the notifications to mark
+        """
+        if 'position' in self.validated_data:
+            return KeysetPagination().through(queryset, self.validated_data['position'])
+        return queryset.filter(created_at__lte=self.validated_data['before'])
+
+class DeviceSerializer(serializers.ModelSerializer):
+    """
+    Serializer for registering a push device
+    """
+    token = serializers.CharField(max_length=255)
+    
+    class Meta:
+        model = Device
+        fields = ('id', 'platform', 'token', 'created_at', 'last_seen_at')
+        read_only_fields = ('id', 'created_at', 'last_seen_at')
+    
+    def create(self, validated_data):
+        """
+        Register the token for the requesting user, taking it over from
+        whichever account registered it before
+        """
+        device, _ = Device.objects.update_or_create(
+            token=validated_data['token'],
+            defaults={'user': self.context['request'].user, 'platform': validated_data['platform']}
+        )
+        return device
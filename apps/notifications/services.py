@@ -1,18 +1,39 @@
 # apps/notifications/services.py
-from django.db import transaction
+from datetime import timedelta
+from django.conf import settings
+from django.db import NotSupportedError, connection, models, transaction
+from .catalog import render_notification
 from .models import Notification
+from ..core.cache import shared_timeout
+
+class RandomUUID(models.Func):
+    """
+    A random UUID generated by the database, for rows inserted without
+    passing through Python
+    """
+    output_field = models.UUIDField()
+    
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError(f'RandomUUID is not supported on {connection.vendor}')
+    
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return 'gen_random_uuid()', []
+    
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # UUIDs are stored as 32 hex characters on SQLite
+        return 'lower(hex(randomblob(16)))', []
 
 class NotificationService:
     """
     Service for creating and managing notifications related to RSVPs and events
     """
     
-    @staticmethod
-    def create_notification(user, event, notification_type, title, message, action_link=None, action_text=None):
+    @classmethod
+    def create_notification(cls, user, event, notification_type, title, message, action_link=None, action_text=None):
         """
-        Create a notification for a user
+        Create a notification for a user; returns ``None`` if they muted its type
         """
-        return Notification.objects.create(
+        notifications = cls.bulk_create_notifications([Notification(
             user=user,
             event=event,
             type=notification_type,
@@ -20,105 +41,797 @@ class NotificationService:
             message=message,
             action_link=action_link,
             action_text=action_text
+        )])
+        return notifications[0] if notifications else None
+    
+    @classmethod
+    def bulk_create_notifications(cls, notifications, batch_size=None):
+        """
+        Insert notifications in batches
+
+        Primary keys are generated client-side, so the returned objects
+        are complete without reading them back. Notifications carrying a
+        ``coalescing_key`` are merged into the recipient's digest row for
+        that key instead (see ``coalesce``). Recipients' preferences are
+        applied first, so muted notifications are never written.
+        """
+        if batch_size is None:
+            batch_size = getattr(settings, 'NOTIFICATION_BULK_BATCH_SIZE', 500)
+        
+        notifications = NotificationPreferences.apply(list(notifications))
+        
+        plain = []
+        groups = {}
+        for notification in notifications:
+            if notification.coalescing_key:
+                groups.setdefault((notification.user_id, notification.coalescing_key), []).append(notification)
+            else:
+                plain.append(notification)
+        
+        if plain:
+            cls._insert(plain, batch_size)
+        
+        return plain + [cls.coalesce(group) for group in groups.values()]
+    
+    @classmethod
+    def _insert(cls, notifications, batch_size):
+        from .delivery import enqueue
+        
+        Notification.objects.bulk_create(notifications, batch_size=batch_size)
+        UnreadCounts.adjust(cls.unread_deltas(notifications))
+        enqueue(notifications)
+        cls.publish(notifications)
+    
+    @classmethod
+    def coalesce(cls, notifications):
+        """
+        Fold notifications sharing a recipient and coalescing key into one row
+
+        The recipient's open digest for the key (its unread row holding the
+        key) absorbs the new notifications until it is
+        ``NOTIFICATION_COALESCE_WINDOW`` old, recording each merge in
+        ``last_activity_at``; ``created_at``, and so the row's place in the
+        inbox, never changes. An older digest is closed (its key cleared)
+        and the latest notification starts a new one, as a digest if there
+        are several. Only one digest per key may be open, so a worker that
+        loses the race to open it merges into the winner's row instead.
+        """
+        from django.db import IntegrityError
+        from django.utils import timezone
+        
+        latest = notifications[-1]
+        count = len(notifications)
+        window = getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', timedelta(hours=1))
+        
+        for attempt in range(2):
+            now = timezone.now()
+            try:
+                with transaction.atomic():
+                    digest = Notification.objects.select_for_update().filter(
+                        user_id=latest.user_id,
+                        coalescing_key=latest.coalescing_key,
+                        is_read=False
+                    ).first()
+                    
+                    if digest is not None and digest.created_at < now - window:
+                        Notification.objects.filter(pk=digest.pk).update(coalescing_key=None)
+                        digest = None
+                    
+                    if digest is None:
+                        latest.coalesced_count = count
+                        cls._insert([latest], batch_size=1)
+                        return latest
+                    
+                    digest.coalesced_count += count
+                    digest.title = latest.title
+                    digest.message = latest.message
+                    digest.params = latest.params
+                    digest.action_link = latest.action_link
+                    digest.action_text = latest.action_text
+                    digest.last_activity_at = now
+                    digest.save(update_fields=[
+                        'coalesced_count', 'title', 'message', 'params', 'action_link', 'action_text', 'last_activity_at'
+                    ])
+                break
+            except IntegrityError:
+                # Another worker opened the digest first; merge into it
+                if attempt:
+                    raise
+        
+        cls.publish([digest], new=False)
+        return digest
+    
+    @staticmethod
+    def unread_deltas(notifications):
+        """
+        Count the unread notifications per user
+        """
+        unread = {}
+        for notification in notifications:
+            if not notification.is_read:
+                unread[notification.user_id] = unread.get(notification.user_id, 0) + 1
+        return unread
+    
+    @staticmethod
+    def stream_payload(notification):
+        """
+        Compact representation of a notification pushed to live streams
+        """
+        title, message = render_notification(notification)
+        return {
+            'id': str(notification.id),
+            'event_id': str(notification.event_id) if notification.event_id else None,
+            'type': notification.type,
+            'title': title,
+            'message': message,
+            'action_link': notification.action_link,
+            'action_text': notification.action_text,
+            'is_read': notification.is_read,
+            'coalesced_count': notification.coalesced_count,
+            'created_at': notification.created_at.isoformat(),
+            'last_activity_at': notification.last_activity_at.isoformat() if notification.last_activity_at else None,
+        }
+    
+    @classmethod
+    def publish(cls, notifications, new=True):
+        """
+        Push new (or, with ``new=False``, updated) notifications and unread
+        deltas to live streams once the surrounding transaction commits
+        """
+        from apps.events.models import Event
+        from .broker import get_broker
+        
+        # Load the events whose titles the payloads render, in one query
+        missing = {
+            notification.event_id for notification in notifications
+            if notification.event_id and not Notification.event.is_cached(notification)
+        }
+        if missing:
+            titles = Event.objects.only('id', 'title').in_bulk(missing)
+            for notification in notifications:
+                if notification.event_id in titles and not Notification.event.is_cached(notification):
+                    notification.event = titles[notification.event_id]
+        
+        events = []
+        unread = cls.unread_deltas(notifications) if new else {}
+        for notification in notifications:
+            events.append((str(notification.user_id), {'event': 'notification', 'data': cls.stream_payload(notification)}))
+        
+        events.extend(
+            (str(user_id), {'event': 'unread', 'data': {'delta': delta}})
+            for user_id, delta in unread.items()
         )
+        transaction.on_commit(lambda: get_broker().publish_many(events))
+    
+    @staticmethod
+    def adjust_unread(user_id, delta):
+        """
+        Record and push an unread-count change (e.g. after marking
+        notifications read)
+        """
+        from .broker import get_broker
+        
+        if delta:
+            UnreadCounts.adjust({user_id: delta})
+            event = {'event': 'unread', 'data': {'delta': delta}}
+            transaction.on_commit(lambda: get_broker().publish(str(user_id), event))
     
     @classmethod
-    def notify_rsvp_created(cls, rsvp):
+    def fan_out(cls, user_ids, batch_size=None, **fields):
         """
-        Send notifications when a new RSVP is created
+        Create the same notification for many users, one batch at a time
+        """
+        if batch_size is None:
+            batch_size = getattr(settings, 'NOTIFICATION_BULK_BATCH_SIZE', 500)
+        
+        created = []
+        user_ids = list(user_ids)
+        with transaction.atomic():
+            for start in range(0, len(user_ids), batch_size):
+                created.extend(cls.bulk_create_notifications(
+                    [Notification(user_id=user_id, **fields) for user_id in user_ids[start:start + batch_size]],
+                    batch_size=batch_size
+                ))
+        return created
+    
+    @classmethod
+    def broadcast(cls, recipients, batch_size=None, **fields):
+        """
+        Create the same notification for every user in ``recipients``, a
+        queryset with a ``user`` foreign key (e.g. a segment of an event's
+        RSVPs), and return how many were sent
+
+        The rows are written by a single ``INSERT ... SELECT``, tagged with
+        a ``broadcast_id`` of their own, and unread counters by a single
+        upsert counting the tagged rows, so recipients are never loaded into
+        Python. Databases without a ``RandomUUID`` implementation fall back
+        to inserting batches of recipient ids. Live streams are notified
+        after commit from the tagged ``(id, user_id)`` pairs, a batch at a
+        time. Users who muted the type are left out; digest preferences
+        don't apply.
+        """
+        import uuid
+        from django.utils import timezone
+        from .models import NotificationPreference
+        
+        if batch_size is None:
+            batch_size = getattr(settings, 'NOTIFICATION_BULK_BATCH_SIZE', 500)
+        
+        recipients = recipients.order_by()
+        bit = NotificationPreference.bit(fields.get('type'))
+        if bit:
+            muted = NotificationPreference.objects.annotate(
+                muted_type=models.F('muted').bitand(bit)
+            ).filter(muted_type=bit).values('user')
+            recipients = recipients.exclude(user__in=muted)
+        prototype = Notification(created_at=timezone.now(), broadcast_id=uuid.uuid4(), **fields)
+        columns = {
+            field.column: models.Value(getattr(prototype, field.attname), output_field=field)
+            for field in Notification._meta.concrete_fields
+        }
+        columns[Notification._meta.pk.column] = RandomUUID()
+        columns[Notification._meta.get_field('user').column] = models.F('user')
+        
+        select = recipients.annotate(**{
+            f'notification_{column}': expression for column, expression in columns.items()
+        }).values_list(*[f'notification_{column}' for column in columns])
+        
+        with transaction.atomic():
+            try:
+                select_sql, select_params = select.query.sql_with_params()
+            except NotSupportedError:
+                return len(cls.fan_out(
+                    recipients.values_list('user', flat=True).iterator(chunk_size=batch_size),
+                    batch_size=batch_size,
+                    **fields
+                ))
+            
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {connection.ops.quote_name(Notification._meta.db_table)} '
+                    f'({", ".join(connection.ops.quote_name(column) for column in columns)}) {select_sql}',
+                    select_params
+                )
+                count = cursor.rowcount
+            
+            cls._count_broadcast(prototype.broadcast_id, prototype.created_at)
+            
+            sent = Notification.objects.filter(
+                broadcast_id=prototype.broadcast_id
+            ).order_by().values_list('id', 'user_id')
+            transaction.on_commit(lambda: cls._announce_broadcast(prototype, sent, batch_size))
+        
+        return count
+    
+    @staticmethod
+    def _count_broadcast(broadcast_id, now):
+        """
+        Add a broadcast's rows to their recipients' unread counters in one
+        upsert
+
+        Recipients without a counter get one counting all their unread
+        notifications, these included, so they start out right rather than
+        at the size of the broadcast.
+        """
+        from .models import UnreadCounter
+        
+        quote = connection.ops.quote_name
+        counters = quote(UnreadCounter._meta.db_table)
+        user = quote(UnreadCounter._meta.get_field('user').column)
+        unread = quote(UnreadCounter._meta.get_field('unread').column)
+        updated_at = quote(UnreadCounter._meta.get_field('updated_at').column)
+        broadcast_field = Notification._meta.get_field('broadcast_id')
+        
+        totals_sql, totals_params = Notification.objects.filter(
+            user__in=Notification.objects.filter(broadcast_id=broadcast_id).values('user'),
+            is_read=False
+        ).order_by().values('user').annotate(
+            total=models.Count('pk'),
+            now=models.Value(now, output_field=models.DateTimeField())
+        ).values_list('user', 'total', 'now').query.sql_with_params()
+        
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {counters} ({user}, {unread}, {updated_at}) {totals_sql} '
+                f'ON CONFLICT ({user}) DO UPDATE SET '
+                f'{unread} = {counters}.{unread} + ('
+                f'SELECT COUNT(*) FROM {quote(Notification._meta.db_table)} '
+                f'WHERE {quote(broadcast_field.column)} = %s '
+                f'AND {quote(Notification._meta.get_field("user").column)} = excluded.{user}'
+                f'), {updated_at} = excluded.{updated_at}',
+                [*totals_params, broadcast_field.get_db_prep_value(broadcast_id, connection)]
+            )
+    
+    @classmethod
+    def _announce_broadcast(cls, prototype, sent, batch_size):
+        """
+        Drop cached unread counts, queue off-platform deliveries and push a
+        broadcast to live streams
+        """
+        payload = cls.stream_payload(prototype)
+        unread = {'event': 'unread', 'data': {'delta': 1}}
+        
+        batch = []
+        for notification_id, user_id in sent.iterator(chunk_size=batch_size):
+            batch.append((notification_id, user_id))
+            if len(batch) >= batch_size:
+                cls._announce_batch(payload, unread, batch)
+                batch = []
+        if batch:
+            cls._announce_batch(payload, unread, batch)
+    
+    @staticmethod
+    def _announce_batch(payload, unread, batch):
+        from django.core.cache import cache
+        from .broker import get_broker
+        from .delivery import enqueue
+        
+        cache.delete_many([UnreadCounts._key(user_id) for _, user_id in batch])
+        enqueue([
+            Notification(id=notification_id, user_id=user_id, type=payload['type'])
+            for notification_id, user_id in batch
+        ])
+        events = []
+        for notification_id, user_id in batch:
+            events.append((str(user_id), {'event': 'notification', 'data': dict(payload, id=str(notification_id))}))
+            events.append((str(user_id), unread))
+        get_broker().publish_many(events)
+    
+    @classmethod
+    def rsvp_created_notifications(cls, rsvp, status=None):
+        """
+        Build (unsaved) notifications for a new RSVP
         """
         event = rsvp.event
         host = event.created_by
         guest = rsvp.user
+        params = {'status': status or rsvp.status}
         
-        # Notify host
-        cls.create_notification(
-            user=host,
-            event=event,
-            notification_type='RSVP_CONFIRMATION',
-            title='New RSVP for your event',
-            message=f"{guest.name} has RSVP'd {rsvp.get_status_display()} to your event '{event.title}'.",
-            action_link=f'/events/{event.id}/guests',
-            action_text='View Guest List'
-        )
-        
-        # Notify guest
-        cls.create_notification(
-            user=guest,
-            event=event,
-            notification_type='RSVP_CONFIRMATION',
-            title='RSVP Confirmation',
-            message=f"You have RSVP'd {rsvp.get_status_display()} to '{event.title}'.",
-            action_link=f'/events/{event.id}',
-            action_text='View Event'
-        )
+        return [
+            # Notify host - merged into one digest row for busy events
+            Notification(
+                user=host,
+                event=event,
+                type='RSVP_CONFIRMATION',
+                template='rsvp_created_host',
+                params={**params, 'guest': guest.name},
+                action_link=f'/events/{event.id}/guests',
+                action_text='View Guest List',
+                coalescing_key=f'rsvp:{event.id}'
+            ),
+            # Notify guest
+            Notification(
+                user=guest,
+                event=event,
+                type='RSVP_CONFIRMATION',
+                template='rsvp_created_guest',
+                params=params,
+                action_link=f'/events/{event.id}',
+                action_text='View Event'
+            ),
+        ]
     
     @classmethod
-    def notify_rsvp_updated(cls, rsvp):
+    def rsvp_updated_notifications(cls, rsvp, status=None):
         """
-        Send notifications when an RSVP is updated
+        Build (unsaved) notifications for an RSVP status change
         """
         event = rsvp.event
         host = event.created_by
         guest = rsvp.user
+        params = {'status': status or rsvp.status}
         
-        # Notify host
-        cls.create_notification(
-            user=host,
-            event=event,
-            notification_type='RSVP_UPDATE',
-            title='RSVP Updated',
-            message=f"{guest.name} has updated their RSVP to {rsvp.get_status_display()} for your event '{event.title}'.",
-            action_link=f'/events/{event.id}/guests',
-            action_text='View Guest List'
-        )
+        return [
+            # Notify host
+            Notification(
+                user=host,
+                event=event,
+                type='RSVP_UPDATE',
+                template='rsvp_updated_host',
+                params={**params, 'guest': guest.name},
+                action_link=f'/events/{event.id}/guests',
+                action_text='View Guest List'
+            ),
+            # Notify guest
+            Notification(
+                user=guest,
+                event=event,
+                type='RSVP_UPDATE',
+                template='rsvp_updated_guest',
+                params=params,
+                action_link=f'/events/{event.id}',
+                action_text='View Event'
+            ),
+        ]
+    
+    @classmethod
+    def rsvp_approval_notifications(cls, rsvp, is_approved):
+        """
+        Build (unsaved) notifications for an RSVP approval or rejection
+        """
+        event = rsvp.event
+        guest = rsvp.user
         
-        # Notify guest
-        cls.create_notification(
-            user=guest,
-            event=event,
-            notification_type='RSVP_UPDATE',
-            title='RSVP Update Confirmation',
-            message=f"You have updated your RSVP to {rsvp.get_status_display()} for '{event.title}'.",
-            action_link=f'/events/{event.id}',
-            action_text='View Event'
-        )
+        return [
+            Notification(
+                user=guest,
+                event=event,
+                type='RSVP_UPDATE',
+                template='rsvp_approved' if is_approved else 'rsvp_rejected',
+                action_link=f'/events/{event.id}',
+                action_text='View Event'
+            ),
+        ]
+    
+    @classmethod
+    def notify_rsvp_created(cls, rsvp):
+        """
+        Send notifications when a new RSVP is created
+        """
+        return cls.bulk_create_notifications(cls.rsvp_created_notifications(rsvp))
+    
+    @classmethod
+    def notify_rsvp_updated(cls, rsvp):
+        """
+        Send notifications when an RSVP is updated
+        """
+        return cls.bulk_create_notifications(cls.rsvp_updated_notifications(rsvp))
     
     @classmethod
     def notify_rsvp_approval(cls, rsvp, is_approved):
         """
         Send notifications when an RSVP is approved or rejected
         """
-        event = rsvp.event
-        guest = rsvp.user
+        return cls.bulk_create_notifications(cls.rsvp_approval_notifications(rsvp, is_approved))
+    
+    @classmethod
+    def send_event_reminder(cls, event, kind='24h'):
+        """
+        Send reminders to all approved guests for an upcoming event
+        """
+        return cls.send_reminders(kind=kind, event_ids=[event.pk])
+    
+    @classmethod
+    def send_reminders(cls, kind='24h', window=None, event_ids=None, batch_size=None):
+        """
+        Send reminders of one kind to every approved YES guest of events
+        starting within ``window`` (or of ``event_ids``, regardless of date)
+
+        Qualifying RSVPs come from a single streamed query that skips
+        guests already recorded in the reminder ledger for the event's
+        current date. Each chunk writes its ledger rows and notifications
+        in one transaction, so a guest gets each kind of reminder exactly
+        once per event date even across hourly runs.
+        Returns ``(event_count, reminder_count)``, counting only events and
+        reminders actually sent by this call.
+        """
+        from django.db.models import Exists, OuterRef
+        from django.utils import timezone
+        from apps.rsvp.models import RSVP
+        from .models import ReminderLedger
         
-        status_text = "approved" if is_approved else "rejected"
+        if batch_size is None:
+            batch_size = getattr(settings, 'NOTIFICATION_BULK_BATCH_SIZE', 500)
         
-        cls.create_notification(
-            user=guest,
-            event=event,
-            notification_type='RSVP_UPDATE',
-            title=f'RSVP {status_text.capitalize()}',
-            message=f"Your RSVP to '{event.title}' has been {status_text}.",
-            action_link=f'/events/{event.id}',
-            action_text='View Event'
+        already_sent = ReminderLedger.objects.filter(
+            event=OuterRef('event'),
+            user=OuterRef('user'),
+            kind=kind,
+            event_date=OuterRef('event__date')
         )
+        rsvps = RSVP.objects.filter(status='YES', is_approved=True).filter(~Exists(already_sent))
+        
+        if event_ids is not None:
+            rsvps = rsvps.filter(event_id__in=event_ids)
+        else:
+            now = timezone.now()
+            rsvps = rsvps.filter(event__date__gt=now, event__date__lte=now + window)
+        
+        events = set()
+        sent = 0
+        chunk = []
+        for row in rsvps.values_list('event_id', 'user_id', 'event__date').iterator(chunk_size=batch_size):
+            events.add(row[0])
+            chunk.append(row)
+            if len(chunk) >= batch_size:
+                sent += cls._send_reminder_chunk(chunk, kind)
+                chunk = []
+        
+        if chunk:
+            sent += cls._send_reminder_chunk(chunk, kind)
+        
+        return len(events), sent
     
     @classmethod
-    def send_event_reminder(cls, event):
+    def _send_reminder_chunk(cls, rows, kind):
         """
-        Send reminders to all approved guests for an upcoming event
+        Record and create one chunk of reminders
         """
-        # Get all approved RSVPs
-        rsvps = event.rsvps.filter(status='YES', is_approved=True)
+        from django.db import IntegrityError
+        from .models import ReminderLedger
         
-        for rsvp in rsvps:
-            cls.create_notification(
-                user=rsvp.user,
-                event=event,
-                notification_type='EVENT_REMINDER',
-                title='Event Reminder',
-                message=f"Reminder: '{event.title}' is starting soon!",
-                action_link=f'/events/{event.id}',
+        try:
+            with transaction.atomic():
+                ReminderLedger.objects.bulk_create([
+                    ReminderLedger(event_id=event_id, user_id=user_id, kind=kind, event_date=event_date)
+                    for event_id, user_id, event_date in rows
+                ])
+                cls._create_reminders(rows)
+        except IntegrityError:
+            # A concurrent run got to some of these guests first, so fall
+            # back to claiming them one at a time and skip the taken ones
+            claimed = []
+            for row in rows:
+                try:
+                    with transaction.atomic():
+                        ReminderLedger.objects.create(event_id=row[0], user_id=row[1], kind=kind, event_date=row[2])
+                        cls._create_reminders([row])
+                except IntegrityError:
+                    continue
+                claimed.append(row)
+            rows = claimed
+        
+        return len(rows)
+    
+    @classmethod
+    def _create_reminders(cls, rows):
+        cls.bulk_create_notifications([
+            Notification(
+                user_id=user_id,
+                event_id=event_id,
+                type='EVENT_REMINDER',
+                template='event_reminder',
+                action_link=f'/events/{event_id}',
                 action_text='View Event'
-            )
\ No newline at end of file
+            )
+            for event_id, user_id, _ in rows
+        ])
+
+
+class NotificationPreferences:
+    """
+    Cached lookup of users' notification preferences
+
+    Each user's ``(muted, digest)`` masks are cached under one key, including
+    the defaults for users without a row, so a fan-out resolves all of its
+    recipients with one ``get_many`` and at most one query. A preference
+    change drops the user's key, which only reaches the workers through a
+    shared cache; otherwise cached masks expire after ``LOCAL_CACHE_TIMEOUT``.
+    """
+    CACHE_KEY = 'notifications:preferences:{user_id}'
+    
+    @classmethod
+    def _key(cls, user_id):
+        return cls.CACHE_KEY.format(user_id=user_id)
+    
+    @staticmethod
+    def _timeout():
+        return shared_timeout(getattr(settings, 'NOTIFICATION_PREFERENCES_TIMEOUT', 60 * 60))
+    
+    @classmethod
+    def get_many(cls, user_ids):
+        """
+        Return ``{user_id: (muted, digest)}`` for the given users
+        """
+        from django.core.cache import cache
+        from .models import NotificationPreference
+        
+        keys = {cls._key(user_id): user_id for user_id in set(user_ids)}
+        if not keys:
+            return {}
+        
+        masks = {keys[key]: tuple(value) for key, value in cache.get_many(keys).items()}
+        missing = [user_id for user_id in keys.values() if user_id not in masks]
+        if missing:
+            stored = {
+                user_id: (muted, digest)
+                for user_id, muted, digest in NotificationPreference.objects.filter(
+                    user_id__in=missing
+                ).values_list('user_id', 'muted', 'digest')
+            }
+            loaded = {user_id: stored.get(user_id, (0, 0)) for user_id in missing}
+            cache.set_many({cls._key(user_id): value for user_id, value in loaded.items()}, cls._timeout())
+            masks.update(loaded)
+        return masks
+    
+    @classmethod
+    def invalidate(cls, user_id):
+        from django.core.cache import cache
+        
+        cache.delete(cls._key(user_id))
+    
+    @classmethod
+    def apply(cls, notifications):
+        """
+        Drop muted notifications and route digest-only ones into a digest
+        row per type and event, so each digest's params, link and event
+        agree; returns the notifications still to be written
+        """
+        from .models import NotificationPreference
+        
+        masks = cls.get_many(notification.user_id for notification in notifications)
+        kept = []
+        for notification in notifications:
+            muted, digest = masks[notification.user_id]
+            bit = NotificationPreference.bit(notification.type)
+            if muted & bit:
+                continue
+            if digest & bit and not notification.coalescing_key:
+                notification.coalescing_key = f'digest:{notification.type}:{notification.event_id or ""}'
+            kept.append(notification)
+        return kept
+
+
+class UnreadCounts:
+    """
+    Per-user unread notification counts
+
+    Counts live in ``UnreadCounter`` rows, adjusted with relative updates so
+    concurrent writers don't lose increments, and are mirrored in the cache:
+    a change drops the cached value, and the next read reloads it from the
+    single counter row. Drift is repaired by ``reconcile``. Changes made by
+    the workers only reach the web server's cached values through a shared
+    cache; otherwise cached counts expire after ``LOCAL_CACHE_TIMEOUT``.
+    """
+    CACHE_KEY = 'notifications:unread:{user_id}'
+
+    @classmethod
+    def _key(cls, user_id):
+        return cls.CACHE_KEY.format(user_id=user_id)
+
+    @staticmethod
+    def _timeout():
+        return shared_timeout(getattr(settings, 'UNREAD_COUNT_TIMEOUT', 60 * 60))
+
+    @classmethod
+    def get(cls, user_id):
+        """
+        Get a user's unread count
+        """
+        from django.core.cache import cache
+        from .models import UnreadCounter
+        
+        key = cls._key(user_id)
+        count = cache.get(key)
+        if count is None:
+            count = UnreadCounter.objects.filter(user_id=user_id).values_list('unread', flat=True).first()
+            if count is None:
+                # No counter yet - seed it from the notifications table
+                count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+                UnreadCounter.objects.bulk_create(
+                    [UnreadCounter(user_id=user_id, unread=count)],
+                    ignore_conflicts=True
+                )
+            cache.set(key, count, cls._timeout())
+        return count
+
+    @classmethod
+    def adjust(cls, deltas):
+        """
+        Apply ``{user_id: delta}`` changes to the counters, once the
+        notifications they describe have been written
+
+        A user's first increment creates their counter from a count of
+        their unread notifications, which already includes the change, so
+        the delta itself is only applied to counters that existed.
+        Decrementing a missing counter is a no-op for the same reason: it
+        will be seeded from the notifications table when first needed.
+        """
+        from django.core.cache import cache
+        from django.db.models import F
+        from django.db.models.functions import Greatest
+        from django.utils import timezone
+        from .models import UnreadCounter
+        
+        deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        
+        with transaction.atomic():
+            seeded = cls._seed([user_id for user_id, delta in deltas.items() if delta > 0])
+            
+            # One UPDATE per distinct delta, usually just one for a fan-out
+            by_delta = {}
+            for user_id, delta in deltas.items():
+                if user_id not in seeded:
+                    by_delta.setdefault(delta, []).append(user_id)
+            
+            now = timezone.now()
+            for delta, user_ids in by_delta.items():
+                UnreadCounter.objects.filter(user_id__in=user_ids).update(
+                    unread=Greatest(F('unread') + delta, 0),
+                    updated_at=now
+                )
+        
+        keys = [cls._key(user_id) for user_id in deltas]
+        cache.delete_many(keys)
+        # Readers may have cached the old value before this transaction commits
+        transaction.on_commit(lambda: cache.delete_many(keys))
+    
+    @staticmethod
+    def _seed(user_ids):
+        """
+        Create the missing counters among ``user_ids`` from the
+        notifications table; returns the users whose counter was created
+        """
+        from django.db import IntegrityError
+        from django.db.models import Count
+        from .models import UnreadCounter
+        
+        existing = set(UnreadCounter.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+        missing = [user_id for user_id in user_ids if user_id not in existing]
+        if not missing:
+            return set()
+        
+        unread = dict(
+            Notification.objects.filter(user_id__in=missing, is_read=False)
+            .order_by().values_list('user_id').annotate(total=Count('id'))
+        )
+        counters = [UnreadCounter(user_id=user_id, unread=unread.get(user_id, 0)) for user_id in missing]
+        try:
+            with transaction.atomic():
+                UnreadCounter.objects.bulk_create(counters)
+            return set(missing)
+        except IntegrityError:
+            # A concurrent writer created some of them first; theirs stand,
+            # and the caller applies this change on top
+            seeded = set()
+            for counter in counters:
+                try:
+                    with transaction.atomic():
+                        counter.save(force_insert=True)
+                except IntegrityError:
+                    continue
+                seeded.add(counter.user_id)
+            return seeded
+
+    @classmethod
+    def reconcile(cls, batch_size=1000):
+        """
+        Recount every counter and create missing ones; returns how many were fixed
+        """
+        from django.core.cache import cache
+        from django.db.models import Count, Exists, F, IntegerField, OuterRef, Subquery
+        from django.db.models.functions import Coalesce
+        from django.utils import timezone
+        from apps.users.models import User
+        from .models import UnreadCounter
+        
+        actual = Coalesce(Subquery(
+            Notification.objects.filter(
+                user=OuterRef('user'),
+                is_read=False
+            ).order_by().values('user').annotate(total=Count('id')).values('total'),
+            output_field=IntegerField()
+        ), 0)
+        
+        fixed = 0
+        
+        # Correct counters that drifted
+        drifted = UnreadCounter.objects.annotate(actual=actual).exclude(unread=F('actual')).values_list('user_id', flat=True)
+        user_ids = list(drifted.iterator(chunk_size=batch_size))
+        for start in range(0, len(user_ids), batch_size):
+            chunk = user_ids[start:start + batch_size]
+            with transaction.atomic():
+                fixed += UnreadCounter.objects.filter(user_id__in=chunk).update(unread=actual, updated_at=timezone.now())
+            cache.delete_many([cls._key(user_id) for user_id in chunk])
+        
+        # Create counters for users with unread notifications but no counter
+        missing = User.objects.filter(
+            Exists(Notification.objects.filter(user=OuterRef('pk'), is_read=False)),
+            ~Exists(UnreadCounter.objects.filter(user=OuterRef('pk')))
+        ).values_list('pk', flat=True)
+        user_ids = list(missing.iterator(chunk_size=batch_size))
+        for start in range(0, len(user_ids), batch_size):
+            chunk = user_ids[start:start + batch_size]
+            counts = dict(
+                Notification.objects.filter(user_id__in=chunk, is_read=False).order_by().values_list('user_id').annotate(total=Count('id'))
+            )
+            UnreadCounter.objects.bulk_create(
+                [UnreadCounter(user_id=user_id, unread=counts.get(user_id, 0)) for user_id in chunk],
+                ignore_conflicts=True
+            )
+            cache.delete_many([cls._key(user_id) for user_id in chunk])
+            fixed += len(chunk)
+        
+        return fixed
@@ -0,0 +1,51 @@
+# apps/notifications/signals.py
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from apps.events.models import Event
+from .models import Notification, NotificationPreference
+from .services import NotificationPreferences, NotificationService, UnreadCounts
+
+@receiver(post_save, sender=Notification)
+def handle_notification_save(sender, instance, created, **kwargs):
+    """
+    Keep unread counters and live streams in step with notifications saved
+    one at a time (bulk inserts are handled by
+    ``NotificationService.bulk_create_notifications``)
+    """
+    if created:
+        from .delivery import enqueue
+        
+        UnreadCounts.adjust(NotificationService.unread_deltas([instance]))
+        enqueue([instance])
+        NotificationService.publish([instance])
+    else:
+        was_read = getattr(instance, '_loaded_is_read', instance.is_read)
+        if was_read != instance.is_read:
+            NotificationService.adjust_unread(instance.user_id, -1 if instance.is_read else 1)
+    
+    instance._loaded_is_read = instance.is_read
+
+@receiver(pre_delete, sender=Event)
+def handle_event_delete(sender, instance, **kwargs):
+    """
+    Take an event's unread notifications, which the delete cascades to,
+    off their users' unread counters
+    """
+    UnreadCounts.adjust({
+        user_id: -total
+        for user_id, total in Notification.objects.filter(
+            event=instance,
+            is_read=False
+        ).order_by().values_list('user_id').annotate(total=Count('id'))
+    })
+
+@receiver(post_save, sender=NotificationPreference)
+@receiver(post_delete, sender=NotificationPreference)
+def handle_preference_change(sender, instance, **kwargs):
+    """
+    Drop a user's cached preferences when they change
+    """
+    NotificationPreferences.invalidate(instance.user_id)
+    transaction.on_commit(lambda: NotificationPreferences.invalidate(instance.user_id))
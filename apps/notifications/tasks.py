@@ -1,26 +1,400 @@
 import datetime
+import time
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, DateTimeField, Exists, OuterRef, Q, Value
 from django.utils import timezone
 from apps.events.models import Event
-from .services import NotificationService
+from apps.payments.models import Payment
+from apps.rsvp.models import RSVP
+from .models import ArchivedNotification, Notification, NotificationDelivery, NotificationJob, PaymentReminderLedger
+from .services import NotificationService, UnreadCounts
 
 def send_event_reminders():
     """
     Task to send reminders for upcoming events
     
     This function should be scheduled to run periodically, e.g., every hour
-    through a task scheduler like Celery or Django's built-in scheduler
+    through a task scheduler like Celery or Django's built-in scheduler.
+    The reminder ledger makes repeated runs safe: each guest is reminded once.
+    Returns the number of events happening in the next 24 hours, including
+    those whose guests were all reminded by an earlier run.
     """
-    # Get events happening in the next 24 hours
-    tomorrow = timezone.now() + datetime.timedelta(hours=24)
-    today = timezone.now()
+    now = timezone.now()
+    window = datetime.timedelta(hours=24)
     
-    upcoming_events = Event.objects.filter(
-        date__gt=today,
-        date__lte=tomorrow
+    # Remind guests of events happening in the next 24 hours
+    NotificationService.send_reminders(kind='24h', window=window)
+    
+    return Event.objects.filter(date__gt=now, date__lte=now + window).count()
+
+def send_payment_reminders(batch_size=1000, interval=None, max_per_guest=None):
+    """
+    Task to remind guests who RSVP'd YES to a paid event but haven't paid yet
+
+    Unpaid guests are found with a single anti-join over RSVPs, streamed in
+    chunks and ordered by guest so the per-guest cap needs no extra state.
+    A guest is reminded about an event at most once per ``interval`` and
+    about at most ``max_per_guest`` events per run. Reminders are recorded
+    in ``PaymentReminderLedger`` even when the guest's preferences mute or
+    digest them, so such guests aren't picked again on every run. Returns
+    the number of reminders written to inboxes.
+    """
+    now = timezone.now()
+    if interval is None:
+        interval = getattr(settings, 'PAYMENT_REMINDER_INTERVAL', datetime.timedelta(hours=24))
+    if max_per_guest is None:
+        max_per_guest = getattr(settings, 'PAYMENT_REMINDER_MAX_PER_GUEST', 3)
+    
+    paid = Payment.objects.filter(
+        event=OuterRef('event'),
+        user=OuterRef('user'),
+        status='PAID'
+    )
+    recently_reminded = PaymentReminderLedger.objects.filter(
+        event=OuterRef('event'),
+        user=OuterRef('user'),
+        last_reminded_at__gte=now - interval
+    )
+    
+    unpaid = RSVP.objects.filter(
+        status='YES',
+        is_approved=True,
+        event__date__gt=now,
+        event__payment_link__isnull=False
+    ).filter(
+        ~Exists(paid),
+        ~Exists(recently_reminded)
+    ).order_by('user_id').values_list('user_id', 'event_id')
+    
+    sent = 0
+    batch = []
+    current_user = None
+    reminded_for_user = 0
+    
+    for user_id, event_id in unpaid.iterator(chunk_size=batch_size):
+        if user_id != current_user:
+            current_user = user_id
+            reminded_for_user = 0
+        
+        if reminded_for_user >= max_per_guest:
+            continue
+        reminded_for_user += 1
+        
+        batch.append(Notification(
+            user_id=user_id,
+            event_id=event_id,
+            type='PAYMENT_REMINDER',
+            template='payment_reminder',
+            action_link=f'/events/{event_id}',
+            action_text='Pay Now'
+        ))
+        
+        if len(batch) >= batch_size:
+            sent += _send_payment_reminder_batch(batch, now)
+            batch = []
+    
+    if batch:
+        sent += _send_payment_reminder_batch(batch, now)
+    
+    return sent
+
+def _send_payment_reminder_batch(batch, now):
+    """
+    Write one batch of payment reminders and record them in the ledger;
+    returns how many reached inboxes (muted ones don't)
+    """
+    with transaction.atomic():
+        written = NotificationService.bulk_create_notifications(batch, batch_size=len(batch))
+        PaymentReminderLedger.objects.bulk_create(
+            [
+                PaymentReminderLedger(event_id=notification.event_id, user_id=notification.user_id, last_reminded_at=now)
+                for notification in batch
+            ],
+            update_conflicts=True,
+            unique_fields=['event', 'user'],
+            update_fields=['last_reminded_at']
+        )
+    return len(written)
+
+def _run_fanout_jobs(payloads):
+    """
+    Create a host's notification for every recipient of each queued fan-out
+    """
+    for payload in payloads:
+        fields = dict(payload)
+        user_ids = fields.pop('user_ids')
+        NotificationService.fan_out(user_ids, **fields)
+
+def _load_rsvps(payloads):
+    """
+    Load the RSVPs referenced by a batch of outbox payloads in one query
+    """
+    rsvp_ids = {payload['rsvp_id'] for payload in payloads}
+    rsvps = RSVP.objects.select_related('event__created_by', 'user').in_bulk(rsvp_ids)
+    
+    # RSVPs deleted since the job was queued have nothing left to notify about
+    for payload in payloads:
+        rsvp = rsvps.get(RSVP._meta.pk.to_python(payload['rsvp_id']))
+        if rsvp is not None:
+            yield rsvp, payload
+
+def _run_rsvp_created_jobs(payloads):
+    NotificationService.bulk_create_notifications(
+        notification
+        for rsvp, payload in _load_rsvps(payloads)
+        for notification in NotificationService.rsvp_created_notifications(rsvp, payload['status'])
+    )
+
+def _run_rsvp_updated_jobs(payloads):
+    NotificationService.bulk_create_notifications(
+        notification
+        for rsvp, payload in _load_rsvps(payloads)
+        for notification in NotificationService.rsvp_updated_notifications(rsvp, payload['status'])
     )
+
+def _run_rsvp_approval_jobs(payloads):
+    NotificationService.bulk_create_notifications(
+        notification
+        for rsvp, payload in _load_rsvps(payloads)
+        for notification in NotificationService.rsvp_approval_notifications(rsvp, payload['is_approved'])
+    )
+
+def _run_event_update_jobs(payloads, batch_size=None):
+    """
+    Notify an event's guests of changes, streaming its RSVPs in chunks
+    """
+    from apps.events.models import Event
+    
+    if batch_size is None:
+        batch_size = getattr(settings, 'NOTIFICATION_BULK_BATCH_SIZE', 500)
+    
+    # Several edits to one event queued together become one announcement
+    changes = {}
+    for payload in payloads:
+        fields = changes.setdefault(payload['event_id'], [])
+        fields.extend(field for field in payload['changes'] if field not in fields)
+    
+    events = Event.objects.only('id', 'title').in_bulk(list(changes))
+    for event_id, fields in changes.items():
+        event = events.get(Event._meta.pk.to_python(event_id))
+        if event is None:
+            continue
+        
+        guests = RSVP.objects.filter(
+            event=event,
+            status__in=['YES', 'MAYBE'],
+            is_approved=True
+        ).order_by().values_list('user_id', flat=True)
+        
+        batch = []
+        for user_id in guests.iterator(chunk_size=batch_size):
+            batch.append(Notification(
+                user_id=user_id,
+                event=event,
+                type='EVENT_UPDATE',
+                template='event_updated',
+                params={'changes': fields},
+                action_link=f'/events/{event.id}',
+                action_text='View Event'
+            ))
+            if len(batch) >= batch_size:
+                NotificationService.bulk_create_notifications(batch, batch_size=batch_size)
+                batch = []
+        
+        if batch:
+            NotificationService.bulk_create_notifications(batch, batch_size=batch_size)
+
+# Each handler takes the payloads of every claimed job of its kind
+JOB_HANDLERS = {
+    'FANOUT': _run_fanout_jobs,
+    'RSVP_CREATED': _run_rsvp_created_jobs,
+    'RSVP_UPDATED': _run_rsvp_updated_jobs,
+    'RSVP_APPROVAL': _run_rsvp_approval_jobs,
+    'EVENT_UPDATE': _run_event_update_jobs,
+}
+
+def _claim_jobs(batch_size, max_attempts):
+    """
+    Lease a batch of pending jobs to this worker in one short transaction
+    """
+    now = timezone.now()
+    lease = datetime.timedelta(seconds=getattr(settings, 'NOTIFICATION_JOB_LEASE', 300))
+    expired = Q(locked_until__isnull=True) | Q(locked_until__lte=now)
+    
+    with transaction.atomic():
+        # Jobs whose worker died on every attempt are given up on
+        NotificationJob.objects.filter(expired, status='PENDING', attempts__gte=max_attempts).update(
+            status='FAILED',
+            last_error='Lease expired',
+            locked_until=None
+        )
+        
+        # skip_locked lets several workers claim side by side
+        jobs = list(
+            NotificationJob.objects.select_for_update(skip_locked=True).filter(
+                expired,
+                status='PENDING'
+            ).order_by('created_at')[:batch_size]
+        )
+        for job in jobs:
+            job.attempts += 1
+            job.locked_until = now + lease
+        NotificationJob.objects.bulk_update(jobs, ['attempts', 'locked_until'])
+    
+    return jobs
+
+def _run_jobs(handler, jobs):
+    """
+    Run jobs and mark them done in one transaction, so they are done
+    exactly when their notifications are committed
+    """
+    with transaction.atomic():
+        handler([job.payload for job in jobs])
+        NotificationJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status='DONE',
+            processed_at=timezone.now(),
+            last_error=None,
+            locked_until=None
+        )
+
+def process_notification_jobs(batch_size=100, max_attempts=5):
+    """
+    Task to drain queued notification jobs
+
+    Jobs are claimed oldest first under a lease (``NOTIFICATION_JOB_LEASE``
+    seconds) and handed to their handler one kind at a time, each kind in
+    its own transaction, so a batch of RSVP jobs becomes one RSVP query and
+    one bulk insert without a slow fan-out holding the others open. If a
+    kind fails, its jobs are retried individually so one bad job can't hold
+    back the rest; a failing job is released and retried on a later run
+    until it has used ``max_attempts``. A worker that dies mid-batch leaves
+    its jobs to be reclaimed once the lease runs out. Returns the number of
+    jobs completed.
+    """
+    jobs = _claim_jobs(batch_size, max_attempts)
+    
+    by_kind = {}
+    for job in jobs:
+        by_kind.setdefault(job.kind, []).append(job)
+    
+    completed = 0
+    for kind, kind_jobs in by_kind.items():
+        handler = JOB_HANDLERS[kind]
+        try:
+            _run_jobs(handler, kind_jobs)
+        except Exception:
+            pass
+        else:
+            completed += len(kind_jobs)
+            continue
+        
+        for job in kind_jobs:
+            try:
+                _run_jobs(handler, [job])
+            except Exception as exc:
+                NotificationJob.objects.filter(pk=job.pk).update(
+                    status='FAILED' if job.attempts >= max_attempts else 'PENDING',
+                    last_error=str(exc),
+                    locked_until=None
+                )
+            else:
+                completed += 1
+    
+    return completed
+
+def deliver_notifications(channel='EMAIL', batch_size=100, max_batches=None, **options):
+    """
+    Task to send queued off-platform deliveries, one batch at a time
+
+    Runs until no due deliveries are left (or ``max_batches``) and returns
+    ``(sent, failed, held)`` totals. ``options`` are passed to the channel.
+    """
+    from .delivery import deliver
+    
+    totals = [0, 0, 0]
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        counts = deliver(channel=channel, batch_size=batch_size, **options)
+        if not any(counts):
+            break
+        totals = [total + count for total, count in zip(totals, counts)]
+        batches += 1
+    
+    return tuple(totals)
+
+def _archive_batch(ids, archived_at):
+    """
+    Copy one batch of notifications into the archive and delete them,
+    in a single short transaction
+    """
+    fields = [field for field in ArchivedNotification._meta.concrete_fields if field.name != 'archived_at']
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields + [ArchivedNotification._meta.get_field('archived_at')])
+    
+    batch = Notification.objects.filter(pk__in=ids).order_by()
+    select_sql, select_params = batch.annotate(
+        archived_at=Value(archived_at, output_field=DateTimeField())
+    ).values_list(*[field.attname for field in fields], 'archived_at').query.sql_with_params()
+    pk_sql, pk_params = batch.values('pk').query.sql_with_params()
+    
+    with transaction.atomic():
+        # Archived unread notifications no longer count towards the inbox
+        unread = dict(batch.filter(is_read=False).values_list('user_id').annotate(total=Count('id')))
+        
+        # Deliveries reference live rows only; anything still queued is dropped
+        NotificationDelivery.objects.filter(notification_id__in=ids).delete()
+        
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {connection.ops.quote_name(ArchivedNotification._meta.db_table)} ({columns}) {select_sql}',
+                select_params
+            )
+            cursor.execute(
+                f'DELETE FROM {connection.ops.quote_name(Notification._meta.db_table)} '
+                f'WHERE {connection.ops.quote_name(Notification._meta.pk.column)} IN ({pk_sql})',
+                pk_params
+            )
+            moved = cursor.rowcount
+        
+        UnreadCounts.adjust({user_id: -total for user_id, total in unread.items()})
+    
+    return moved
+
+def archive_notifications(read_after_days=None, past_event_days=None, batch_size=1000, max_batches=None, pause=0):
+    """
+    Task to move old notifications out of the live table
+
+    Read notifications older than ``read_after_days`` and every notification
+    for an event that ended more than ``past_event_days`` ago are copied to
+    the archive with ``INSERT ... SELECT`` and deleted, one bounded batch per
+    transaction so locks stay short. Each batch commits on its own, so an
+    interrupted or ``max_batches``-limited run simply resumes where it
+    stopped next time. Returns ``(archived_count, seconds)``.
+    """
+    if read_after_days is None:
+        read_after_days = getattr(settings, 'NOTIFICATION_READ_RETENTION_DAYS', 90)
+    if past_event_days is None:
+        past_event_days = getattr(settings, 'NOTIFICATION_PAST_EVENT_RETENTION_DAYS', 30)
+    
+    started = time.monotonic()
+    now = timezone.now()
+    expired = Notification.objects.filter(
+        Q(is_read=True, created_at__lt=now - datetime.timedelta(days=read_after_days)) |
+        Q(event__date__lt=now - datetime.timedelta(days=past_event_days))
+    ).order_by().values_list('pk', flat=True)
     
-    # Send reminders for each event
-    for event in upcoming_events:
-        NotificationService.send_event_reminder(event)
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = list(expired[:batch_size])
+        if not ids:
+            break
+        
+        archived += _archive_batch(ids, now)
+        batches += 1
+        
+        if pause:
+            # Give concurrent writers room between batches
+            time.sleep(pause)
     
-    return len(upcoming_events)
\ No newline at end of file
+    return archived, time.monotonic() - started
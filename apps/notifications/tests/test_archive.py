@@ -0,0 +1,85 @@
+# apps/notifications/tests/test_archive.py
+import datetime
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from apps.users.models import User
+from apps.events.models import Event
+from apps.notifications.models import ArchivedNotification, Notification, UnreadCounter
+from apps.notifications.services import NotificationService
+from apps.notifications.tasks import archive_notifications
+
+class NotificationArchiveTests(APITestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(
+            username='host@example.com',
+            email='host@example.com',
+            name='Host User',
+            password='hostpass123',
+            role='HOST'
+        )
+        
+        self.guest = User.objects.create_user(
+            username='guest@example.com',
+            email='guest@example.com',
+            name='Guest User',
+            password='guestpass123',
+            role='GUEST'
+        )
+        
+        self.past_event = Event.objects.create(
+            title='Past Event',
+            description='Long gone',
+            date=timezone.now() - datetime.timedelta(days=60),
+            location='Test Location',
+            privacy='PUBLIC',
+            created_by=self.host
+        )
+        
+        self.old_read, self.past_unread, self.recent_read, self.fresh = NotificationService.bulk_create_notifications([
+            Notification(user=self.guest, type='SYSTEM', title='Old read', message='Hello', is_read=True),
+            Notification(user=self.guest, event=self.past_event, type='EVENT_REMINDER', title='Past event', message='Hello'),
+            Notification(user=self.guest, type='SYSTEM', title='Recent read', message='Hello', is_read=True),
+            Notification(user=self.guest, type='SYSTEM', title='Fresh', message='Hello'),
+        ])
+        Notification.objects.filter(pk=self.old_read.pk).update(created_at=timezone.now() - datetime.timedelta(days=120))
+    
+    def test_archive_moves_expired_notifications(self):
+        archived, _ = archive_notifications(batch_size=1)
+        
+        self.assertEqual(archived, 2)
+        self.assertEqual(
+            set(Notification.objects.values_list('pk', flat=True)),
+            {self.recent_read.pk, self.fresh.pk}
+        )
+        old_read = ArchivedNotification.objects.get(pk=self.old_read.pk)
+        self.assertEqual(old_read.title, 'Old read')
+        self.assertTrue(old_read.is_read)
+        self.assertTrue(ArchivedNotification.objects.filter(pk=self.past_unread.pk, event=self.past_event).exists())
+        
+        # The archived unread notification no longer counts
+        self.assertEqual(UnreadCounter.objects.get(user=self.guest).unread, 1)
+    
+    def test_archive_resumes_after_max_batches(self):
+        archived, _ = archive_notifications(batch_size=1, max_batches=1)
+        self.assertEqual(archived, 1)
+        
+        archived, _ = archive_notifications(batch_size=1)
+        self.assertEqual(archived, 1)
+        self.assertEqual(ArchivedNotification.objects.count(), 2)
+    
+    def test_archived_inbox_mode(self):
+        archive_notifications()
+        self.client.force_authenticate(user=self.guest)
+        
+        response = self.client.get(reverse('notification-list'), {'archived': '1'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['title'] for item in response.data['results']],
+            ['Past event', 'Old read']
+        )
+        self.assertIn('archived_at', response.data['results'][0])
+        
+        response = self.client.get(reverse('notification-list'))
+        self.assertEqual(len(response.data['results']), 2)
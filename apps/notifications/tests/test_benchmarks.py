@@ -0,0 +1,326 @@
+# apps/notifications/tests/test_benchmarks.py
+"""
+Throughput benchmarks for the notification pipelines.
+
+Skipped by default; run them with:
+
+    RUN_BENCHMARKS=1 python manage.py test apps.notifications --tag=benchmark
+"""
+import datetime
+import importlib
+import os
+import socketserver
+import threading
+import time
+import unittest
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.core.mail import get_connection
+from django.db.models import Sum, TextField
+from django.db.models.functions import Cast, Length
+from django.test import TransactionTestCase, override_settings, tag
+from django.utils import timezone
+from apps.users.models import User
+from apps.events.models import Event
+from apps.rsvp.models import RSVP
+from apps.notifications.catalog import render_notification
+from apps.notifications.delivery import EmailChannel
+from apps.notifications.models import Device, Notification, NotificationDelivery
+from apps.notifications.push import HTTPPushProvider
+from apps.notifications.services import NotificationService
+from apps.notifications.tasks import deliver_notifications
+from apps.notifications.tests.test_push import start_gateway
+
+RUN_BENCHMARKS = bool(os.environ.get('RUN_BENCHMARKS'))
+
+
+def create_attendees(event, count, batch_size=5000):
+    """
+    Bulk-create ``count`` guests with approved YES RSVPs for ``event``
+    """
+    password = make_password(None)
+    for start in range(0, count, batch_size):
+        users = User.objects.bulk_create([
+            User(
+                username=f'bench{i}@example.com',
+                email=f'bench{i}@example.com',
+                name=f'Bench Guest {i}',
+                password=password
+            )
+            for i in range(start, min(start + batch_size, count))
+        ])
+        RSVP.objects.bulk_create([
+            RSVP(event=event, user=user, status='YES', is_approved=True)
+            for user in users
+        ])
+
+
+@tag('benchmark')
+@unittest.skipUnless(RUN_BENCHMARKS, 'set RUN_BENCHMARKS=1 to run benchmarks')
+class EventReminderBenchmark(TransactionTestCase):
+    ATTENDEES = 100_000
+
+    def setUp(self):
+        self.host = User.objects.create_user(
+            username='host@example.com',
+            email='host@example.com',
+            name='Host User',
+            password='hostpass123',
+            role='HOST'
+        )
+        self.event = Event.objects.create(
+            title='Stadium Event',
+            description='A very large event',
+            date=timezone.now() + datetime.timedelta(hours=12),
+            location='Stadium',
+            privacy='PUBLIC',
+            created_by=self.host
+        )
+        create_attendees(self.event, self.ATTENDEES)
+
+    def test_reminders_for_100k_attendees(self):
+        started = time.perf_counter()
+        _, sent = NotificationService.send_reminders(kind='24h', window=datetime.timedelta(hours=24))
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(sent, self.ATTENDEES)
+        self.assertEqual(Notification.objects.filter(type='EVENT_REMINDER').count(), self.ATTENDEES)
+        print(f"\nreminders: {sent} in {elapsed:.2f}s ({sent / elapsed:,.0f}/s)")
+
+        # A second run finds nothing left to send
+        started = time.perf_counter()
+        _, resent = NotificationService.send_reminders(kind='24h', window=datetime.timedelta(hours=24))
+        print(f"dedupe re-run: {resent} sent in {time.perf_counter() - started:.2f}s")
+        self.assertEqual(resent, 0)
+
+
+def text_bytes(queryset):
+    """
+    Bytes of notification text and params stored by ``queryset``'s rows
+    """
+    return queryset.aggregate(total=Sum(
+        Length('title') + Length('message') + Length('template') + Length(Cast('params', TextField()))
+    ))['total'] or 0
+
+
+@tag('benchmark')
+@unittest.skipUnless(RUN_BENCHMARKS, 'set RUN_BENCHMARKS=1 to run benchmarks')
+class NotificationTemplateBenchmark(TransactionTestCase):
+    ROWS = 100_000
+
+    def setUp(self):
+        self.host = User.objects.create_user(
+            username='host@example.com',
+            email='host@example.com',
+            name='Host User',
+            password='hostpass123',
+            role='HOST'
+        )
+        event = Event.objects.create(
+            title='Stadium Event',
+            description='A very large event',
+            date=timezone.now() + datetime.timedelta(days=7),
+            location='Stadium',
+            privacy='PUBLIC',
+            created_by=self.host
+        )
+        # Rows as formatted by earlier releases
+        Notification.objects.bulk_create([
+            Notification(
+                user=self.host,
+                event=event,
+                type='RSVP_CONFIRMATION',
+                title='New RSVP for your event',
+                message=f"Bench Guest {i} has RSVP'd Yes to your event 'Stadium Event'.",
+                action_link='/events/1/guests',
+                action_text='View Guest List'
+            )
+            for i in range(self.ROWS)
+        ], batch_size=5000)
+
+    def test_template_conversion_and_rendering(self):
+        before = text_bytes(Notification.objects.all())
+
+        migration = importlib.import_module('apps.notifications.migrations.0012_convert_notification_text')
+        started = time.perf_counter()
+        migration.templatize_notifications(apps, None)
+        elapsed = time.perf_counter() - started
+
+        self.assertFalse(Notification.objects.filter(template='').exists())
+        after = text_bytes(Notification.objects.all())
+        print(f"\nconverted {self.ROWS} rows in {elapsed:.2f}s ({self.ROWS / elapsed:,.0f}/s)")
+        print(f"text bytes: {before:,} -> {after:,} ({1 - after / before:.0%} smaller)")
+
+        notifications = list(Notification.objects.select_related('event'))
+        started = time.perf_counter()
+        for notification in notifications:
+            render_notification(notification)
+        elapsed = time.perf_counter() - started
+        print(f"rendered {len(notifications)} in {elapsed:.2f}s ({len(notifications) / elapsed:,.0f}/s)")
+
+
+class SMTPStandIn(socketserver.StreamRequestHandler):
+    """
+    Just enough SMTP for ``smtplib``: accepts every message and discards it
+    """
+    def handle(self):
+        self.server.connections += 1
+        self.wfile.write(b'220 localhost\r\n')
+        for line in self.rfile:
+            command = line[:4].upper()
+            if command == b'DATA':
+                self.wfile.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+                for data in self.rfile:
+                    if data == b'.\r\n':
+                        break
+                self.server.messages += 1
+                self.wfile.write(b'250 OK\r\n')
+            elif command == b'QUIT':
+                self.wfile.write(b'221 Bye\r\n')
+                return
+            else:
+                self.wfile.write(b'250 OK\r\n')
+
+
+@tag('benchmark')
+@unittest.skipUnless(RUN_BENCHMARKS, 'set RUN_BENCHMARKS=1 to run benchmarks')
+@override_settings(NOTIFICATION_EMAIL_HOURLY_CAP=None)
+class EmailDeliveryBenchmark(TransactionTestCase):
+    RECIPIENTS = 5_000
+    BATCH_SIZE = 500
+
+    def setUp(self):
+        self.host = User.objects.create_user(
+            username='host@example.com',
+            email='host@example.com',
+            name='Host User',
+            password='hostpass123',
+            role='HOST'
+        )
+        self.event = Event.objects.create(
+            title='Stadium Event',
+            description='A very large event',
+            date=timezone.now() + datetime.timedelta(days=7),
+            location='Stadium',
+            privacy='PUBLIC',
+            created_by=self.host
+        )
+        create_attendees(self.event, self.RECIPIENTS)
+        NotificationService.fan_out(
+            RSVP.objects.filter(event=self.event).values_list('user_id', flat=True),
+            event=self.event,
+            type='HOST_MESSAGE',
+            title='Gates open at six',
+            message='Please bring your ticket',
+            action_link=f'/events/{self.event.id}',
+            action_text='View Event'
+        )
+
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SMTPStandIn)
+        self.server.daemon_threads = True
+        self.server.connections = 0
+        self.server.messages = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def smtp_connection(self):
+        return get_connection(
+            'django.core.mail.backends.smtp.EmailBackend',
+            host='127.0.0.1',
+            port=self.server.server_address[1]
+        )
+
+    def run_deliveries(self, label, connection):
+        NotificationDelivery.objects.update(status='PENDING', sent_at=None)
+        started = time.perf_counter()
+        sent, failed, _ = deliver_notifications(batch_size=self.BATCH_SIZE, connection=connection)
+        elapsed = time.perf_counter() - started
+        self.assertEqual((sent, failed), (self.RECIPIENTS, 0))
+        print(f"{label}: {sent} emails in {elapsed:.2f}s ({sent / elapsed:,.0f}/s)")
+        return elapsed
+
+    def test_email_delivery_throughput(self):
+        print()
+        self.run_deliveries('locmem', get_connection('django.core.mail.backends.locmem.EmailBackend'))
+
+        self.run_deliveries('smtp stand-in', self.smtp_connection())
+        self.assertEqual(self.server.messages, self.RECIPIENTS)
+        print(f"smtp connections opened: {self.server.connections}")
+
+        # One batch of messages over one connection, then with a new
+        # connection each as send_mail() would open
+        channel = EmailChannel()
+        messages = [
+            channel.message(delivery)
+            for delivery in NotificationDelivery.objects.select_related('notification__event', 'user')[:self.BATCH_SIZE]
+        ]
+
+        started = time.perf_counter()
+        with self.smtp_connection() as connection:
+            for message in messages:
+                connection.send_messages([message])
+        reused = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for message in messages:
+            self.smtp_connection().send_messages([message])
+        per_email = time.perf_counter() - started
+        print(
+            f"smtp send only, {len(messages)} emails: reused connection {reused:.2f}s, "
+            f"connection per email {per_email:.2f}s ({per_email / reused:.1f}x)"
+        )
+
+
+@tag('benchmark')
+@unittest.skipUnless(RUN_BENCHMARKS, 'set RUN_BENCHMARKS=1 to run benchmarks')
+class PushDeliveryBenchmark(TransactionTestCase):
+    RECIPIENTS = 20_000
+    BATCH_SIZE = 1000
+
+    def setUp(self):
+        self.host = User.objects.create_user(
+            username='host@example.com',
+            email='host@example.com',
+            name='Host User',
+            password='hostpass123',
+            role='HOST'
+        )
+        self.event = Event.objects.create(
+            title='Stadium Event',
+            description='A very large event',
+            date=timezone.now() + datetime.timedelta(days=7),
+            location='Stadium',
+            privacy='PUBLIC',
+            created_by=self.host
+        )
+        create_attendees(self.event, self.RECIPIENTS)
+        Device.objects.bulk_create([
+            Device(user_id=user_id, platform='ANDROID', token=f'token-{user_id}')
+            for user_id in RSVP.objects.filter(event=self.event).values_list('user_id', flat=True)
+        ], batch_size=5000)
+        NotificationService.fan_out(
+            RSVP.objects.filter(event=self.event).values_list('user_id', flat=True),
+            event=self.event,
+            type='EVENT_UPDATE',
+            title='Venue changed',
+            message='The event moved to the north stand'
+        )
+        self.server = start_gateway()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_push_throughput(self):
+        provider = HTTPPushProvider(f'http://127.0.0.1:{self.server.server_address[1]}/send', batch_size=500)
+
+        started = time.perf_counter()
+        sent, failed, _ = deliver_notifications(channel='PUSH', batch_size=self.BATCH_SIZE, provider=provider)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual((sent, failed), (self.RECIPIENTS, 0))
+        print(f"\npush: {sent} in {elapsed:.2f}s ({sent / elapsed:,.0f}/s, {sent / elapsed * 60:,.0f}/min)")
+        print(f"provider requests: {len(self.server.requests)}")
@@ -0,0 +1,161 @@
+# apps/notifications/tests/test_delivery.py
+from unittest import mock
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+import datetime
+from apps.users.models import User
+from apps.events.models import Event
+from apps.notifications.delivery import deliver
+from apps.notifications.models import NotificationDelivery
+from apps.notifications.services import NotificationService
+from apps.notifications.tasks import deliver_notifications
+
+class EmailDeliveryTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(
+            username='host@example.com',
+            email='host@example.com',
+            name='Host User',
+            password='hostpass123',
+            role='HOST'
+        )
+
+        self.guests = [
+            User.objects.create_user(
+                username=f'guest{index}@example.com',
+                email=f'guest{index}@example.com',
+                name=f'Guest {index}',
+                password='guestpass123',
+                role='GUEST'
+            )
+            for index in range(3)
+        ]
+
+        self.event = Event.objects.create(
+            title='Delivery Test Event',
+            description='This is a test event',
+            date=timezone.now() + datetime.timedelta(days=7),
+            location='Test Location',
+            privacy='PUBLIC',
+            created_by=self.host
+        )
+
+    def message_guests(self, users=None, notification_type='HOST_MESSAGE'):
+        NotificationService.fan_out(
+            [user.id for user in users or self.guests],
+            event=self.event,
+            type=notification_type,
+            title='Bring snacks',
+            message='Please bring something to share',
+            action_link=f'/events/{self.event.id}',
+            action_text='View Event'
+        )
+
+    def test_deliveries_are_queued_for_email_types(self):
+        self.message_guests()
+        self.message_guests(notification_type='RSVP_CONFIRMATION')
+
+        deliveries = NotificationDelivery.objects.all()
+        self.assertEqual(deliveries.count(), 3)
+        self.assertTrue(all(delivery.notification.type == 'HOST_MESSAGE' for delivery in deliveries))
+
+    def test_batch_is_sent_over_one_connection(self):
+        self.message_guests()
+
+        connection = mail.get_connection()
+        with mock.patch.object(connection, 'open', wraps=connection.open) as opened:
+            self.assertEqual(deliver_notifications(connection=connection), (3, 0, 0))
+        self.assertEqual(opened.call_count, 1)
+
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [guest.email for guest in self.guests])
+        self.assertEqual(mail.outbox[0].subject, 'Bring snacks')
+        self.assertIn(f'View Event: /events/{self.event.id}', mail.outbox[0].body)
+        self.assertFalse(NotificationDelivery.objects.exclude(status='SENT').exists())
+
+        # Nothing is sent twice
+        self.assertEqual(deliver_notifications(), (0, 0, 0))
+        self.assertEqual(len(mail.outbox), 3)
+
+    @override_settings(NOTIFICATION_EMAIL_HOURLY_CAP=2)
+    def test_hourly_cap_holds_back_extra_emails(self):
+        for _ in range(3):
+            self.message_guests(users=self.guests[:1])
+
+        self.assertEqual(deliver_notifications(), (2, 0, 1))
+        self.assertEqual(len(mail.outbox), 2)
+
+        # Held until the first send leaves the one-hour window
+        held = NotificationDelivery.objects.get(status='PENDING')
+        delay = held.next_attempt_at - timezone.now()
+        self.assertTrue(datetime.timedelta(minutes=59) < delay <= datetime.timedelta(hours=1))
+        self.assertEqual(held.attempts, 0)
+        self.assertEqual(deliver_notifications(), (0, 0, 0))
+
+    @override_settings(NOTIFICATION_DELIVERY_RETRY_DELAY=60)
+    def test_failures_back_off_then_give_up(self):
+        self.message_guests(users=self.guests[:1])
+        delivery = NotificationDelivery.objects.get()
+
+        connection = mail.get_connection()
+        with mock.patch.object(connection, 'send_messages', side_effect=OSError('Connection refused')):
+            self.assertEqual(deliver(connection=connection, max_attempts=2), (0, 1, 0))
+            delivery.refresh_from_db()
+            self.assertEqual(delivery.status, 'PENDING')
+            self.assertEqual(delivery.last_error, 'Connection refused')
+            delay = delivery.next_attempt_at - timezone.now()
+            self.assertTrue(datetime.timedelta(seconds=55) < delay <= datetime.timedelta(seconds=60))
+
+            # Not due yet
+            self.assertEqual(deliver(connection=connection, max_attempts=2), (0, 0, 0))
+
+            NotificationDelivery.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(deliver(connection=connection, max_attempts=2), (0, 1, 0))
+            delivery.refresh_from_db()
+            self.assertEqual(delivery.status, 'FAILED')
+            self.assertEqual(delivery.attempts, 2)
+
+    def test_deliveries_are_claimed_before_sending(self):
+        self.message_guests(users=self.guests[:1])
+
+        connection = mail.get_connection()
+        statuses = []
+        def send_messages(messages):
+            statuses.extend(NotificationDelivery.objects.values_list('status', flat=True))
+            return len(messages)
+
+        with mock.patch.object(connection, 'send_messages', side_effect=send_messages):
+            self.assertEqual(deliver(connection=connection), (1, 0, 0))
+        self.assertEqual(statuses, ['SENDING'])
+
+        delivery = NotificationDelivery.objects.get()
+        self.assertEqual(delivery.status, 'SENT')
+        self.assertEqual(delivery.attempts, 1)
+
+    @override_settings(NOTIFICATION_DELIVERY_LEASE=60)
+    def test_abandoned_claims_are_retried_after_the_lease(self):
+        self.message_guests(users=self.guests[:2])
+        now = timezone.now()
+        # Claimed by workers that died; one had used its last attempt
+        NotificationDelivery.objects.filter(user=self.guests[0]).update(
+            status='SENDING', attempts=1, next_attempt_at=now - datetime.timedelta(seconds=1)
+        )
+        NotificationDelivery.objects.filter(user=self.guests[1]).update(
+            status='SENDING', attempts=2, next_attempt_at=now - datetime.timedelta(seconds=1)
+        )
+
+        self.assertEqual(deliver(max_attempts=2), (1, 0, 0))
+        self.assertEqual([message.to[0] for message in mail.outbox], [self.guests[0].email])
+
+        abandoned = NotificationDelivery.objects.get(user=self.guests[1])
+        self.assertEqual(abandoned.status, 'FAILED')
+        self.assertEqual(abandoned.last_error, 'Lease expired')
+
+    def test_claims_within_their_lease_are_left_alone(self):
+        self.message_guests(users=self.guests[:1])
+        NotificationDelivery.objects.update(
+            status='SENDING', attempts=1, next_attempt_at=timezone.now() + datetime.timedelta(minutes=5)
+        )
+
+        self.assertEqual(deliver(), (0, 0, 0))
+        self.assertEqual(len(mail.outbox), 0)
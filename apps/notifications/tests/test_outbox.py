@@ -0,0 +1,217 @@
+# apps/notifications/tests/test_outbox.py
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.utils import timezone
+import datetime
+from apps.users.models import User
+from apps.events.models import Event
+from apps.rsvp.models import RSVP
+from apps.notifications.catalog import render_notification
+from apps.notifications.models import Notification, NotificationJob
+from apps.notifications.services import NotificationService, UnreadCounts
+from apps.notifications.tasks import process_notification_jobs
+
+class RSVPOutboxTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(
+            username='host@example.com',
+            email='host@example.com',
+            name='Host User',
+            password='hostpass123',
+            role='HOST'
+        )
+        
+        self.guest = User.objects.create_user(
+            username='guest@example.com',
+            email='guest@example.com',
+            name='Guest User',
+            password='guestpass123',
+            role='GUEST'
+        )
+        
+        self.event = Event.objects.create(
+            title='Outbox Test Event',
+            description='This is a test event',
+            date=timezone.now() + datetime.timedelta(days=7),
+            location='Test Location',
+            privacy='PUBLIC',
+            created_by=self.host
+        )
+    
+    def test_rsvp_created_is_queued_until_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            rsvp = RSVP.objects.create(event=self.event, user=self.guest, status='YES')
+            
+            # Nothing is written on the RSVP's save path itself
+            self.assertFalse(NotificationJob.objects.exists())
+        
+        self.assertEqual(len(callbacks), 1)
+        job = NotificationJob.objects.get()
+        self.assertEqual(job.kind, 'RSVP_CREATED')
+        self.assertEqual(job.payload, {'rsvp_id': str(rsvp.pk), 'status': 'YES'})
+        self.assertFalse(Notification.objects.exists())
+        
+        self.assertEqual(process_notification_jobs(), 1)
+        self.assertEqual(Notification.objects.filter(type='RSVP_CONFIRMATION', event=self.event).count(), 2)
+    
+    def test_rsvp_changes_queue_update_and_approval_jobs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            rsvp = RSVP.objects.create(event=self.event, user=self.guest, status='YES')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            rsvp.status = 'MAYBE'
+            rsvp.is_approved = False
+            rsvp.save()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            # Saving without changes queues nothing
+            rsvp.save()
+        
+        kinds = sorted(NotificationJob.objects.values_list('kind', flat=True))
+        self.assertEqual(kinds, ['RSVP_APPROVAL', 'RSVP_CREATED', 'RSVP_UPDATED'])
+        
+        self.assertEqual(process_notification_jobs(), 3)
+        self.assertFalse(NotificationJob.objects.filter(status='PENDING').exists())
+        self.assertEqual(Notification.objects.filter(user=self.guest).count(), 3)
+        self.assertTrue(Notification.objects.filter(user=self.guest, template='rsvp_rejected').exists())
+        update = Notification.objects.get(user=self.host, template='rsvp_updated_host')
+        self.assertEqual(
+            render_notification(update)[1],
+            "Guest User has updated their RSVP to Maybe for your event 'Outbox Test Event'."
+        )
+    
+    def test_jobs_for_deleted_rsvps_are_skipped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            rsvp = RSVP.objects.create(event=self.event, user=self.guest, status='YES')
+        rsvp.delete()
+        
+        self.assertEqual(process_notification_jobs(), 1)
+        self.assertFalse(Notification.objects.exists())
+    
+    def test_host_rsvp_notifications_are_coalesced(self):
+        guests = [
+            User.objects.create_user(
+                username=f'crowd{i}@example.com',
+                email=f'crowd{i}@example.com',
+                name=f'Crowd {i}',
+                password='guestpass123',
+                role='GUEST'
+            )
+            for i in range(3)
+        ]
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            for guest in guests:
+                RSVP.objects.create(event=self.event, user=guest, status='YES')
+        process_notification_jobs()
+        
+        digest = Notification.objects.get(user=self.host)
+        self.assertEqual(digest.coalesced_count, 3)
+        self.assertEqual(render_notification(digest)[1], "3 new RSVPs for your event 'Outbox Test Event'.")
+        self.assertEqual(Notification.objects.filter(type='RSVP_CONFIRMATION').exclude(user=self.host).count(), 3)
+        
+        # Later RSVPs in the window update the same row without moving it
+        created_at = digest.created_at
+        rsvp = RSVP(event=self.event, user=self.guest, status='YES')
+        NotificationService.notify_rsvp_created(rsvp)
+        digest.refresh_from_db()
+        self.assertEqual(digest.coalesced_count, 4)
+        self.assertEqual(digest.created_at, created_at)
+        self.assertIsNotNone(digest.last_activity_at)
+        self.assertEqual(Notification.objects.filter(user=self.host).count(), 1)
+        self.assertEqual(UnreadCounts.get(self.host.id), 1)
+        
+        # Once read, the next RSVP starts a fresh notification
+        Notification.objects.filter(pk=digest.pk).update(is_read=True)
+        NotificationService.notify_rsvp_created(rsvp)
+        latest = Notification.objects.filter(user=self.host).first()
+        self.assertNotEqual(latest.pk, digest.pk)
+        self.assertEqual(latest.coalesced_count, 1)
+        self.assertEqual(render_notification(latest), (
+            'New RSVP for your event',
+            "Guest User has RSVP'd Yes to your event 'Outbox Test Event'."
+        ))
+    
+    def test_event_update_is_fanned_out_to_attendees(self):
+        declined = User.objects.create_user(
+            username='declined@example.com',
+            email='declined@example.com',
+            name='Declined User',
+            password='declinedpass123',
+            role='GUEST'
+        )
+        RSVP.objects.create(event=self.event, user=self.guest, status='YES')
+        RSVP.objects.create(event=self.event, user=declined, status='NO')
+        NotificationJob.objects.all().delete()
+        Notification.objects.all().delete()
+        
+        event = Event.objects.get(pk=self.event.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            # Fields guests never see are not announced
+            event.description = 'New description'
+            event.save()
+        self.assertFalse(NotificationJob.objects.exists())
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            event.location = 'New Location'
+            event.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            event.date += datetime.timedelta(hours=2)
+            event.save()
+        
+        jobs = NotificationJob.objects.all()
+        self.assertEqual([job.kind for job in jobs], ['EVENT_UPDATE', 'EVENT_UPDATE'])
+        
+        self.assertEqual(process_notification_jobs(), 2)
+        # Both edits reach the guest as one notification; the declined guest gets none
+        update = Notification.objects.get(type='EVENT_UPDATE')
+        self.assertEqual(update.user, self.guest)
+        self.assertEqual(
+            render_notification(update)[1],
+            "The host updated 'Outbox Test Event': location, date changed."
+        )
+        self.assertEqual(UnreadCounts.get(self.guest.id), 1)
+    
+    def test_leased_jobs_are_left_to_their_worker(self):
+        job = NotificationJob.objects.create(
+            kind='RSVP_CREATED',
+            payload={'rsvp_id': '00000000-0000-0000-0000-000000000000', 'status': 'YES'},
+            attempts=1,
+            locked_until=timezone.now() + datetime.timedelta(minutes=5)
+        )
+        self.assertEqual(process_notification_jobs(), 0)
+        
+        # Once the lease runs out (the worker died) the job is reclaimed
+        NotificationJob.objects.filter(pk=job.pk).update(locked_until=timezone.now())
+        self.assertEqual(process_notification_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_until), ('DONE', 2, None))
+    
+    def test_digest_closes_when_its_window_ends(self):
+        rsvp = RSVP(event=self.event, user=self.guest, status='YES')
+        NotificationService.notify_rsvp_created(rsvp)
+        digest = Notification.objects.get(user=self.host)
+        
+        # Merges don't extend the window: it runs from the digest's creation
+        Notification.objects.filter(pk=digest.pk).update(created_at=timezone.now() - datetime.timedelta(hours=2))
+        NotificationService.notify_rsvp_created(rsvp)
+        
+        digest.refresh_from_db()
+        self.assertIsNone(digest.coalescing_key)
+        self.assertEqual(digest.coalesced_count, 1)
+        latest = Notification.objects.filter(user=self.host).first()
+        self.assertNotEqual(latest.pk, digest.pk)
+        self.assertEqual(Notification.objects.filter(user=self.host, coalescing_key__isnull=False).count(), 1)
+        self.assertEqual(UnreadCounts.get(self.host.id), 2)
+    
+    def test_only_one_digest_per_key_is_open(self):
+        def digest():
+            return Notification(user=self.host, type='RSVP_CONFIRMATION', title='RSVP', coalescing_key='rsvp:1')
+        
+        Notification.objects.bulk_create([digest()])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Notification.objects.bulk_create([digest()])
+        
+        # Read rows no longer hold the key open
+        Notification.objects.update(is_read=True)
+        Notification.objects.bulk_create([digest()])
@@ -0,0 +1,148 @@
+# apps/notifications/tests/test_preferences.py
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+import datetime
+from apps.users.models import User
+from apps.events.models import Event
+from apps.rsvp.models import RSVP
+from apps.notifications.models import Notification, NotificationPreference
+from apps.notifications.services import NotificationPreferences, NotificationService
+
+class NotificationPreferenceTests(APITestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(
+            username='host@example.com',
+            email='host@example.com',
+            name='Host User',
+            password='hostpass123',
+            role='HOST'
+        )
+
+        self.guests = [
+            User.objects.create_user(
+                username=f'guest{index}@example.com',
+                email=f'guest{index}@example.com',
+                name=f'Guest {index}',
+                password='guestpass123',
+                role='GUEST'
+            )
+            for index in range(3)
+        ]
+
+        self.event = Event.objects.create(
+            title='Preference Test Event',
+            description='This is a test event',
+            date=timezone.now() + datetime.timedelta(days=7),
+            location='Test Location',
+            privacy='PUBLIC',
+            created_by=self.host
+        )
+
+        muted = NotificationPreference(user=self.guests[0])
+        muted.set_mode('HOST_MESSAGE', 'mute')
+        muted.save()
+
+        digest = NotificationPreference(user=self.guests[1])
+        digest.set_mode('HOST_MESSAGE', 'digest')
+        digest.save()
+
+    def test_fan_out_applies_preferences(self):
+        user_ids = [guest.id for guest in self.guests]
+        for _ in range(2):
+            NotificationService.fan_out(user_ids, event=self.event, type='HOST_MESSAGE', title='Hi', message='Hello')
+
+        sent = Notification.objects.filter(type='HOST_MESSAGE')
+        # Muted: nothing; digest: one row counting both; immediate: both
+        self.assertFalse(sent.filter(user=self.guests[0]).exists())
+        self.assertEqual(list(sent.filter(user=self.guests[1]).values_list('coalesced_count', flat=True)), [2])
+        self.assertEqual(sent.filter(user=self.guests[2]).count(), 2)
+
+        # Other types are unaffected
+        NotificationService.fan_out(user_ids, event=self.event, type='EVENT_REMINDER', title='Soon', message='Soon')
+        self.assertEqual(Notification.objects.filter(type='EVENT_REMINDER').count(), 3)
+
+    def test_digests_are_kept_per_event(self):
+        other_event = Event.objects.create(
+            title='Other Event',
+            description='Another test event',
+            date=timezone.now() + datetime.timedelta(days=14),
+            location='Other Location',
+            privacy='PUBLIC',
+            created_by=self.host
+        )
+        for event in (self.event, other_event, self.event):
+            NotificationService.fan_out(
+                [self.guests[1].id],
+                event=event,
+                type='HOST_MESSAGE',
+                title=f'About {event.title}',
+                message='Hello',
+                action_link=f'/events/{event.id}'
+            )
+
+        digests = Notification.objects.filter(user=self.guests[1], type='HOST_MESSAGE')
+        self.assertEqual(digests.count(), 2)
+        for digest in digests:
+            self.assertEqual(digest.title, f'About {digest.event.title}')
+            self.assertEqual(digest.action_link, f'/events/{digest.event_id}')
+        self.assertEqual(digests.get(event=self.event).coalesced_count, 2)
+
+    def test_lookup_is_cached(self):
+        user_ids = [guest.id for guest in self.guests]
+        NotificationPreferences.get_many(user_ids)
+
+        with self.assertNumQueries(0):
+            masks = NotificationPreferences.get_many(user_ids)
+        self.assertEqual(masks[self.guests[2].id], (0, 0))
+
+        # Saving a preference drops the cached masks
+        preference = NotificationPreference.objects.get(user=self.guests[0])
+        preference.set_mode('HOST_MESSAGE', 'immediate')
+        preference.save()
+        self.assertEqual(NotificationPreferences.get_many([self.guests[0].id]), {self.guests[0].id: (0, 0)})
+
+    @override_settings(LOCAL_CACHE_TIMEOUT=0)
+    def test_per_process_cache_expires_quickly(self):
+        user_id = self.guests[0].id
+        NotificationPreferences.get_many([user_id])
+
+        # A change made elsewhere never invalidates this process's cache
+        NotificationPreference.objects.filter(user_id=user_id).update(muted=0, digest=0)
+        self.assertEqual(NotificationPreferences.get_many([user_id]), {user_id: (0, 0)})
+
+    def test_broadcast_skips_muted_guests(self):
+        for guest in self.guests:
+            RSVP.objects.create(event=self.event, user=guest, status='YES')
+
+        count = NotificationService.broadcast(
+            RSVP.objects.filter(event=self.event),
+            event=self.event,
+            type='HOST_MESSAGE',
+            title='Hi',
+            message='Hello'
+        )
+        self.assertEqual(count, 2)
+        self.assertFalse(Notification.objects.filter(type='HOST_MESSAGE', user=self.guests[0]).exists())
+
+    def test_preferences_endpoint(self):
+        url = reverse('notification-preferences')
+        self.client.force_authenticate(user=self.guests[2])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['preferences']['EVENT_REMINDER'], 'immediate')
+
+        response = self.client.put(url, {'preferences': {'EVENT_REMINDER': 'mute', 'RSVP_UPDATE': 'digest'}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['preferences']['EVENT_REMINDER'], 'mute')
+        self.assertEqual(response.data['preferences']['RSVP_UPDATE'], 'digest')
+        self.assertEqual(response.data['preferences']['HOST_MESSAGE'], 'immediate')
+
+        preference = NotificationPreference.objects.get(user=self.guests[2])
+        self.assertEqual(preference.get_mode('EVENT_REMINDER'), 'mute')
+
+        response = self.client.put(url, {'preferences': {'UNKNOWN': 'mute'}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
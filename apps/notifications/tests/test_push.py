@@ -0,0 +1,224 @@
+# apps/notifications/tests/test_push.py
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+import datetime
+from apps.users.models import User
+from apps.events.models import Event
+from apps.notifications.delivery import deliver
+from apps.notifications.models import Device, NotificationDelivery
+from apps.notifications.push import HTTPPushProvider
+from apps.notifications.services import NotificationService
+from apps.notifications.tasks import deliver_notifications
+
+
+class StubPushGateway(BaseHTTPRequestHandler):
+    """
+    Local stand-in for a push provider: tokens starting with ``dead`` are
+    unknown, tokens starting with ``busy`` fail, everything else is accepted
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        messages = json.loads(self.rfile.read(int(self.headers['Content-Length'])))['messages']
+        self.server.requests.append(messages)
+
+        results = []
+        for message in messages:
+            if message['token'].startswith('dead'):
+                results.append('invalid_token')
+            elif message['token'].startswith('busy'):
+                results.append('unavailable')
+            else:
+                results.append('ok')
+
+        body = json.dumps({'results': results}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_gateway():
+    """
+    Serve ``StubPushGateway`` on a free local port; returns the server
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubPushGateway)
+    server.daemon_threads = True
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class PushDeliveryTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(
+            username='host@example.com',
+            email='host@example.com',
+            name='Host User',
+            password='hostpass123',
+            role='HOST'
+        )
+
+        self.guests = [
+            User.objects.create_user(
+                username=f'guest{index}@example.com',
+                email=f'guest{index}@example.com',
+                name=f'Guest {index}',
+                password='guestpass123',
+                role='GUEST'
+            )
+            for index in range(3)
+        ]
+
+        self.event = Event.objects.create(
+            title='Push Test Event',
+            description='This is a test event',
+            date=timezone.now() + datetime.timedelta(days=7),
+            location='Test Location',
+            privacy='PUBLIC',
+            created_by=self.host
+        )
+
+        Device.objects.create(user=self.guests[0], platform='ANDROID', token='phone-0')
+        Device.objects.create(user=self.guests[0], platform='IOS', token='dead-tablet-0')
+        Device.objects.create(user=self.guests[1], platform='IOS', token='phone-1')
+
+        self.server = start_gateway()
+        self.provider = HTTPPushProvider(f'http://127.0.0.1:{self.server.server_address[1]}/send', batch_size=2)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def notify(self, notification_type='RSVP_UPDATE'):
+        NotificationService.fan_out(
+            [guest.id for guest in self.guests],
+            event=self.event,
+            type=notification_type,
+            title='Status changed',
+            message='Your RSVP was updated',
+            action_link=f'/events/{self.event.id}'
+        )
+
+    def test_pushes_are_batched_and_dead_tokens_pruned(self):
+        self.notify()
+
+        # Only users with a registered device get a push delivery
+        self.assertEqual(NotificationDelivery.objects.filter(channel='PUSH').count(), 2)
+
+        self.assertEqual(deliver_notifications(channel='PUSH', provider=self.provider), (2, 0, 0))
+
+        # Three messages, at most two per provider request
+        self.assertEqual([len(batch) for batch in self.server.requests], [2, 1])
+        messages = [message for batch in self.server.requests for message in batch]
+        self.assertEqual({message['collapse_key'] for message in messages}, {f'RSVP_UPDATE:{self.event.id}'})
+        self.assertEqual(messages[0]['title'], 'Status changed')
+
+        self.assertFalse(Device.objects.filter(token__startswith='dead').exists())
+        self.assertEqual(Device.objects.count(), 2)
+        self.assertFalse(NotificationDelivery.objects.filter(channel='PUSH').exclude(status='SENT').exists())
+
+    def test_only_collapsible_types_carry_a_collapse_key(self):
+        self.notify(notification_type='HOST_MESSAGE')
+        deliver_notifications(channel='PUSH', provider=self.provider)
+
+        messages = [message for batch in self.server.requests for message in batch]
+        self.assertTrue(messages)
+        self.assertTrue(all(message['collapse_key'] is None for message in messages))
+
+    def test_provider_errors_are_retried(self):
+        Device.objects.filter(user=self.guests[1]).update(token='busy-phone-1')
+        self.notify()
+
+        self.assertEqual(deliver_notifications(channel='PUSH', provider=self.provider), (1, 1, 0))
+        delivery = NotificationDelivery.objects.get(channel='PUSH', user=self.guests[1])
+        self.assertEqual(delivery.status, 'PENDING')
+        self.assertEqual(delivery.attempts, 1)
+        self.assertEqual(delivery.last_error, 'unavailable')
+        self.assertGreater(delivery.next_attempt_at, timezone.now())
+
+    def test_deliveries_without_a_valid_device_fail(self):
+        Device.objects.filter(user=self.guests[1]).update(token='dead-phone-1')
+        self.notify()
+        # Unregistered after the delivery was queued
+        Device.objects.filter(user=self.guests[0]).delete()
+
+        self.assertEqual(deliver(channel='PUSH', provider=self.provider, max_attempts=1), (0, 2, 0))
+        for delivery in NotificationDelivery.objects.filter(channel='PUSH'):
+            self.assertEqual(delivery.status, 'FAILED')
+            self.assertEqual(delivery.last_error, 'No valid device')
+        self.assertFalse(Device.objects.exists())
+
+    def test_unconfigured_provider_leaves_the_queue_alone(self):
+        self.notify()
+
+        with self.assertRaises(ImproperlyConfigured):
+            deliver_notifications(channel='PUSH')
+        self.assertEqual(NotificationDelivery.objects.filter(channel='PUSH', status='PENDING', attempts=0).count(), 2)
+
+        with override_settings(NOTIFICATION_PUSH_PROVIDER='apps.notifications.push.DummyPushProvider'):
+            self.assertEqual(deliver_notifications(channel='PUSH'), (2, 0, 0))
+
+    def test_unreachable_gateway_fails_the_batch(self):
+        self.notify()
+        self.server.shutdown()
+        self.server.server_close()
+
+        provider = HTTPPushProvider(f'http://127.0.0.1:{self.server.server_address[1]}/send', timeout=1)
+        self.assertEqual(deliver_notifications(channel='PUSH', provider=provider), (0, 2, 0))
+        self.assertFalse(NotificationDelivery.objects.filter(channel='PUSH', status='SENT').exists())
+
+
+class DeviceViewSetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='guest@example.com',
+            email='guest@example.com',
+            name='Guest User',
+            password='guestpass123',
+            role='GUEST'
+        )
+        self.other = User.objects.create_user(
+            username='other@example.com',
+            email='other@example.com',
+            name='Other User',
+            password='otherpass123',
+            role='GUEST'
+        )
+
+    def test_register_list_and_remove_devices(self):
+        url = reverse('device-list')
+        self.client.force_authenticate(user=self.other)
+        response = self.client.post(url, {'platform': 'ANDROID', 'token': 'shared-token'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # Registering the same token again moves it to the new account
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(url, {'platform': 'ANDROID', 'token': 'shared-token'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        device = Device.objects.get(token='shared-token')
+        self.assertEqual(device.user, self.user)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+        self.client.force_authenticate(user=self.other)
+        response = self.client.delete(reverse('device-detail', args=[device.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.delete(reverse('device-detail', args=[device.id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Device.objects.exists())
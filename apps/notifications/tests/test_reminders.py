@@ -5,8 +5,10 @@ import datetime
 from apps.users.models import User
 from apps.events.models import Event
 from apps.rsvp.models import RSVP
-from apps.notifications.models import Notification
-from apps.notifications.tasks import send_event_reminders
+from apps.notifications.catalog import render_notification
+from apps.notifications.models import Notification, NotificationPreference, PaymentReminderLedger, ReminderLedger
+from apps.payments.models import Payment, EventPaymentLink
+from apps.notifications.tasks import send_event_reminders, send_payment_reminders
 
 class EventReminderTests(TestCase):
     def setUp(self):
@@ -74,4 +76,113 @@ class EventReminderTests(TestCase):
         )
         
         self.assertEqual(reminders.count(), 1)
-        self.assertEqual(reminders.first().title, 'Event Reminder')
\ No newline at end of file
+        self.assertEqual(render_notification(reminders.first())[0], 'Event Reminder')
+    
+    def test_event_reminders_are_sent_once(self):
+        Notification.objects.all().delete()
+        
+        # Hourly runs over the same 24 hour window must not repeat reminders
+        send_event_reminders()
+        # Still counts the event even though nobody was left to remind
+        self.assertEqual(send_event_reminders(), 1)
+        
+        reminders = Notification.objects.filter(user=self.guest, type='EVENT_REMINDER')
+        self.assertEqual(reminders.count(), 1)
+        self.assertTrue(ReminderLedger.objects.filter(event=self.event, user=self.guest, kind='24h').exists())
+    
+    def test_rescheduled_event_is_reminded_again(self):
+        Notification.objects.all().delete()
+        send_event_reminders()
+        
+        self.event.date = timezone.now() + datetime.timedelta(hours=20)
+        self.event.save()
+        send_event_reminders()
+        send_event_reminders()
+        
+        reminders = Notification.objects.filter(user=self.guest, type='EVENT_REMINDER')
+        self.assertEqual(reminders.count(), 2)
+        self.assertEqual(ReminderLedger.objects.filter(event=self.event, user=self.guest, kind='24h').count(), 2)
+
+class PaymentReminderTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(
+            username='host@example.com',
+            email='host@example.com',
+            name='Host User',
+            password='hostpass123',
+            role='HOST'
+        )
+        
+        self.guests = [
+            User.objects.create_user(
+                username=f'guest{i}@example.com',
+                email=f'guest{i}@example.com',
+                name=f'Guest {i}',
+                password='guestpass123',
+                role='GUEST'
+            )
+            for i in range(3)
+        ]
+        
+        self.events = []
+        for i in range(2):
+            event = Event.objects.create(
+                title=f'Paid Event {i}',
+                description='This event requires payment',
+                date=timezone.now() + datetime.timedelta(days=3),
+                location='Test Location',
+                privacy='PUBLIC',
+                created_by=self.host
+            )
+            EventPaymentLink.objects.create(event=event, url='https://upi.example.com/pay', amount=100)
+            self.events.append(event)
+        
+        # Free event - never needs a payment reminder
+        self.free_event = Event.objects.create(
+            title='Free Event',
+            description='No payment required',
+            date=timezone.now() + datetime.timedelta(days=3),
+            location='Test Location',
+            privacy='PUBLIC',
+            created_by=self.host
+        )
+        
+        for guest in self.guests:
+            for event in self.events + [self.free_event]:
+                RSVP.objects.create(event=event, user=guest, status='YES', is_approved=True)
+        
+        # guest0 already paid for the first event
+        Payment.objects.create(event=self.events[0], user=self.guests[0], status='PAID')
+        
+        Notification.objects.all().delete()
+    
+    def test_payment_reminders_only_for_unpaid_guests(self):
+        sent = send_payment_reminders()
+        
+        # 3 guests x 2 paid events, minus the one paid pair
+        self.assertEqual(sent, 5)
+        reminders = Notification.objects.filter(type='PAYMENT_REMINDER')
+        self.assertFalse(reminders.filter(event=self.free_event).exists())
+        self.assertFalse(reminders.filter(event=self.events[0], user=self.guests[0]).exists())
+    
+    def test_payment_reminders_are_rate_limited(self):
+        send_payment_reminders()
+        
+        # Within the interval nobody is reminded again
+        self.assertEqual(send_payment_reminders(), 0)
+        
+        # Per-guest cap limits how many events a guest hears about per run
+        PaymentReminderLedger.objects.all().delete()
+        self.assertEqual(send_payment_reminders(max_per_guest=1), 3)
+    
+    def test_muted_guests_are_rate_limited_too(self):
+        preference = NotificationPreference(user=self.guests[1])
+        preference.set_mode('PAYMENT_REMINDER', 'mute')
+        preference.save()
+        
+        # Muted reminders are recorded but not counted as sent
+        self.assertEqual(send_payment_reminders(), 3)
+        self.assertFalse(Notification.objects.filter(user=self.guests[1]).exists())
+        self.assertEqual(PaymentReminderLedger.objects.filter(user=self.guests[1]).count(), 2)
+        
+        self.assertEqual(send_payment_reminders(), 0)
@@ -0,0 +1,110 @@
+# apps/notifications/tests/test_scheduler.py
+import datetime
+from django.test import TestCase
+from django.utils import timezone
+from apps.users.models import User
+from apps.events.models import Event
+from apps.rsvp.models import RSVP
+from apps.notifications.models import Notification, ReminderLedger
+from apps.notifications.scheduler import ReminderScheduler
+
+class Clock:
+    def __init__(self):
+        self.now = timezone.now()
+    
+    def __call__(self):
+        return self.now
+    
+    def advance(self, **kwargs):
+        self.now += datetime.timedelta(**kwargs)
+
+class ReminderSchedulerTests(TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.host = User.objects.create_user(
+            username='host@example.com',
+            email='host@example.com',
+            name='Host User',
+            password='hostpass123',
+            role='HOST'
+        )
+        self.guest = User.objects.create_user(
+            username='guest@example.com',
+            email='guest@example.com',
+            name='Guest User',
+            password='guestpass123',
+            role='GUEST'
+        )
+        self.event = Event.objects.create(
+            title='Scheduled Event',
+            description='This is a test event',
+            date=self.clock.now + datetime.timedelta(hours=30),
+            location='Test Location',
+            privacy='PUBLIC',
+            created_by=self.host
+        )
+        RSVP.objects.create(event=self.event, user=self.guest, status='YES', is_approved=True)
+        
+        self.scheduler = ReminderScheduler(clock=self.clock)
+    
+    def tick(self, **kwargs):
+        """
+        Move time on and do what the run loop does
+        """
+        self.clock.advance(**kwargs)
+        self.scheduler.refresh()
+        return self.scheduler.run_pending()
+    
+    def sent_kinds(self):
+        return sorted(ReminderLedger.objects.filter(event=self.event).values_list('kind', flat=True))
+    
+    def test_reminders_fire_at_each_offset(self):
+        # Beyond the horizon for now
+        self.scheduler.refresh()
+        self.assertEqual(self.scheduler.heap, [])
+        
+        self.assertEqual(self.tick(hours=5, minutes=59), 0)
+        self.assertEqual(len(self.scheduler.heap), 3)
+        
+        self.assertEqual(self.tick(minutes=1), 1)
+        self.assertEqual(self.sent_kinds(), ['24h'])
+        
+        self.tick(hours=23)
+        self.tick(minutes=50)
+        self.assertEqual(self.sent_kinds(), ['10m', '1h', '24h'])
+        self.assertEqual(Notification.objects.filter(user=self.guest, type='EVENT_REMINDER').count(), 3)
+        self.assertEqual(self.scheduler.scheduled, {})
+    
+    def test_rescheduled_event_moves_its_reminders(self):
+        self.tick(hours=5, minutes=30)
+        self.assertEqual(len(self.scheduler.heap), 3)
+        
+        self.event.date = self.clock.now + datetime.timedelta(hours=48)
+        self.event.save()
+        # Keep updated_at on the test clock
+        Event.objects.filter(pk=self.event.pk).update(updated_at=self.clock.now)
+        
+        # The old 24h fire time passes without sending anything
+        self.assertEqual(self.tick(hours=5), 0)
+        self.assertNotIn(self.event.id, self.scheduler.scheduled)
+        
+        # The event enters the horizon again as time moves on
+        self.assertEqual(self.tick(hours=24), 1)
+        self.assertEqual(self.sent_kinds(), ['24h'])
+    
+    def test_late_event_gets_only_the_nearest_reminder(self):
+        self.scheduler.refresh()
+        
+        soon = Event.objects.create(
+            title='Last Minute Event',
+            description='Created shortly before it starts',
+            date=self.clock.now + datetime.timedelta(minutes=30),
+            location='Test Location',
+            privacy='PUBLIC',
+            created_by=self.host
+        )
+        RSVP.objects.create(event=soon, user=self.guest, status='YES', is_approved=True)
+        
+        self.scheduler.refresh()
+        self.assertEqual(self.scheduler.run_pending(), 1)
+        self.assertEqual(list(ReminderLedger.objects.filter(event=soon).values_list('kind', flat=True)), ['1h'])
@@ -0,0 +1,149 @@
+# apps/notifications/tests/test_stream.py
+import asyncio
+import json
+import threading
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.users.models import User
+from apps.notifications.broker import InMemoryBroker, RedisBroker, get_broker
+from apps.notifications.models import Notification
+from apps.notifications.services import NotificationService
+
+class InMemoryBrokerTests(TestCase):
+    def test_publish_from_another_thread(self):
+        broker = InMemoryBroker()
+        
+        async def listen():
+            subscriber = broker.subscribe('user-1')
+            thread = threading.Thread(target=broker.publish, args=('user-1', {'event': 'ping'}))
+            thread.start()
+            message = await asyncio.wait_for(subscriber[1].get(), timeout=1)
+            thread.join()
+            broker.unsubscribe('user-1', subscriber)
+            return message
+        
+        self.assertEqual(asyncio.run(listen()), {'event': 'ping'})
+        self.assertEqual(broker._subscribers, {})
+    
+    def test_slow_subscriber_drops_events(self):
+        broker = InMemoryBroker(max_queue_size=1)
+        
+        async def listen():
+            subscriber = broker.subscribe('user-1')
+            broker.publish_many([('user-1', {'n': 1}), ('user-1', {'n': 2})])
+            await asyncio.sleep(0)
+            return subscriber[1].qsize()
+        
+        self.assertEqual(asyncio.run(listen()), 1)
+
+    def test_redis_listener_stops_with_the_last_subscriber(self):
+        class IdleRedisBroker(RedisBroker):
+            async def _listen(self):
+                await asyncio.Event().wait()
+        
+        broker = IdleRedisBroker()
+        
+        async def listen():
+            first = broker.subscribe('user-1')
+            second = broker.subscribe('user-2')
+            listener = broker._listeners[first[0]]
+            
+            broker.unsubscribe('user-1', first)
+            await asyncio.sleep(0)
+            self.assertFalse(listener.cancelled())
+            
+            broker.unsubscribe('user-2', second)
+            await asyncio.wait([listener], timeout=1)
+            return listener.cancelled()
+        
+        self.assertTrue(asyncio.run(listen()))
+        self.assertEqual(broker._listeners, {})
+
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='guest@example.com',
+            email='guest@example.com',
+            name='Guest User',
+            password='guestpass123',
+            role='GUEST'
+        )
+        self.token = str(AccessToken.for_user(self.user))
+    
+    async def test_stream_requires_token(self):
+        response = await self.async_client.get('/api/notifications/stream/')
+        self.assertEqual(response.status_code, 401)
+    
+    async def test_stream_rejects_invalid_ticket(self):
+        response = await self.async_client.get('/api/notifications/stream/?ticket=not-a-ticket')
+        self.assertEqual(response.status_code, 401)
+    
+    async def test_stream_accepts_a_ticket(self):
+        response = await self.async_client.post(
+            '/api/notifications/stream-ticket/',
+            headers={'authorization': f'Bearer {self.token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        ticket = response.json()['ticket']
+        self.assertNotIn(self.token, ticket)
+        
+        response = await self.async_client.get(f'/api/notifications/stream/?ticket={ticket}')
+        self.assertEqual(response.status_code, 200)
+        
+        chunks = response.streaming_content
+        self.assertEqual(await asyncio.wait_for(chunks.__anext__(), timeout=1), b'event: unread\ndata: {"count": 0}\n\n')
+        await chunks.aclose()
+    
+    @override_settings(NOTIFICATION_STREAM_TICKET_LIFETIME=-1)
+    async def test_stream_rejects_expired_ticket(self):
+        response = await self.async_client.post(
+            '/api/notifications/stream-ticket/',
+            headers={'authorization': f'Bearer {self.token}'}
+        )
+        response = await self.async_client.get(f"/api/notifications/stream/?ticket={response.json()['ticket']}")
+        self.assertEqual(response.status_code, 401)
+    
+    async def test_stream_pushes_new_notifications(self):
+        response = await self.async_client.get(
+            '/api/notifications/stream/',
+            headers={'authorization': f'Bearer {self.token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        
+        # Consume the stream the way the ASGI handler does, in its own task
+        chunks = asyncio.Queue()
+        
+        async def consume():
+            async for chunk in response.streaming_content:
+                await chunks.put(chunk)
+        
+        task = asyncio.create_task(consume())
+        self.assertEqual(await asyncio.wait_for(chunks.get(), timeout=1), b'event: unread\ndata: {"count": 0}\n\n')
+        
+        @sync_to_async
+        def notify():
+            with self.captureOnCommitCallbacks(execute=True):
+                return NotificationService.bulk_create_notifications([Notification(
+                    user=self.user,
+                    type='SYSTEM',
+                    title='Hello',
+                    message='Welcome'
+                )])[0]
+        
+        notification = await notify()
+        
+        chunk = await asyncio.wait_for(chunks.get(), timeout=1)
+        event, data = chunk.decode().strip().split('\n')
+        self.assertEqual(event, 'event: notification')
+        self.assertEqual(json.loads(data[len('data: '):])['id'], str(notification.id))
+        
+        chunk = await asyncio.wait_for(chunks.get(), timeout=1)
+        self.assertEqual(chunk, b'event: unread\ndata: {"delta": 1}\n\n')
+        
+        # A client disconnect cancels the task, which unsubscribes
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertNotIn(str(self.user.id), get_broker()._subscribers)
@@ -0,0 +1,131 @@
+# apps/notifications/tests/test_unread.py
+import datetime
+from io import StringIO
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from apps.users.models import User
+from apps.events.models import Event
+from apps.notifications.models import Notification, UnreadCounter
+from apps.notifications.services import NotificationService, UnreadCounts
+
+class UnreadCounterTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='guest@example.com',
+            email='guest@example.com',
+            name='Guest User',
+            password='guestpass123',
+            role='GUEST'
+        )
+        
+        self.notifications = NotificationService.bulk_create_notifications([
+            Notification(user=self.user, type='SYSTEM', title=f'Notice {i}', message='Hello')
+            for i in range(3)
+        ])
+        self.client.force_authenticate(user=self.user)
+    
+    def counter(self):
+        return UnreadCounter.objects.get(user=self.user).unread
+    
+    def test_counter_follows_inserts_and_marks(self):
+        self.assertEqual(self.counter(), 3)
+        
+        Notification.objects.create(user=self.user, type='SYSTEM', title='One more', message='Hello')
+        self.assertEqual(self.counter(), 4)
+        
+        response = self.client.post(
+            reverse('notification-mark-read'),
+            {'notification_ids': [str(self.notifications[0].id)]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.counter(), 3)
+        
+        self.client.post(reverse('notification-mark-all-read'))
+        self.assertEqual(self.counter(), 0)
+    
+    def test_counter_follows_updates_and_deletes(self):
+        notification = self.notifications[0]
+        response = self.client.patch(
+            reverse('notification-detail', args=[notification.id]),
+            {'is_read': True},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.counter(), 2)
+        
+        # Deleting a read notification leaves the count alone
+        Notification.objects.get(pk=notification.pk).delete()
+        self.assertEqual(self.counter(), 2)
+        
+        Notification.objects.filter(user=self.user).delete()
+        self.assertEqual(self.counter(), 0)
+    
+    def test_event_delete_adjusts_the_counter(self):
+        host = User.objects.create_user(
+            username='host@example.com',
+            email='host@example.com',
+            name='Host User',
+            password='hostpass123',
+            role='HOST'
+        )
+        event = Event.objects.create(
+            title='Cancelled Event',
+            description='This is a test event',
+            date=timezone.now() + datetime.timedelta(days=7),
+            location='Test Location',
+            privacy='PUBLIC',
+            created_by=host
+        )
+        NotificationService.bulk_create_notifications([
+            Notification(user=self.user, event=event, type='HOST_MESSAGE', title=f'Update {i}', message='Hello')
+            for i in range(2)
+        ])
+        self.assertEqual(self.counter(), 5)
+        
+        event.delete()
+        self.assertEqual(self.counter(), 3)
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 3)
+    
+    def test_first_increment_counts_existing_notifications(self):
+        # Unread rows from before the user had a counter
+        UnreadCounter.objects.filter(user=self.user).delete()
+        
+        Notification.objects.create(user=self.user, type='SYSTEM', title='New', message='Hello')
+        self.assertEqual(self.counter(), 4)
+        
+        NotificationService.bulk_create_notifications([
+            Notification(user=self.user, type='SYSTEM', title='Newer', message='Hello')
+        ])
+        self.assertEqual(self.counter(), 5)
+    
+    def test_unread_count_endpoint_uses_counter(self):
+        UnreadCounts.get(self.user.id)
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(UnreadCounts.get(self.user.id), 3)
+        
+        response = self.client.get(reverse('notification-unread-count'))
+        self.assertEqual(response.data['unread_count'], 3)
+    
+    def test_reconcile_fixes_drift(self):
+        UnreadCounter.objects.filter(user=self.user).update(unread=10)
+        Notification.objects.filter(pk=self.notifications[0].pk).update(is_read=True)
+        
+        other = User.objects.create_user(
+            username='other@example.com',
+            email='other@example.com',
+            name='Other User',
+            password='otherpass123',
+            role='GUEST'
+        )
+        Notification.objects.bulk_create([Notification(user=other, type='SYSTEM', title='Raw', message='Hello')])
+        
+        call_command('reconcile_unread_counters', stdout=StringIO())
+        
+        self.assertEqual(self.counter(), 2)
+        self.assertEqual(UnreadCounter.objects.get(user=other).unread, 1)
+        self.assertEqual(UnreadCounts.get(self.user.id), 2)
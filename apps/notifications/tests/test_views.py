@@ -3,8 +3,11 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 from apps.users.models import User
 from apps.events.models import Event
-from apps.notifications.models import Notification
+from apps.notifications.models import Notification, NotificationJob
+from apps.notifications.tasks import process_notification_jobs
+from django.test import override_settings
 import datetime
+from urllib.parse import parse_qs, urlparse
 
 class NotificationViewSetTests(APITestCase):
     """
@@ -70,7 +73,64 @@ class NotificationViewSetTests(APITestCase):
         
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
+    
+    def test_list_notifications_keyset_pages(self):
+        """
+        Test walking the inbox with cursors, including rows created in the same instant
+        """
+        created_at = self.notification1.created_at
+        Notification.objects.bulk_create([
+            Notification(user=self.guest_user, type='SYSTEM', title=f'Notice {i}', message='Hello')
+            for i in range(5)
+        ])
+        Notification.objects.filter(user=self.guest_user).update(created_at=created_at)
+        
+        url = reverse('notification-list')
+        self.client.force_authenticate(user=self.guest_user)
+        
+        seen = []
+        response = self.client.get(url, {'page_size': 3})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(item['id'] for item in response.data['results'])
+            if response.data['next'] is None:
+                break
+            response = self.client.get(response.data['next'])
+        
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+    
+    def test_list_notifications_invalid_cursor(self):
+        """
+        Test that a malformed cursor is rejected
+        """
+        url = reverse('notification-list')
+        self.client.force_authenticate(user=self.guest_user)
+        
+        response = self.client.get(url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_list_notifications_compact_event(self):
+        """
+        Test that events are summarised by default and expanded on request
+        """
+        url = reverse('notification-list')
+        self.client.force_authenticate(user=self.guest_user)
+        
+        # One query for the page, event included
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        event = response.data['results'][0]['event']
+        self.assertEqual(set(event), {'id', 'title', 'date'})
+        
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'expand': 'event'})
+        events = [item['event'] for item in response.data['results']]
+        self.assertEqual(events[0]['created_by']['id'], str(self.host_user.id))
+        self.assertIn('description', events[0])
+        # Both notifications share one serialized event
+        self.assertIs(events[0], events[1])
     
     def test_create_notification(self):
         """
@@ -93,6 +153,33 @@ class NotificationViewSetTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data['status'], 'success')
         self.assertEqual(response.data['notification']['title'], 'Important update')
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(len(response.data['notification_ids']), 1)
+    
+    @override_settings(NOTIFICATION_FANOUT_ASYNC_THRESHOLD=1)
+    def test_create_notification_large_audience_is_queued(self):
+        """
+        Test that large audiences are fanned out by a background job
+        """
+        url = reverse('notification-list')
+        self.client.force_authenticate(user=self.host_user)
+        
+        data = {
+            'user_ids': [str(self.guest_user.id), str(self.host_user.id)],
+            'event_id': str(self.event.id),
+            'type': 'HOST_MESSAGE',
+            'title': 'Important update',
+            'message': 'Please bring a gift'
+        }
+        
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['count'], 2)
+        self.assertFalse(Notification.objects.filter(type='HOST_MESSAGE').exists())
+        
+        self.assertEqual(process_notification_jobs(), 1)
+        self.assertEqual(Notification.objects.filter(type='HOST_MESSAGE', event=self.event).count(), 2)
+        self.assertEqual(NotificationJob.objects.get(pk=response.data['job_id']).status, 'DONE')
     
     def test_mark_notifications_read(self):
         """
@@ -116,6 +203,59 @@ class NotificationViewSetTests(APITestCase):
         self.assertTrue(self.notification1.is_read)
         self.assertTrue(self.notification2.is_read)
     
+    def test_mark_read_ignores_other_users_notifications(self):
+        """
+        Test that ids of someone else's notifications are left alone
+        """
+        url = reverse('notification-mark-read')
+        self.client.force_authenticate(user=self.host_user)
+        
+        response = self.client.post(url, {'notification_ids': [str(self.notification1.id)]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 0)
+        
+        self.notification1.refresh_from_db()
+        self.assertFalse(self.notification1.is_read)
+    
+    def test_mark_read_until_cursor(self):
+        """
+        Test marking the inbox read down to a cursor position
+        """
+        older = Notification.objects.create(
+            user=self.guest_user,
+            type='SYSTEM',
+            title='Older',
+            message='Hello'
+        )
+        Notification.objects.filter(pk=older.pk).update(created_at=self.notification1.created_at - datetime.timedelta(days=1))
+        
+        self.client.force_authenticate(user=self.guest_user)
+        page = self.client.get(reverse('notification-list'), {'page_size': 2})
+        cursor = parse_qs(urlparse(page.data['next']).query)['cursor'][0]
+        
+        response = self.client.post(reverse('notification-mark-read-until'), {'cursor': cursor}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        
+        unread = Notification.objects.filter(user=self.guest_user, is_read=False)
+        self.assertEqual(list(unread), [older])
+    
+    def test_mark_read_until_timestamp(self):
+        """
+        Test marking everything created before a timestamp as read
+        """
+        url = reverse('notification-mark-read-until')
+        self.client.force_authenticate(user=self.guest_user)
+        
+        response = self.client.post(url, {'before': self.notification1.created_at.isoformat()}, format='json')
+        self.assertEqual(response.data['count'], 1)
+        
+        response = self.client.post(url, {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.post(url, {'cursor': 'bogus'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
     def test_mark_all_read(self):
         """
         Test marking all notifications as read
@@ -142,4 +282,149 @@ class NotificationViewSetTests(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['status'], 'success')
-        self.assertEqual(response.data['unread_count'], 2)
\ No newline at end of file
+        self.assertEqual(response.data['unread_count'], 2)
+    
+    def test_broadcast_to_segment(self):
+        """
+        Test messaging the guests who said yes but haven't paid
+        """
+        from apps.payments.models import Payment
+        from apps.rsvp.models import RSVP
+        from apps.notifications.services import UnreadCounts
+        
+        guests = [
+            User.objects.create_user(
+                username=f'guest{index}@example.com',
+                email=f'guest{index}@example.com',
+                name=f'Guest {index}',
+                password='guestpass123',
+                role='GUEST'
+            )
+            for index in range(3)
+        ]
+        RSVP.objects.create(event=self.event, user=self.guest_user, status='YES')
+        RSVP.objects.create(event=self.event, user=guests[0], status='YES')
+        RSVP.objects.create(event=self.event, user=guests[1], status='YES')
+        RSVP.objects.create(event=self.event, user=guests[2], status='NO')
+        Payment.objects.create(event=self.event, user=guests[1], status='PAID')
+        Notification.objects.filter(type='RSVP_CONFIRMATION').delete()
+        self.assertEqual(UnreadCounts.get(self.guest_user.id), 2)
+        
+        url = reverse('notification-broadcast')
+        self.client.force_authenticate(user=self.host_user)
+        data = {
+            'event_id': str(self.event.id),
+            'title': 'Payment due',
+            'message': 'Please pay before the event',
+            'status': ['YES'],
+            'paid': False
+        }
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['count'], 2)
+        
+        sent = Notification.objects.filter(type='HOST_MESSAGE')
+        self.assertEqual(set(sent.values_list('user_id', flat=True)), {self.guest_user.id, guests[0].id})
+        self.assertEqual(len(set(sent.values_list('id', flat=True))), 2)
+        self.assertEqual(sent.first().event, self.event)
+        self.assertEqual(UnreadCounts.get(self.guest_user.id), 3)
+        
+        self.client.force_authenticate(user=self.guest_user)
+        response = self.client.get(reverse('notification-list'), {'type': 'HOST_MESSAGE'})
+        self.assertEqual(response.data['results'][0]['title'], 'Payment due')
+    
+    def test_broadcast_creates_missing_counters(self):
+        """
+        Test that recipients without an unread counter get one that counts everything unread
+        """
+        from apps.rsvp.models import RSVP
+        from apps.notifications.models import UnreadCounter
+        from apps.notifications.services import NotificationService
+        
+        guest = User.objects.create_user(
+            username='newguest@example.com',
+            email='newguest@example.com',
+            name='New Guest',
+            password='guestpass123',
+            role='GUEST'
+        )
+        RSVP.objects.create(event=self.event, user=guest, status='YES')
+        # Written without touching counters, like rows from before they existed
+        Notification.objects.bulk_create([Notification(user=guest, type='SYSTEM', title='Old', message='Hello')])
+        UnreadCounter.objects.filter(user=guest).delete()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            count = NotificationService.broadcast(
+                RSVP.objects.filter(event=self.event, user=guest),
+                event=self.event,
+                type='HOST_MESSAGE',
+                title='Hello',
+                message='See you there'
+            )
+        self.assertEqual(count, 1)
+        self.assertEqual(UnreadCounter.objects.get(user=guest).unread, 2)
+        
+        Notification.objects.create(user=guest, type='SYSTEM', title='Later', message='Hello')
+        self.assertEqual(UnreadCounter.objects.get(user=guest).unread, 3)
+        self.assertEqual(Notification.objects.filter(user=guest, is_read=False).count(), 3)
+    
+    def test_broadcast_requires_event_host(self):
+        """
+        Test that only the event's host can broadcast to its guests
+        """
+        url = reverse('notification-broadcast')
+        self.client.force_authenticate(user=self.guest_user)
+        
+        response = self.client.post(url, {
+            'event_id': str(self.event.id),
+            'title': 'Hello',
+            'message': 'Hi everyone'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Notification.objects.filter(type='HOST_MESSAGE').exists())
+    
+    def test_list_notifications_grouped_by_event(self):
+        """
+        Test the inbox grouped by event, paged by latest activity
+        """
+        other_event = Event.objects.create(
+            title='Other Event',
+            description='Another test event',
+            date=datetime.datetime.now() + datetime.timedelta(days=14),
+            location='Other Location',
+            privacy='PUBLIC',
+            created_by=self.host_user
+        )
+        latest = Notification.objects.create(
+            user=self.guest_user,
+            event=other_event,
+            type='EVENT_UPDATE',
+            title='Venue changed',
+            message='Other Event moved',
+            is_read=True
+        )
+        # Notifications without an event are left out
+        Notification.objects.create(user=self.guest_user, type='SYSTEM', title='Welcome', message='Hello')
+        
+        url = reverse('notification-list')
+        self.client.force_authenticate(user=self.guest_user)
+        
+        response = self.client.get(url, {'group': 'event', 'page_size': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first = response.data['results']
+        self.assertEqual(len(first), 1)
+        self.assertEqual(first[0]['event']['id'], str(other_event.id))
+        self.assertEqual(first[0]['latest']['id'], str(latest.id))
+        self.assertEqual((first[0]['count'], first[0]['unread_count']), (1, 0))
+        self.assertEqual(first[0]['types'], ['EVENT_UPDATE'])
+        
+        cursor = parse_qs(urlparse(response.data['next']).query)['cursor'][0]
+        response = self.client.get(url, {'group': 'event', 'page_size': 1, 'cursor': cursor})
+        second = response.data['results']
+        self.assertEqual(second[0]['event']['id'], str(self.event.id))
+        self.assertEqual(second[0]['latest']['id'], str(self.notification2.id))
+        self.assertEqual((second[0]['count'], second[0]['unread_count']), (2, 2))
+        self.assertEqual(second[0]['types'], ['EVENT_INVITE', 'EVENT_REMINDER'])
+        self.assertIsNone(response.data['next'])
@@ -1,10 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import NotificationViewSet
+from .views import DeviceViewSet, NotificationViewSet, notification_stream
 
 router = DefaultRouter()
+# Registered before the notifications so 'devices/' isn't taken for a notification id
+router.register(r'devices', DeviceViewSet, basename='device')
 router.register(r'', NotificationViewSet, basename='notification')
 
 urlpatterns = [
+    path('stream/', notification_stream, name='notification-stream'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,14 +1,40 @@
-from rest_framework import viewsets, permissions, status, filters
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework import mixins, viewsets, permissions, status
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Notification
+from rest_framework_simplejwt.exceptions import InvalidToken
+from .broker import get_broker
+from .models import ArchivedNotification, Device, Notification, NotificationPreference
+from .services import NotificationService, UnreadCounts
 from .serializers import (
+    ArchivedNotificationSerializer,
+    DeviceSerializer,
+    NotificationGroupSerializer,
     NotificationSerializer, 
     NotificationCreateSerializer,
-    NotificationBatchSerializer
+    NotificationBroadcastSerializer,
+    NotificationPreferenceSerializer,
+    NotificationBatchSerializer,
+    NotificationReadUntilSerializer
 )
+from ..core.pagination import KeysetPagination
 from ..core.permissions import IsOwnerOrReadOnly, IsEventHost
+from ..users.authentication import CachedJWTAuthentication
+
+class EventGroupPagination(KeysetPagination):
+    """
+    Keyset pagination of the grouped inbox by latest activity
+    """
+    ordering = ('-latest_at', '-event_id')
 
 class NotificationViewSet(viewsets.ModelViewSet):
     """
@@ -16,15 +42,82 @@ class NotificationViewSet(viewsets.ModelViewSet):
     """
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend]
     filterset_fields = ['type', 'is_read', 'event']
-    ordering_fields = ['created_at']
+    # Set per action; see CachedJWTAuthentication
+    claims_only_authentication = False
     
     def get_queryset(self):
         """
         Filter notifications to only show the authenticated user's notifications
         """
-        return Notification.objects.filter(user=self.request.user)
+        model = ArchivedNotification if self.archived else Notification
+        queryset = model.objects.filter(user=self.request.user)
+        
+        if 'event' in self.expand:
+            return queryset.select_related('event__created_by')
+        return queryset.select_related('event')
+    
+    @property
+    def expand(self):
+        """
+        Related objects to serialize in full (``?expand=event``)
+        """
+        return set(filter(None, self.request.query_params.get('expand', '').split(',')))
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.expand
+        return context
+    
+    @property
+    def archived(self):
+        """
+        Whether the inbox was asked for archived notifications (``?archived=1``)
+        """
+        return self.action == 'list' and self.request.query_params.get('archived') in ('1', 'true')
+    
+    def list(self, request, *args, **kwargs):
+        """
+        List notifications, or one entry per event with ``?group=event``
+        """
+        if request.query_params.get('group') == 'event' and not self.archived:
+            return self.grouped_list(request)
+        return super().list(request, *args, **kwargs)
+    
+    def grouped_list(self, request):
+        """
+        One entry per event with its latest notification, unread count and
+        types, ordered by latest activity
+
+        The groups are aggregated in the database over the
+        ``(user, event, created_at)`` index and paged by cursor; only each
+        page's latest notifications are loaded. Notifications without an
+        event are left out.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).filter(event__isnull=False).order_by()
+        
+        latest = queryset.filter(event=OuterRef('event_id')).order_by('-created_at', '-id').values('id')[:1]
+        groups = queryset.values('event_id').annotate(
+            latest_at=Max('created_at'),
+            latest_id=Subquery(latest),
+            unread=Count('id', filter=Q(is_read=False)),
+            total=Count('id'),
+            **{
+                f'type_{code}': Count('id', filter=Q(type=code))
+                for code, _ in Notification.NOTIFICATION_TYPES
+            }
+        )
+        
+        paginator = EventGroupPagination()
+        page = paginator.paginate_queryset(groups, request, view=self)
+        context = self.get_serializer_context()
+        related = 'event__created_by' if 'event' in self.expand else 'event'
+        context['latest'] = Notification.objects.select_related(related).in_bulk([row['latest_id'] for row in page])
+        
+        serializer = NotificationGroupSerializer(page, many=True, context=context)
+        return paginator.get_paginated_response(serializer.data)
     
     def get_serializer_class(self):
         """
@@ -34,6 +127,14 @@ class NotificationViewSet(viewsets.ModelViewSet):
             return NotificationCreateSerializer
         elif self.action in ['mark_read', 'mark_all_read']:
             return NotificationBatchSerializer
+        elif self.action == 'mark_read_until':
+            return NotificationReadUntilSerializer
+        elif self.action == 'broadcast':
+            return NotificationBroadcastSerializer
+        elif self.action == 'preferences':
+            return NotificationPreferenceSerializer
+        elif self.archived:
+            return ArchivedNotificationSerializer
         return NotificationSerializer
     
     def get_permissions(self):
@@ -54,12 +155,55 @@ class NotificationViewSet(viewsets.ModelViewSet):
         """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        notification = serializer.save()
+        notifications = serializer.save()
+        
+        # Large audiences are fanned out by a background job
+        if serializer.job is not None:
+            return Response({
+                'status': 'success',
+                'message': 'Notifications queued for delivery',
+                'job_id': str(serializer.job.id),
+                'count': len(serializer.user_ids)
+            }, status=status.HTTP_202_ACCEPTED)
         
         return Response({
             'status': 'success',
             'message': 'Notifications sent successfully',
-            'notification': NotificationSerializer(notification).data
+            'notification': NotificationSerializer(notifications[0]).data if notifications else None,
+            'notification_ids': [str(notification.id) for notification in notifications],
+            'count': len(notifications)
+        }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'])
+    def broadcast(self, request):
+        """
+        Send a host message to a segment of an event's guests
+        """
+        serializer = NotificationBroadcastSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        
+        event = serializer.event
+        if event.created_by != request.user:
+            return Response({
+                'status': 'error',
+                'message': 'Only the event host can message its guests'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        data = serializer.validated_data
+        count = NotificationService.broadcast(
+            serializer.get_recipients(),
+            event=event,
+            type='HOST_MESSAGE',
+            title=data['title'],
+            message=data['message'],
+            action_link=data.get('action_link'),
+            action_text=data.get('action_text')
+        )
+        
+        return Response({
+            'status': 'success',
+            'message': 'Broadcast sent',
+            'count': count
         }, status=status.HTTP_201_CREATED)
     
     @action(detail=False, methods=['post'], url_path='mark-read')
@@ -70,14 +214,39 @@ class NotificationViewSet(viewsets.ModelViewSet):
         serializer = NotificationBatchSerializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         
-        # Update all notifications
-        notifications = serializer.notifications
-        notifications.update(is_read=True)
+        # One conditional UPDATE; ids of other users' notifications match nothing
+        with transaction.atomic():
+            count = Notification.objects.filter(
+                user=request.user,
+                id__in=serializer.validated_data['notification_ids'],
+                is_read=False
+            ).update(is_read=True)
+            NotificationService.adjust_unread(request.user.id, -count)
         
         return Response({
             'status': 'success',
             'message': 'Notifications marked as read',
-            'count': len(notifications)
+            'count': count
+        })
+    
+    @action(detail=False, methods=['post'], url_path='mark-read-until')
+    def mark_read_until(self, request):
+        """
+        Mark notifications as read up to an inbox cursor or timestamp
+        """
+        serializer = NotificationReadUntilSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        
+        with transaction.atomic():
+            count = serializer.get_queryset(
+                Notification.objects.filter(user=request.user, is_read=False)
+            ).update(is_read=True)
+            NotificationService.adjust_unread(request.user.id, -count)
+        
+        return Response({
+            'status': 'success',
+            'message': 'Notifications marked as read',
+            'count': count
         })
     
     @action(detail=False, methods=['post'], url_path='mark-all-read')
@@ -85,7 +254,9 @@ class NotificationViewSet(viewsets.ModelViewSet):
         """
         Mark all notifications as read
         """
-        count = Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        with transaction.atomic():
+            count = Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+            NotificationService.adjust_unread(request.user.id, -count)
         
         return Response({
             'status': 'success',
@@ -93,14 +264,123 @@ class NotificationViewSet(viewsets.ModelViewSet):
             'count': count
         })
     
-    @action(detail=False, methods=['get'], url_path='unread-count')
+    @action(detail=False, methods=['get', 'put', 'patch'])
+    def preferences(self, request):
+        """
+        Get or update the user's per-type notification preferences
+        """
+        preference = NotificationPreference.objects.filter(user=request.user).first()
+        if preference is None:
+            preference = NotificationPreference(user=request.user)
+        
+        if request.method != 'GET':
+            serializer = NotificationPreferenceSerializer(preference, data=request.data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        
+        return Response({
+            'status': 'success',
+            **NotificationPreferenceSerializer(preference).data
+        })
+    
+    @action(detail=False, methods=['post'], url_path='stream-ticket')
+    def stream_ticket(self, request):
+        """
+        Issue a short-lived ticket for opening the notification stream
+        """
+        return Response({
+            'status': 'success',
+            'ticket': signing.dumps(str(request.user.id), salt=STREAM_TICKET_SALT),
+            'expires_in': _stream_ticket_lifetime()
+        })
+    
+    @action(detail=False, methods=['get'], url_path='unread-count', claims_only_authentication=True)
     def unread_count(self, request):
         """
         Get count of unread notifications
         """
-        count = Notification.objects.filter(user=request.user, is_read=False).count()
+        count = UnreadCounts.get(request.user.id)
         
         return Response({
             'status': 'success',
             'unread_count': count
-        })
\ No newline at end of file
+        })
+
+class DeviceViewSet(mixins.CreateModelMixin,
+                    mixins.ListModelMixin,
+                    mixins.DestroyModelMixin,
+                    viewsets.GenericViewSet):
+    """
+    ViewSet for registering the user's push devices
+    """
+    serializer_class = DeviceSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        """
+        Filter devices to the authenticated user's
+        """
+        return Device.objects.filter(user=self.request.user).order_by('-last_seen_at')
+
+STREAM_TICKET_SALT = 'notifications.stream'
+
+def _stream_ticket_lifetime():
+    return getattr(settings, 'NOTIFICATION_STREAM_TICKET_LIFETIME', 30)
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def notification_stream(request):
+    """
+    Server-Sent Events stream of a user's new notifications and unread-count
+    changes
+
+    Served asynchronously under ASGI, so idle connections wait on a broker
+    queue instead of holding a thread. Browsers' EventSource can't set
+    headers, so instead of the access token (which would end up in access
+    logs) it may pass a ticket from ``POST stream-ticket/`` as ``?ticket=``;
+    tickets expire after ``NOTIFICATION_STREAM_TICKET_LIFETIME`` seconds.
+    """
+    authenticator = CachedJWTAuthentication()
+    header = authenticator.get_header(request)
+    raw_token = authenticator.get_raw_token(header) if header else None
+    ticket = request.GET.get('ticket')
+    
+    if raw_token:
+        try:
+            token = authenticator.get_validated_token(raw_token)
+            user_id = (await sync_to_async(authenticator.get_user)(token)).id
+        except (InvalidToken, AuthenticationFailed) as exc:
+            return JsonResponse({'detail': str(exc.detail)}, status=401)
+    elif ticket:
+        try:
+            user_id = signing.loads(ticket, salt=STREAM_TICKET_SALT, max_age=_stream_ticket_lifetime())
+        except signing.BadSignature:
+            return JsonResponse({'detail': 'Stream ticket is invalid or expired.'}, status=401)
+    else:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    
+    initial_unread = await sync_to_async(UnreadCounts.get)(user_id)
+    heartbeat = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 15)
+    
+    async def events():
+        broker = get_broker()
+        subscriber = broker.subscribe(user_id)
+        queue = subscriber[1]
+        try:
+            yield _sse('unread', {'count': initial_unread})
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    # Comment lines keep proxies from closing idle connections
+                    yield ': keep-alive\n\n'
+                    continue
+                yield _sse(message['event'], message['data'])
+        finally:
+            broker.unsubscribe(user_id, subscriber)
+    
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
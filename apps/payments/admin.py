@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Payment
+from .models import Payment, EventPaymentLink, PaymentDailyRollup
 
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
@@ -10,7 +10,7 @@ class PaymentAdmin(admin.ModelAdmin):
     readonly_fields = ('created_at', 'updated_at')
     fieldsets = (
         (None, {
-            'fields': ('event', 'user', 'status', 'amount', 'payment_link', 'description')
+            'fields': ('event', 'user', 'status', 'amount', 'description')
         }),
         ('Confirmation', {
             'fields': ('manually_confirmed', 'confirmed_by', 'confirmation_notes')
@@ -18,4 +18,19 @@ class PaymentAdmin(admin.ModelAdmin):
         ('Metadata', {
             'fields': ('created_at', 'updated_at')
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(EventPaymentLink)
+class EventPaymentLinkAdmin(admin.ModelAdmin):
+    list_display = ('event', 'url', 'amount', 'created_at')
+    search_fields = ('event__title', 'url', 'description')
+    raw_id_fields = ('event',)
+    readonly_fields = ('created_at', 'updated_at')
+
+@admin.register(PaymentDailyRollup)
+class PaymentDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('event', 'host', 'day', 'status', 'count', 'amount_total')
+    list_filter = ('status', 'day')
+    search_fields = ('event__title', 'host__name', 'host__email')
+    raw_id_fields = ('host', 'event')
+    readonly_fields = ('updated_at',)
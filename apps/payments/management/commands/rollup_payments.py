@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from apps.payments.tasks import rollup_payments
+
+class Command(BaseCommand):
+    help = 'Incrementally refresh the daily payment rollups used by host analytics'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild every rollup instead of only the buckets changed since the last run'
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        """
+        Execute the command to refresh payment rollups
+        """
+        bucket_count = rollup_payments(full=options['full'], batch_size=options['batch_size'])
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully refreshed {bucket_count} payment rollup buckets')
+        )
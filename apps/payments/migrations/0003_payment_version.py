@@ -0,0 +1,52 @@
+# Generated by Django 5.1.15 on 2026-10-19 02:24
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+STATUS_PRIORITY = {'PAID': 0, 'PENDING': 1, 'FAILED': 2, 'REFUNDED': 3}
+
+
+def normalize_guest_payments(apps, schema_editor):
+    """
+    Prepare guest payments for the unique (event, user) constraint:
+    guest rows stop carrying a copy of the host's payment link, and
+    duplicate guest rows collapse to the most advanced one.
+    """
+    Payment = apps.get_model('payments', 'Payment')
+    guest_payments = Payment.objects.exclude(user=F('event__created_by'))
+
+    guest_payments.filter(payment_link__isnull=False).update(payment_link=None)
+
+    keep = {}
+    duplicates = []
+    rows = guest_payments.order_by('-updated_at').values_list('id', 'event_id', 'user_id', 'status')
+    for payment_id, event_id, user_id, status in rows.iterator(chunk_size=2000):
+        key = (event_id, user_id)
+        current = keep.get(key)
+        if current is None:
+            keep[key] = (payment_id, status)
+        elif STATUS_PRIORITY.get(status, 9) < STATUS_PRIORITY.get(current[1], 9):
+            duplicates.append(current[0])
+            keep[key] = (payment_id, status)
+        else:
+            duplicates.append(payment_id)
+
+    for start in range(0, len(duplicates), 500):
+        Payment.objects.filter(id__in=duplicates[start:start + 500]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_payment_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(normalize_guest_payments, migrations.RunPython.noop),
+    ]
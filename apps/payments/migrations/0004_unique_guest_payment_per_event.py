@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-19 02:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+        ('payments', '0003_payment_version'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(condition=models.Q(('payment_link__isnull', True)), fields=('event', 'user'), name='unique_guest_payment_per_event'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.1.15 on 2026-10-19 02:25
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+from django.db.models import F
+
+
+def move_host_links(apps, schema_editor):
+    """
+    Turn the host-owned Payment rows carrying a link into EventPaymentLink rows
+    """
+    Payment = apps.get_model('payments', 'Payment')
+    EventPaymentLink = apps.get_model('payments', 'EventPaymentLink')
+
+    host_rows = Payment.objects.filter(
+        user=F('event__created_by'),
+        payment_link__isnull=False
+    )
+
+    links = {}
+    for payment in host_rows.order_by('created_at').iterator(chunk_size=2000):
+        # The most recent link wins if a host added several
+        links[payment.event_id] = EventPaymentLink(
+            event_id=payment.event_id,
+            url=payment.payment_link,
+            amount=payment.amount,
+            description=payment.description,
+            created_at=payment.created_at,
+            updated_at=payment.updated_at
+        )
+
+    EventPaymentLink.objects.bulk_create(links.values(), batch_size=500)
+    host_rows.delete()
+
+
+def restore_host_links(apps, schema_editor):
+    """
+    Recreate the host-owned Payment rows from EventPaymentLink rows
+    """
+    Payment = apps.get_model('payments', 'Payment')
+    EventPaymentLink = apps.get_model('payments', 'EventPaymentLink')
+
+    Payment.objects.bulk_create([
+        Payment(
+            event_id=link.event_id,
+            user_id=link.event.created_by_id,
+            payment_link=link.url,
+            amount=link.amount,
+            description=link.description,
+            status='PENDING'
+        )
+        for link in EventPaymentLink.objects.select_related('event').iterator(chunk_size=2000)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+        ('payments', '0004_unique_guest_payment_per_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventPaymentLink',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('url', models.URLField(help_text='External payment link (UPI/Paytm/GPay)')),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('description', models.CharField(blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='payment_link', to='events.event')),
+            ],
+            options={
+                'db_table': 'event_payment_links',
+            },
+        ),
+        migrations.RunPython(move_host_links, restore_host_links),
+    ]
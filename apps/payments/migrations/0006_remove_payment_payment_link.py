@@ -0,0 +1,26 @@
+# Generated by Django 5.1.15 on 2026-10-19 02:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+        ('payments', '0005_event_payment_link'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='payment',
+            name='unique_guest_payment_per_event',
+        ),
+        migrations.RemoveField(
+            model_name='payment',
+            name='payment_link',
+        ),
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(fields=('event', 'user'), name='unique_guest_payment_per_event'),
+        ),
+    ]
@@ -1,11 +1,71 @@
 import uuid
-from django.db import models
+from django.db import connections, models
+from django.utils import timezone
 from apps.users.models import User
 from apps.events.models import Event
 
+class PaymentQuerySet(models.QuerySet):
+    """
+    QuerySet with a race-free guest confirmation path
+    """
+    def confirm(self, event_id, user_id, confirmation_notes=''):
+        """
+        Mark the guest's payment for an event as PAID in a single statement.
+        
+        Inserts a new confirmed row or upgrades the existing one via
+        ``INSERT ... ON CONFLICT DO UPDATE``, relying on the unique guest
+        payment constraint to serialize concurrent confirmations.
+        Returns ``(payment_id, created)``, or ``None`` if the payment was
+        already confirmed.
+        """
+        connection = connections[self.db]
+        meta = self.model._meta
+        table = connection.ops.quote_name(meta.db_table)
+        now = timezone.now()
+        
+        def prep(field_name, value):
+            return meta.get_field(field_name).get_db_prep_save(value, connection)
+        
+        sql = f"""
+            INSERT INTO {table} (
+                id, event_id, user_id, status, manually_confirmed,
+                confirmation_notes, version, created_at, updated_at
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, 1, %s, %s)
+            ON CONFLICT (event_id, user_id)
+            DO UPDATE SET
+                status = excluded.status,
+                manually_confirmed = excluded.manually_confirmed,
+                confirmation_notes = excluded.confirmation_notes,
+                version = {table}.version + 1,
+                updated_at = excluded.updated_at
+            WHERE {table}.status <> %s
+            RETURNING id, version
+        """
+        params = [
+            prep('id', uuid.uuid4()),
+            prep('event', event_id),
+            prep('user', user_id),
+            'PAID',
+            prep('manually_confirmed', True),
+            confirmation_notes,
+            prep('created_at', now),
+            prep('updated_at', now),
+            'PAID',
+        ]
+        
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        
+        if row is None:
+            return None
+        
+        return meta.pk.to_python(row[0]), row[1] == 1
+
 class Payment(models.Model):
     """
-    Payment model for tracking event payments
+    Payment model for tracking guest payments for events
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     
@@ -14,7 +74,6 @@ class Payment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='payments')
     
     # Payment details
-    payment_link = models.URLField(blank=True, null=True, help_text="External payment link (UPI/Paytm/GPay)")
     amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     description = models.CharField(max_length=255, blank=True, null=True)
     
@@ -32,13 +91,111 @@ class Payment(models.Model):
     confirmed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='confirmed_payments')
     confirmation_notes = models.TextField(blank=True, null=True)
     
+    # Incremented on every status change for optimistic concurrency
+    version = models.PositiveIntegerField(default=1)
+    
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = PaymentQuerySet.as_manager()
+    
     class Meta:
         db_table = 'payments'
         ordering = ['-created_at']
+        indexes = [
+            # Used by the incremental rollup job to find changed rows
+            models.Index(fields=['updated_at'], name='payment_updated_at_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'user'], name='unique_guest_payment_per_event'),
+        ]
     
     def __str__(self):
         return f"{self.user} - {self.event} - {self.status}"
+    
+    def save(self, *args, **kwargs):
+        """
+        Bump ``version`` on every update, so a compare-and-swap based on a
+        version read before any other write is rejected
+        """
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        
+        self.version = models.F('version') + 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'version'}
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=['version'])
+
+
+class EventPaymentLink(models.Model):
+    """
+    The host's payment link for an event
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    
+    # Relations
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, related_name='payment_link')
+    
+    # Link details
+    url = models.URLField(help_text="External payment link (UPI/Paytm/GPay)")
+    amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    description = models.CharField(max_length=255, blank=True, null=True)
+    
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'event_payment_links'
+    
+    def __str__(self):
+        return f"{self.event} - {self.url}"
+
+
+class PaymentDailyRollup(models.Model):
+    """
+    Daily payment totals per host, event and status.
+    Maintained incrementally by the ``rollup_payments`` job so host
+    analytics never have to scan the payments table.
+    """
+    host = models.ForeignKey(User, on_delete=models.CASCADE, related_name='payment_rollups')
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='payment_rollups')
+    day = models.DateField()
+    status = models.CharField(max_length=10, choices=Payment.STATUS_CHOICES)
+    
+    # Aggregates for the bucket
+    count = models.PositiveIntegerField(default=0)
+    amount_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    # Metadata
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'payment_daily_rollups'
+        ordering = ['day']
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'day', 'status'], name='unique_payment_rollup_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['host', 'day'], name='payment_rollup_host_day_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.event} - {self.day} - {self.status}"
+
+
+class RollupWatermark(models.Model):
+    """
+    Tracks how far an incremental rollup job has processed its source table
+    """
+    name = models.CharField(max_length=50, unique=True)
+    last_processed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'rollup_watermarks'
+    
+    def __str__(self):
+        return f"{self.name} @ {self.last_processed_at}"
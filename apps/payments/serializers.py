@@ -1,5 +1,9 @@
 from rest_framework import serializers
-from .models import Payment
+from django.db.models import F
+from django.utils import timezone
+from .models import Payment, EventPaymentLink
+from .services import PaidUserSet
+from apps.core.exceptions import ConflictError
 from apps.users.serializers import UserSerializer
 from apps.events.serializers import EventSerializer
 
@@ -13,20 +17,21 @@ class PaymentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Payment
         fields = (
-            'id', 'event', 'user', 'payment_link', 
+            'id', 'event', 'user',
             'amount', 'description', 'status',
-            'manually_confirmed', 'created_at'
+            'manually_confirmed', 'version', 'created_at'
         )
-        read_only_fields = ('id', 'created_at')
+        read_only_fields = ('id', 'version', 'created_at')
 
 class PaymentLinkSerializer(serializers.ModelSerializer):
     """
     Serializer for adding payment links to events
     """
     event_id = serializers.UUIDField(write_only=True)
+    payment_link = serializers.URLField(source='url')
     
     class Meta:
-        model = Payment
+        model = EventPaymentLink
         fields = ('id', 'event_id', 'payment_link', 'amount', 'description')
         read_only_fields = ('id',)
     
@@ -52,17 +57,15 @@ class PaymentLinkSerializer(serializers.ModelSerializer):
         return data
     
     def create(self, validated_data):
-        event_id = validated_data.pop('event_id')
-        user = self.context['request'].user
+        validated_data.pop('event_id')
         
-        # Create the payment link
-        payment = Payment.objects.create(
-            event_id=event_id,
-            user=user,  # This will be the host in this case
-            **validated_data
+        # An event has a single payment link; adding one again replaces it
+        link, _ = EventPaymentLink.objects.update_or_create(
+            event=self.event,
+            defaults=validated_data
         )
         
-        return payment
+        return link
 
 class PaymentConfirmationSerializer(serializers.ModelSerializer):
     """
@@ -80,70 +83,72 @@ class PaymentConfirmationSerializer(serializers.ModelSerializer):
         Validate the payment confirmation
         """
         event_id = data['event_id']
-        user = self.context['request'].user
         
         from apps.events.models import Event
+        
+        # Load the event together with its payment link in one query
         try:
-            event = Event.objects.get(pk=event_id)
+            event = Event.objects.select_related('payment_link').get(pk=event_id)
         except Event.DoesNotExist:
             raise serializers.ValidationError("Event does not exist")
         
-        # Check if a payment already exists for this user and event
-        existing_payment = Payment.objects.filter(
-            event_id=event_id,
-            user=user,
-            status__in=['PAID', 'PENDING']
-        ).first()
-        
-        if existing_payment:
-            if existing_payment.status == 'PAID':
-                raise serializers.ValidationError("You have already confirmed payment for this event")
-            # If payment exists but is pending, we'll update it instead of creating new
-            self.instance = existing_payment
-        
-        # Find the payment link for this event
-        host_payment = Payment.objects.filter(
-            event_id=event_id,
-            user=event.created_by,
-            payment_link__isnull=False
-        ).first()
-        
-        if not host_payment:
+        if not event.has_payment_link:
             raise serializers.ValidationError("No payment link found for this event")
         
-        self.payment_link = host_payment.payment_link
         self.event = event
         
         return data
     
     def create(self, validated_data):
-        event_id = validated_data.pop('event_id')
         user = self.context['request'].user
         
-        # If we found an existing payment during validation, update it
-        if hasattr(self, 'instance') and self.instance:
-            self.instance.status = 'PAID'
-            self.instance.manually_confirmed = True
-            self.instance.confirmation_notes = validated_data.get('confirmation_notes', '')
-            self.instance.save()
-            return self.instance
-        
-        # Create a new payment confirmation
-        payment = Payment.objects.create(
-            event_id=event_id,
-            user=user,
-            status='PAID',
-            manually_confirmed=True,
-            payment_link=self.payment_link,  # Reference to the host's payment link
-            confirmation_notes=validated_data.get('confirmation_notes', '')
+        # Insert or upgrade the guest's payment in a single statement so
+        # concurrent confirmations (e.g. a double tap) cannot duplicate it
+        result = Payment.objects.confirm(
+            event_id=validated_data['event_id'],
+            user_id=user.pk,
+            confirmation_notes=validated_data.get('confirmation_notes') or ''
         )
         
-        return payment
+        if result is None:
+            raise serializers.ValidationError("You have already confirmed payment for this event")
+        
+        payment_id, _ = result
+        
+        # The upsert bypasses model signals, so record the transition here
+        PaidUserSet.record(self.event.pk, user.pk, 'PAID')
+        
+        return Payment.objects.select_related('event__created_by', 'user').get(pk=payment_id)
 
 class PaymentStatusUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer for hosts to update payment status
+
+    Clients may send the ``version`` they last read; the update is then
+    rejected if another request changed the payment in the meantime.
     """
+    version = serializers.IntegerField(required=False, min_value=1)
+    
     class Meta:
         model = Payment
-        fields = ('status', 'confirmation_notes')
+        fields = ('status', 'confirmation_notes', 'version')
+    
+    def update(self, instance, validated_data):
+        expected_version = validated_data.pop('version', instance.version)
+        
+        # Compare-and-swap on the version column
+        updated = Payment.objects.filter(
+            pk=instance.pk,
+            version=expected_version
+        ).update(
+            version=F('version') + 1,
+            updated_at=timezone.now(),
+            **validated_data
+        )
+        
+        if not updated:
+            raise ConflictError("Payment was modified by another request, reload and try again")
+        
+        instance.refresh_from_db()
+        PaidUserSet.record(instance.event_id, instance.user_id, instance.status)
+        return instance
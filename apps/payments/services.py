@@ -0,0 +1,66 @@
+# apps/payments/services.py
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from .models import Payment
+from ..core.cache import shared_timeout
+
+class PaidUserSet:
+    """
+    Cached payment status of each (event, user) pair
+
+    Each pair is its own cache key, so no read-modify-write of a shared
+    structure can lose a concurrent update. Guests with no payment are
+    cached as ``NOT_STARTED``, so unpaid guests cost no query either.
+    Lookups only ``add`` what they read from the database, and payment
+    transitions ``set`` the new state once their transaction commits, so
+    neither a rollback nor a slow lookup can leave a stale answer behind.
+    """
+    CACHE_KEY = 'payments:status:{event_id}:{user_id}'
+    NOT_STARTED = 'NOT_STARTED'
+
+    @classmethod
+    def _key(cls, event_id, user_id):
+        user_hex = user_id.hex if hasattr(user_id, 'hex') else str(user_id).replace('-', '')
+        return cls.CACHE_KEY.format(event_id=event_id, user_id=user_hex)
+
+    @staticmethod
+    def _timeout():
+        return shared_timeout(getattr(settings, 'PAID_USER_SET_TIMEOUT', 60 * 10))
+
+    @classmethod
+    def status(cls, event_id, user_id):
+        """
+        Get a user's payment status for an event (``NOT_STARTED`` without a payment)
+        """
+        key = cls._key(event_id, user_id)
+        status = cache.get(key)
+        if status is None:
+            status = Payment.objects.filter(
+                event_id=event_id,
+                user_id=user_id
+            ).values_list('status', flat=True).first() or cls.NOT_STARTED
+            # add, not set: a transition recorded meanwhile wins
+            cache.add(key, status, cls._timeout())
+        return status
+
+    @classmethod
+    def has_paid(cls, event_id, user_id):
+        """
+        Check whether a user has paid for an event
+        """
+        return cls.status(event_id, user_id) == 'PAID'
+
+    @classmethod
+    def record(cls, event_id, user_id, status):
+        """
+        Cache a payment's new status (None once deleted) once the current
+        transaction commits
+        """
+        key = cls._key(event_id, user_id)
+        status = status or cls.NOT_STARTED
+        transaction.on_commit(lambda: cache.set(key, status, cls._timeout()))
+
+    @classmethod
+    def invalidate(cls, event_id, user_id):
+        cache.delete(cls._key(event_id, user_id))
@@ -0,0 +1,19 @@
+# apps/payments/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Payment
+from .services import PaidUserSet
+
+@receiver(post_save, sender=Payment)
+def handle_payment_save(sender, instance, **kwargs):
+    """
+    Keep the cached paid-user set in step with saved payments
+    """
+    PaidUserSet.record(instance.event_id, instance.user_id, instance.status)
+
+@receiver(post_delete, sender=Payment)
+def handle_payment_delete(sender, instance, **kwargs):
+    """
+    Drop deleted payments from the cached paid-user set
+    """
+    PaidUserSet.record(instance.event_id, instance.user_id, None)
@@ -0,0 +1,140 @@
+from rest_framework.test import APITestCase
+from rest_framework import status
+from apps.users.models import User
+from apps.events.models import Event
+from apps.payments.models import Payment, EventPaymentLink, PaymentDailyRollup
+from apps.payments.tasks import rollup_payments
+import datetime
+from decimal import Decimal
+from django.utils import timezone
+
+class HostAnalyticsTests(APITestCase):
+    """
+    Test cases for the payment rollup job and host analytics endpoint
+    """
+    def setUp(self):
+        self.host_user = User.objects.create_user(
+            username='host@example.com',
+            email='host@example.com',
+            name='Host User',
+            password='hostpass123',
+            role='HOST'
+        )
+
+        self.guest_user = User.objects.create_user(
+            username='guest@example.com',
+            email='guest@example.com',
+            name='Guest User',
+            password='guestpass123',
+            role='GUEST'
+        )
+
+        self.another_user = User.objects.create_user(
+            username='another@example.com',
+            email='another@example.com',
+            name='Another User',
+            password='anotherpass123',
+            role='GUEST'
+        )
+
+        self.event = Event.objects.create(
+            title='Test Event With Payment',
+            description='This event requires payment',
+            date=timezone.now() + datetime.timedelta(days=7),
+            location='Test Location',
+            privacy='PUBLIC',
+            created_by=self.host_user
+        )
+
+        EventPaymentLink.objects.create(
+            event=self.event,
+            url='https://upi.example.com/pay/host123',
+            amount=500.00,
+            description='Event contribution'
+        )
+
+        self.paid = Payment.objects.create(
+            event=self.event,
+            user=self.guest_user,
+            status='PAID',
+            manually_confirmed=True
+        )
+
+        self.pending = Payment.objects.create(
+            event=self.event,
+            user=self.another_user,
+            status='PENDING'
+        )
+
+    def test_rollup_uses_link_amount(self):
+        """
+        Test that guest payments are rolled up with the link amount as fallback
+        """
+        rollup_payments()
+
+        buckets = {r.status: r for r in PaymentDailyRollup.objects.filter(event=self.event)}
+        self.assertEqual(set(buckets), {'PAID', 'PENDING'})
+        self.assertEqual(buckets['PAID'].count, 1)
+        self.assertEqual(buckets['PAID'].amount_total, Decimal('500.00'))
+        self.assertEqual(buckets['PAID'].host, self.host_user)
+
+    def test_incremental_rollup_moves_changed_rows(self):
+        """
+        Test that a status change is reflected after the next incremental run
+        """
+        rollup_payments()
+
+        self.pending.status = 'PAID'
+        self.pending.save()
+        rollup_payments()
+
+        buckets = {r.status: r.count for r in PaymentDailyRollup.objects.filter(event=self.event)}
+        self.assertEqual(buckets, {'PAID': 2})
+
+    def test_host_analytics_endpoint(self):
+        """
+        Test that the endpoint answers from the rollups
+        """
+        rollup_payments()
+
+        url = '/api/payments/host-analytics/'
+        self.client.force_authenticate(user=self.host_user)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['totals']['PAID']['count'], 1)
+        self.assertEqual(response.data['totals']['PENDING']['count'], 1)
+        self.assertEqual(len(response.data['timeline']), 2)
+
+    def test_host_analytics_only_shows_own_events(self):
+        """
+        Test that other users see no rollups for the host's events
+        """
+        rollup_payments()
+
+        url = '/api/payments/host-analytics/'
+        self.client.force_authenticate(user=self.guest_user)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['timeline'], [])
+
+    def test_host_analytics_invalid_range(self):
+        """
+        Test that an inverted date range is rejected
+        """
+        url = '/api/payments/host-analytics/?start=2025-02-01&end=2025-01-01'
+        self.client.force_authenticate(user=self.host_user)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_host_analytics_invalid_event_id(self):
+        """
+        Test that a malformed event_id is rejected
+        """
+        url = '/api/payments/host-analytics/?event_id=not-a-uuid'
+        self.client.force_authenticate(user=self.host_user)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,105 @@
+from django.db import transaction
+from django.test import TestCase
+from rest_framework.test import APIClient
+from django.utils import timezone
+import datetime
+from apps.users.models import User
+from apps.events.models import Event
+from apps.rsvp.models import RSVP
+from apps.payments.models import Payment, EventPaymentLink
+from apps.payments.services import PaidUserSet
+
+class PaidUserSetTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(
+            username='host@example.com',
+            email='host@example.com',
+            name='Host User',
+            password='hostpass123',
+            role='HOST'
+        )
+        
+        self.guest = User.objects.create_user(
+            username='guest@example.com',
+            email='guest@example.com',
+            name='Guest User',
+            password='guestpass123',
+            role='GUEST'
+        )
+        
+        self.event = Event.objects.create(
+            title='Paid Event',
+            description='This event requires payment',
+            date=timezone.now() + datetime.timedelta(days=3),
+            location='Test Location',
+            privacy='PUBLIC',
+            created_by=self.host
+        )
+        
+        self.rsvp = RSVP.objects.create(event=self.event, user=self.guest, status='YES')
+    
+    def test_membership_is_built_once(self):
+        Payment.objects.create(event=self.event, user=self.guest, status='PAID')
+        
+        with self.assertNumQueries(2):
+            self.assertTrue(PaidUserSet.has_paid(self.event.id, self.guest.id))
+            self.assertFalse(PaidUserSet.has_paid(self.event.id, self.host.id))
+        
+        with self.assertNumQueries(0):
+            self.assertTrue(self.rsvp.has_paid)
+            self.assertEqual(self.rsvp.payment_status, 'PAID')
+    
+    def test_unpaid_statuses_are_cached(self):
+        other = RSVP.objects.create(event=self.event, user=self.host, status='YES')
+        Payment.objects.create(event=self.event, user=self.guest, status='PENDING')
+        
+        with self.assertNumQueries(2):
+            self.assertEqual(self.rsvp.payment_status, 'PENDING')
+            self.assertEqual(other.payment_status, 'NOT_STARTED')
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(self.rsvp.payment_status, 'PENDING')
+            self.assertEqual(other.payment_status, 'NOT_STARTED')
+            self.assertFalse(other.has_paid)
+    
+    def test_transitions_update_the_cached_set(self):
+        payment = Payment.objects.create(event=self.event, user=self.guest, status='PENDING')
+        self.assertFalse(PaidUserSet.has_paid(self.event.id, self.guest.id))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.status = 'PAID'
+            payment.save()
+        with self.assertNumQueries(0):
+            self.assertTrue(PaidUserSet.has_paid(self.event.id, self.guest.id))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.delete()
+        with self.assertNumQueries(0):
+            self.assertFalse(PaidUserSet.has_paid(self.event.id, self.guest.id))
+    
+    def test_upsert_confirmation_updates_the_cached_set(self):
+        self.assertFalse(PaidUserSet.has_paid(self.event.id, self.guest.id))
+        EventPaymentLink.objects.create(event=self.event, url='https://upi.example.com/pay')
+        
+        client = APIClient()
+        client.force_authenticate(user=self.guest)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/api/payments/confirm/', {'event_id': str(self.event.id)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        
+        with self.assertNumQueries(0):
+            self.assertTrue(PaidUserSet.has_paid(self.event.id, self.guest.id))
+    
+    def test_rolled_back_transitions_are_not_cached(self):
+        payment = Payment.objects.create(event=self.event, user=self.guest, status='PENDING')
+        self.assertFalse(PaidUserSet.has_paid(self.event.id, self.guest.id))
+        
+        try:
+            with transaction.atomic():
+                payment.status = 'PAID'
+                payment.save()
+                raise RuntimeError('Payment provider rejected the charge')
+        except RuntimeError:
+            pass
+        
+        self.assertFalse(PaidUserSet.has_paid(self.event.id, self.guest.id))
@@ -1,9 +1,12 @@
+import threading
+from django.db import connection
+from django.test import TransactionTestCase
 from django.urls import reverse
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
 from apps.users.models import User
 from apps.events.models import Event
-from apps.payments.models import Payment
+from apps.payments.models import Payment, EventPaymentLink
 import datetime
 import uuid
 from django.utils import timezone
@@ -58,10 +61,9 @@ class PaymentViewSetTests(APITestCase):
         )
         
         # Create sample payment link
-        self.payment_link = Payment.objects.create(
+        self.payment_link = EventPaymentLink.objects.create(
             event=self.event,
-            user=self.host_user,
-            payment_link='https://upi.example.com/pay/host123',
+            url='https://upi.example.com/pay/host123',
             amount=500.00,
             description='Event contribution'
         )
@@ -87,9 +89,9 @@ class PaymentViewSetTests(APITestCase):
         self.assertEqual(response.data['payment']['amount'], '750.00')
         
         # Verify in database
-        payment_exists = Payment.objects.filter(
+        payment_exists = EventPaymentLink.objects.filter(
             event=self.private_event,
-            payment_link='https://paytm.example.com/pay/host456'
+            url='https://paytm.example.com/pay/host456'
         ).exists()
         self.assertTrue(payment_exists)
     
@@ -110,10 +112,10 @@ class PaymentViewSetTests(APITestCase):
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         
-        # Verify no payment was created
-        invalid_payment = Payment.objects.filter(
+        # Verify no payment link was created
+        invalid_payment = EventPaymentLink.objects.filter(
             event=self.event,
-            payment_link='https://upi.example.com/pay/guest123'
+            url='https://upi.example.com/pay/guest123'
         ).exists()
         self.assertFalse(invalid_payment)
     
@@ -281,10 +283,9 @@ class PaymentViewSetTests(APITestCase):
         Test an unauthorized user accessing payment status for a private event
         """
         # Create payment link for private event
-        Payment.objects.create(
+        EventPaymentLink.objects.create(
             event=self.private_event,
-            user=self.host_user,
-            payment_link='https://upi.example.com/private',
+            url='https://upi.example.com/private',
             amount=1000.00
         )
         
@@ -378,8 +379,8 @@ class PaymentViewSetTests(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         
-        # Host should see all payments (their own payment link + guest payments)
-        self.assertGreaterEqual(len(response.data['results']), 3)
+        # Host should see all guest payments; the payment link is not a payment
+        self.assertEqual(len(response.data['results']), 2)
     
     def test_list_payments_for_guest(self):
         """
@@ -418,4 +419,229 @@ class PaymentViewSetTests(APITestCase):
         
         # Verify all payments belong to the guest
         for payment in response.data['results']:
-            self.assertEqual(payment['user']['email'], 'guest@example.com')
\ No newline at end of file
+            self.assertEqual(payment['user']['email'], 'guest@example.com')
+    
+    def test_confirm_payment_already_paid(self):
+        """
+        Test that a repeated confirmation is rejected without duplicating the row
+        """
+        url = '/api/payments/confirm/'
+        self.client.force_authenticate(user=self.guest_user)
+        
+        data = {
+            'event_id': str(self.event.id),
+            'status': 'PAID',
+            'confirmation_notes': 'Paid via UPI'
+        }
+        
+        first = self.client.post(url, data, format='json')
+        second = self.client.post(url, data, format='json')
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        self.assertEqual(Payment.objects.filter(event=self.event, user=self.guest_user).count(), 1)
+    
+    def test_confirm_upsert_bumps_version(self):
+        """
+        Test that confirming a pending payment updates it in place
+        """
+        pending = Payment.objects.create(
+            event=self.event,
+            user=self.guest_user,
+            status='PENDING'
+        )
+        
+        payment_id, created = Payment.objects.confirm(self.event.id, self.guest_user.id, 'Paid')
+        self.assertEqual(payment_id, pending.id)
+        self.assertFalse(created)
+        
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'PAID')
+        self.assertEqual(pending.version, 2)
+        
+        # Already paid - nothing to do
+        self.assertIsNone(Payment.objects.confirm(self.event.id, self.guest_user.id, 'Again'))
+    
+    def test_update_payment_status_with_stale_version(self):
+        """
+        Test that a host update based on a stale version is rejected
+        """
+        payment = Payment.objects.create(
+            event=self.event,
+            user=self.guest_user,
+            status='PENDING',
+            version=3
+        )
+        
+        url = f'/api/payments/{payment.id}/update-status/'
+        self.client.force_authenticate(user=self.host_user)
+        
+        response = self.client.patch(url, {'status': 'PAID', 'version': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'PENDING')
+        
+        response = self.client.patch(url, {'status': 'PAID', 'version': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['payment']['version'], 4)
+    
+    def test_generic_update_bumps_version(self):
+        """
+        Test that saves outside the update-status path also invalidate older versions
+        """
+        payment = Payment.objects.create(
+            event=self.event,
+            user=self.guest_user,
+            status='PENDING'
+        )
+        
+        payment.confirmation_notes = 'Checked by hand'
+        payment.save(update_fields=['confirmation_notes'])
+        self.assertEqual(payment.version, 2)
+        
+        url = f'/api/payments/{payment.id}/update-status/'
+        self.client.force_authenticate(user=self.host_user)
+        response = self.client.patch(url, {'status': 'PAID', 'version': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+class PaymentConcurrencyTests(TransactionTestCase):
+    """
+    Concurrent host updates against the same payment version
+    """
+    def setUp(self):
+        self.host_user = User.objects.create_user(
+            username='host@example.com',
+            email='host@example.com',
+            name='Host User',
+            password='hostpass123',
+            role='HOST'
+        )
+        
+        self.guest_user = User.objects.create_user(
+            username='guest@example.com',
+            email='guest@example.com',
+            name='Guest User',
+            password='guestpass123',
+            role='GUEST'
+        )
+        
+        self.event = Event.objects.create(
+            title='Test Event With Payment',
+            description='This event requires payment',
+            date=timezone.now() + datetime.timedelta(days=7),
+            location='Test Location',
+            privacy='PUBLIC',
+            created_by=self.host_user
+        )
+        
+        self.payment = Payment.objects.create(
+            event=self.event,
+            user=self.guest_user,
+            status='PENDING'
+        )
+        
+        EventPaymentLink.objects.create(
+            event=self.event,
+            url='https://upi.example.com/pay/host123',
+            amount=500.00,
+            description='Event contribution'
+        )
+    
+    def confirm_concurrently(self, user, workers=8):
+        """
+        Send ``workers`` payment confirmations for ``user`` at once; returns
+        the response status codes
+        """
+        barrier = threading.Barrier(workers)
+        results = []
+        
+        def confirm(index):
+            client = APIClient()
+            client.force_authenticate(user=user)
+            barrier.wait()
+            try:
+                response = client.post(
+                    '/api/payments/confirm/',
+                    {'event_id': str(self.event.id), 'confirmation_notes': f'Tap {index}'},
+                    format='json'
+                )
+                results.append(response.status_code)
+            finally:
+                connection.close()
+        
+        threads = [threading.Thread(target=confirm, args=(index,)) for index in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+    
+    def test_racing_confirmations_insert_one_payment(self):
+        """
+        Test that concurrent first confirmations create exactly one paid row
+        """
+        guest = User.objects.create_user(
+            username='newguest@example.com',
+            email='newguest@example.com',
+            name='New Guest',
+            password='guestpass123',
+            role='GUEST'
+        )
+        
+        results = self.confirm_concurrently(guest)
+        self.assertEqual(results.count(status.HTTP_200_OK), 1)
+        self.assertEqual(results.count(status.HTTP_400_BAD_REQUEST), len(results) - 1, results)
+        
+        payment = Payment.objects.get(event=self.event, user=guest)
+        self.assertEqual(payment.status, 'PAID')
+        self.assertEqual(payment.version, 1)
+    
+    def test_racing_confirmations_upgrade_the_payment_once(self):
+        """
+        Test that concurrent confirmations of a pending payment bump its version once
+        """
+        results = self.confirm_concurrently(self.guest_user)
+        self.assertEqual(results.count(status.HTTP_200_OK), 1)
+        self.assertEqual(results.count(status.HTTP_400_BAD_REQUEST), len(results) - 1, results)
+        
+        payments = Payment.objects.filter(event=self.event, user=self.guest_user)
+        self.assertEqual(payments.count(), 1)
+        self.assertEqual(payments.get().status, 'PAID')
+        self.assertEqual(payments.get().version, 2)
+    
+    def test_only_one_of_racing_updates_wins(self):
+        """
+        Test that of many updates sent with the same version exactly one applies
+        """
+        url = f'/api/payments/{self.payment.id}/update-status/'
+        workers = 8
+        barrier = threading.Barrier(workers)
+        results = []
+        
+        def update(index):
+            client = APIClient()
+            client.force_authenticate(user=self.host_user)
+            barrier.wait()
+            try:
+                response = client.patch(
+                    url,
+                    {'status': 'PAID', 'confirmation_notes': f'Worker {index}', 'version': 1},
+                    format='json'
+                )
+                results.append(response.status_code)
+            finally:
+                connection.close()
+        
+        threads = [threading.Thread(target=update, args=(index,)) for index in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(results.count(status.HTTP_200_OK), 1)
+        self.assertEqual(results.count(status.HTTP_409_CONFLICT), workers - 1)
+        
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.version, 2)
+        self.assertEqual(self.payment.status, 'PAID')
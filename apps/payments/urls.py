@@ -12,6 +12,7 @@ urlpatterns = [
     path('add-link/', PaymentViewSet.as_view({'post': 'add_payment_link'}), name='add-payment-link'),
     path('confirm/', PaymentViewSet.as_view({'post': 'confirm_payment'}), name='confirm-payment'),
     path('event-status/', PaymentViewSet.as_view({'get': 'event_status'}), name='event-payment-status'),
+    path('host-analytics/', PaymentViewSet.as_view({'get': 'host_analytics'}), name='host-payment-analytics'),
 
     # Explicitly define the update_status endpoint with consistent naming
     path('<uuid:pk>/update-status/', PaymentViewSet.as_view({'patch': 'update_status'}), name='update-payment-status'),
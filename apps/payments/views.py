@@ -2,7 +2,13 @@ from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Payment
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+import datetime
+import uuid
+from .models import Payment, PaymentDailyRollup
+from .services import PaidUserSet
 from .serializers import (
     PaymentSerializer, 
     PaymentLinkSerializer, 
@@ -81,12 +87,12 @@ class PaymentViewSet(viewsets.ModelViewSet):
         """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        payment = serializer.save()
+        serializer.save()
         
         return Response({
             'status': 'success',
             'message': 'Payment link added successfully',
-            'payment': PaymentSerializer(payment, context={'request': request}).data
+            'payment': serializer.data
         }, status=status.HTTP_201_CREATED)
     
     @action(detail=False, methods=['post'])
@@ -140,9 +146,9 @@ class PaymentViewSet(viewsets.ModelViewSet):
                 'message': 'event_id is required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Try to get the event
+        # Try to get the event along with its payment link
         try:
-            event = Event.objects.get(pk=event_id)
+            event = Event.objects.select_related('payment_link').get(pk=event_id)
         except Event.DoesNotExist:
             return Response({
                 'status': 'error',
@@ -159,11 +165,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
                 }, status=status.HTTP_403_FORBIDDEN)
         
         # Get payment status
-        payment_link = Payment.objects.filter(
-            event=event, 
-            user=event.created_by,
-            payment_link__isnull=False
-        ).first()
+        payment_info = event.payment_info
         
         confirmed_payments = Payment.objects.filter(
             event=event,
@@ -179,23 +181,80 @@ class PaymentViewSet(viewsets.ModelViewSet):
         # Check if the current user has paid
         user_paid = False
         if request.user.is_authenticated:
-            user_paid = Payment.objects.filter(
-                event=event,
-                user=request.user,
-                status='PAID'
-            ).exists()
+            user_paid = PaidUserSet.has_paid(event.pk, request.user.pk)
         
         return Response({
             'status': 'success',
             'event_id': str(event_id),
-            'has_payment_link': payment_link is not None,
-            'payment_link': payment_link.payment_link if payment_link else None,
-            'amount': payment_link.amount if payment_link else None,
+            'has_payment_link': payment_info is not None,
+            'payment_link': payment_info['payment_link'] if payment_info else None,
+            'amount': payment_info['amount'] if payment_info else None,
             'confirmed_payments': confirmed_payments,
             'pending_payments': pending_payments,
             'user_has_paid': user_paid
         })
 
+    @action(detail=False, methods=['get'])
+    def host_analytics(self, request):
+        """
+        Get a daily revenue and confirmation timeline across the host's events
+
+        Answered entirely from the daily rollups (refreshed by the
+        ``rollup_payments`` command), never from the raw payments table.
+        """
+        today = timezone.now().date()
+        start = request.query_params.get('start')
+        end = request.query_params.get('end')
+        
+        try:
+            end_date = parse_date(end) if end else today
+            start_date = parse_date(start) if start else end_date - datetime.timedelta(days=30)
+        except ValueError:
+            start_date = end_date = None
+        
+        if start_date is None or end_date is None or start_date > end_date:
+            return Response({
+                'status': 'error',
+                'message': 'start and end must be valid dates (YYYY-MM-DD) with start <= end'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        rollups = PaymentDailyRollup.objects.filter(
+            host=request.user,
+            day__gte=start_date,
+            day__lte=end_date
+        )
+        
+        event_id = request.query_params.get('event_id', None)
+        if event_id is not None:
+            try:
+                event_id = uuid.UUID(event_id)
+            except ValueError:
+                return Response({
+                    'status': 'error',
+                    'message': 'event_id must be a valid UUID'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            rollups = rollups.filter(event_id=event_id)
+        
+        timeline = list(rollups.values('day', 'status').annotate(
+            count=Sum('count'),
+            amount=Sum('amount_total')
+        ).order_by('day', 'status'))
+        
+        # Totals are derived from the timeline to avoid a second query
+        totals = {}
+        for row in timeline:
+            bucket = totals.setdefault(row['status'], {'count': 0, 'amount': 0})
+            bucket['count'] += row['count']
+            bucket['amount'] += row['amount'] or 0
+        
+        return Response({
+            'status': 'success',
+            'start': start_date,
+            'end': end_date,
+            'totals': totals,
+            'timeline': timeline
+        })
+
 # Add this to the bottom of the file
 
 from rest_framework.decorators import api_view, permission_classes
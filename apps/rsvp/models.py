@@ -41,19 +41,17 @@ class RSVP(models.Model):
     @property
     def payment_status(self):
         """Get the payment status for this RSVP"""
-        from apps.payments.models import Payment
+        # List views annotate the status to avoid a query per row
+        if hasattr(self, 'payment_state'):
+            return self.payment_state or "NOT_STARTED"
         
-        payment = Payment.objects.filter(
-            event=self.event,
-            user=self.user
-        ).first()
+        from apps.payments.services import PaidUserSet
         
-        if not payment:
-            return "NOT_STARTED"
-        
-        return payment.status
+        return PaidUserSet.status(self.event_id, self.user_id)
     
     @property
     def has_paid(self):
         """Check if this RSVP has been paid"""
-        return self.payment_status == "PAID"
+        from apps.payments.services import PaidUserSet
+        
+        return PaidUserSet.has_paid(self.event_id, self.user_id)
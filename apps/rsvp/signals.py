@@ -1,41 +1,69 @@
 # apps/rsvp/signals.py
+from django.db import transaction
 from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from .models import RSVP
-from apps.notifications.services import NotificationService
+
+def _queue_notification_jobs(jobs):
+    """
+    Write outbox rows for the notification worker once the RSVP is committed
+    """
+    from apps.notifications.models import NotificationJob
+    
+    transaction.on_commit(lambda: NotificationJob.objects.bulk_create([
+        NotificationJob(kind=kind, payload=payload) for kind, payload in jobs
+    ]))
 
 @receiver(post_save, sender=RSVP)
 def handle_rsvp_save(sender, instance, created, **kwargs):
     """
     Signal handler for RSVP creation and updates
+    
+    Notifications are not rendered here: compact outbox rows are queued
+    and the ``process_notification_jobs`` worker creates them in batches.
     """
+    rsvp_id = str(instance.pk)
+    jobs = []
+    
     if created:
         # New RSVP created - send notification
-        NotificationService.notify_rsvp_created(instance)
+        jobs.append(('RSVP_CREATED', {'rsvp_id': rsvp_id, 'status': instance.status}))
     else:
-        # Updated RSVP - check what changed
-        # This is handled through the pre_save signal below
-        pass
+        # Updated RSVP - the changes were captured by the pre_save signal below
+        changes = getattr(instance, '_notification_changes', {})
+        
+        if 'status' in changes:
+            jobs.append(('RSVP_UPDATED', {'rsvp_id': rsvp_id, 'status': instance.status}))
+        
+        if 'is_approved' in changes:
+            jobs.append(('RSVP_APPROVAL', {'rsvp_id': rsvp_id, 'is_approved': instance.is_approved}))
+    
+    instance._notification_changes = {}
+    if jobs:
+        _queue_notification_jobs(jobs)
 
 @receiver(pre_save, sender=RSVP)
 def handle_rsvp_pre_save(sender, instance, **kwargs):
     """
     Signal handler to track changes before saving
     """
-    if instance.pk:  # If this is an update
-        try:
-            old_instance = RSVP.objects.get(pk=instance.pk)
-            
-            # Check if status changed
-            if old_instance.status != instance.status:
-                # Status was updated
-                NotificationService.notify_rsvp_updated(instance)
-            
-            # Check if approval status changed
-            if old_instance.is_approved != instance.is_approved:
-                # Approval status changed
-                NotificationService.notify_rsvp_approval(instance, instance.is_approved)
-                
-        except RSVP.DoesNotExist:
-            # This should not happen, but we'll handle it just in case
-            pass
\ No newline at end of file
+    instance._notification_changes = {}
+    
+    if instance._state.adding:
+        return
+    
+    # Only the two fields we notify about are read back
+    old_values = RSVP.objects.filter(pk=instance.pk).values_list('status', 'is_approved').first()
+    if old_values is None:
+        # This should not happen, but we'll handle it just in case
+        return
+    
+    old_status, old_is_approved = old_values
+    
+    # Check if status changed
+    if old_status != instance.status:
+        instance._notification_changes['status'] = old_status
+    
+    # Check if approval status changed
+    if old_is_approved != instance.is_approved:
+        instance._notification_changes['is_approved'] = old_is_approved
@@ -4,6 +4,7 @@ from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import OuterRef, Subquery
 from .models import RSVP
 from .serializers import (
     RSVPSerializer, 
@@ -13,6 +14,7 @@ from .serializers import (
     GuestListSerializer
 )
 from apps.events.models import Event
+from apps.payments.models import Payment
 from ..core.permissions import IsOwnerOrReadOnly, IsEventHost
 
 class RSVPViewSet(viewsets.ModelViewSet):
@@ -72,7 +74,15 @@ class RSVPViewSet(viewsets.ModelViewSet):
                 event_id__in=user_events
             )
         
-        return queryset
+        # Load related rows and the payment status up front instead of per row
+        payment_state = Payment.objects.filter(
+            event=OuterRef('event'),
+            user=OuterRef('user')
+        ).values('status')[:1]
+        
+        return queryset.select_related('event__created_by', 'user').annotate(
+            payment_state=Subquery(payment_state)
+        )
     
     def create(self, request, *args, **kwargs):
         """
@@ -147,7 +157,7 @@ class GuestListViewSet(viewsets.ReadOnlyModelViewSet):
         # 3. For public/semi-private events, all authenticated users can see the guest list
         if event.created_by == self.request.user:
             # Host can see all RSVPs
-            return RSVP.objects.filter(event=event)
+            return RSVP.objects.filter(event=event).select_related('user')
         elif event.privacy == 'PRIVATE':
             # For private events, check if the user is an approved guest
             is_approved_guest = RSVP.objects.filter(
@@ -160,7 +170,7 @@ class GuestListViewSet(viewsets.ReadOnlyModelViewSet):
                 return RSVP.objects.none()
         
         # Return all approved RSVPs for the event
-        return RSVP.objects.filter(event=event, is_approved=True)
+        return RSVP.objects.filter(event=event, is_approved=True).select_related('user')
     
     @action(detail=False, methods=['get'])
     def export(self, request, event_id=None):
@@ -184,7 +194,7 @@ class GuestListViewSet(viewsets.ReadOnlyModelViewSet):
             }, status=status.HTTP_403_FORBIDDEN)
         
         # Get all RSVPs for the event
-        queryset = RSVP.objects.filter(event=event)
+        queryset = RSVP.objects.filter(event=event).select_related('user')
         
         # Create CSV response
         response = HttpResponse(content_type='text/csv')
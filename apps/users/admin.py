@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User
+from .models import RevokedToken, User
 
 class CustomUserAdmin(UserAdmin):
     list_display = ('email', 'name', 'role', 'is_staff', 'date_joined')
@@ -22,4 +22,10 @@ class CustomUserAdmin(UserAdmin):
         }),
     )
 
-admin.site.register(User, CustomUserAdmin)
\ No newline at end of file
+admin.site.register(User, CustomUserAdmin)
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ('jti', 'user_id', 'revoked_at', 'expires_at')
+    search_fields = ('jti', 'user_id')
+    readonly_fields = ('revoked_at',)
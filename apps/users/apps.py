@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.users'
+    
+    def ready(self):
+        """
+        Connect signal handlers when the app is ready
+        """
+        # Import signal handlers
+        import apps.users.signals
@@ -0,0 +1,154 @@
+# apps/users/authentication.py
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from apps.core.cache import is_shared_cache
+
+class CachedUsers:
+    """
+    Two-level cache of authenticated users
+
+    A small process-local LRU answers most lookups without leaving the
+    process; with a shared cache configured (see ``is_shared_cache``),
+    misses fall through to it and then the database. ``invalidate`` clears
+    the shared entry and this process's copy; other processes drop theirs
+    when the short local timeout runs out.
+
+    Entries hold the user's fields except ``password``, plus the digest of
+    its hash that ``CHECK_REVOKE_TOKEN`` compares tokens against, so the
+    hash itself is never copied into the cache. The rebuilt users have
+    ``password`` deferred: reading it queries the database, and ``save()``
+    leaves it alone.
+    """
+    CACHE_KEY = 'auth:user:{user_id}'
+
+    _local = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def _key(cls, user_id):
+        return cls.CACHE_KEY.format(user_id=user_id)
+
+    @staticmethod
+    def _entry(user):
+        """
+        The cached projection of a user: ``(attnames, values, password_hash)``
+        """
+        fields = [field.attname for field in user._meta.concrete_fields if field.attname != 'password']
+        return tuple(fields), tuple(getattr(user, field) for field in fields), get_md5_hash_password(user.password)
+
+    @staticmethod
+    def _build(entry):
+        from django.contrib.auth import get_user_model
+
+        fields, values, password_hash = entry
+        return get_user_model().from_db(DEFAULT_DB_ALIAS, fields, values), password_hash
+
+    @classmethod
+    def get(cls, user_id):
+        """
+        Return ``(user, password_hash)`` for a cached user, or None; each
+        call builds a new instance for the request to modify
+        """
+        key = cls._key(user_id)
+        now = time.monotonic()
+        with cls._lock:
+            entry = cls._local.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    cls._local.move_to_end(key)
+                    return cls._build(entry[1])
+                del cls._local[key]
+
+        if not is_shared_cache():
+            return None
+        entry = cache.get(key)
+        if entry is not None:
+            cls._remember(key, entry, now)
+            return cls._build(entry)
+        return None
+
+    @classmethod
+    def set(cls, user):
+        key = cls._key(user.pk)
+        entry = cls._entry(user)
+        if is_shared_cache():
+            cache.set(key, entry, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 300))
+        cls._remember(key, entry, time.monotonic())
+
+    @classmethod
+    def _remember(cls, key, entry, now):
+        timeout = getattr(settings, 'AUTH_USER_LOCAL_CACHE_TIMEOUT', 5)
+        size = getattr(settings, 'AUTH_USER_LOCAL_CACHE_SIZE', 1024)
+        with cls._lock:
+            cls._local[key] = (now + timeout, entry)
+            cls._local.move_to_end(key)
+            while len(cls._local) > size:
+                cls._local.popitem(last=False)
+
+    @classmethod
+    def invalidate(cls, user_id):
+        key = cls._key(user_id)
+        with cls._lock:
+            cls._local.pop(key, None)
+        if is_shared_cache():
+            cache.delete(key)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves users through ``CachedUsers`` instead
+    of querying the users table on every request
+
+    Views (or viewset actions) that only need the user's id can set
+    ``claims_only_authentication = True`` to get a ``TokenUser`` built from
+    the token's claims, with no lookup at all.
+    """
+    def authenticate(self, request):
+        view = (getattr(request, 'parser_context', None) or {}).get('view')
+        if not getattr(view, 'claims_only_authentication', False):
+            return super().authenticate(request)
+
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        return api_settings.TOKEN_USER_CLASS(validated_token), validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        cached = CachedUsers.get(user_id)
+        if cached is None:
+            # Raises for unknown and inactive users, which are never cached
+            user = super().get_user(validated_token)
+            CachedUsers.set(user)
+            return user
+
+        user, password_hash = cached
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
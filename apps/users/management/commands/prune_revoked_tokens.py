@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from apps.users.revocation import RevokedTokens
+
+class Command(BaseCommand):
+    help = 'Delete revoked refresh tokens that have expired'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        """
+        Execute the command to prune revoked tokens
+        """
+        deleted = RevokedTokens.prune(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Successfully pruned {deleted} expired revoked tokens'))
@@ -42,4 +42,19 @@ class User(AbstractUser):
         db_table = 'users'
 
     def __str__(self):
-        return self.email
\ No newline at end of file
+        return self.email
+
+class RevokedToken(models.Model):
+    """
+    A refresh token that may no longer be used, kept until it expires
+    """
+    jti = models.CharField(max_length=255, primary_key=True)
+    user_id = models.UUIDField(null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = 'revoked_tokens'
+
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,186 @@
+# apps/users/revocation.py
+"""
+Revoked refresh tokens
+
+Rotated (or otherwise revoked) refresh tokens are stored by JTI in
+``RevokedToken`` until they expire. Each process keeps a Bloom filter of the
+stored JTIs, so checking a token that was never revoked - nearly every
+refresh - needs no query; only filter hits are confirmed in the database.
+
+The filter catches up with revocations made by other processes when the
+shared cache's version counter moves (at most once per
+``AUTH_REVOKED_TOKEN_SYNC_INTERVAL`` seconds), and is rebuilt from scratch
+when it fills up or gets old enough to be carrying mostly expired JTIs.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+from .models import RevokedToken
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter of strings: ``in`` may give false positives
+    (at about ``error_rate`` once ``capacity`` items are added) but never
+    false negatives
+    """
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(capacity, 1)
+        self.size = max(int(-self.capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(round(self.size / self.capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        # Double hashing: k positions from two 64-bit hashes
+        return [(first + index * second) % self.size for index in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevokedTokens:
+    """
+    Record and check revoked refresh tokens
+    """
+    VERSION_KEY = 'auth:revoked_tokens:version'
+    # Rows committed slightly out of revoked_at order are still picked up
+    SYNC_OVERLAP = timedelta(minutes=1)
+
+    _filter = None
+    _built_at = 0
+    _caught_up_at = 0
+    _synced_at = None
+    _version = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _current_version(cls):
+        return cache.get(cls.VERSION_KEY, 0)
+
+    @classmethod
+    def _rebuild(cls, version):
+        capacity = getattr(settings, 'AUTH_REVOKED_TOKEN_FILTER_CAPACITY', 100000)
+        error_rate = getattr(settings, 'AUTH_REVOKED_TOKEN_FILTER_ERROR_RATE', 0.001)
+        synced_at = timezone.now()
+        revoked = RevokedToken.objects.filter(expires_at__gt=synced_at)
+
+        bloom = BloomFilter(max(capacity, revoked.count() * 2), error_rate)
+        for jti in revoked.values_list('jti', flat=True).iterator(chunk_size=10000):
+            bloom.add(jti)
+
+        cls._filter = bloom
+        cls._built_at = cls._caught_up_at = time.monotonic()
+        cls._synced_at = synced_at
+        cls._version = version
+
+    @classmethod
+    def _catch_up(cls, version):
+        synced_at = timezone.now()
+        for jti in RevokedToken.objects.filter(
+            revoked_at__gte=cls._synced_at - cls.SYNC_OVERLAP
+        ).values_list('jti', flat=True).iterator():
+            cls._filter.add(jti)
+        cls._caught_up_at = time.monotonic()
+        cls._synced_at = synced_at
+        cls._version = version
+
+    @classmethod
+    def _sync(cls):
+        """
+        Bring this process's filter up to date; returns it
+        """
+        max_age = getattr(settings, 'AUTH_REVOKED_TOKEN_FILTER_MAX_AGE', 3600)
+        sync_interval = getattr(settings, 'AUTH_REVOKED_TOKEN_SYNC_INTERVAL', 1)
+        version = cls._current_version()
+        with cls._lock:
+            if (
+                cls._filter is None
+                or cls._filter.count > cls._filter.capacity
+                or time.monotonic() - cls._built_at > max_age
+            ):
+                cls._rebuild(version)
+            elif version != cls._version and time.monotonic() - cls._caught_up_at >= sync_interval:
+                cls._catch_up(version)
+            return cls._filter
+
+    @classmethod
+    def reset(cls):
+        """
+        Drop this process's filter; the next check rebuilds it
+        """
+        with cls._lock:
+            cls._filter = None
+
+    @classmethod
+    def is_revoked(cls, jti):
+        if jti not in cls._sync():
+            return False
+        # Possibly a false positive; the table has the final word
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    @classmethod
+    def revoke(cls, token):
+        """
+        Revoke a refresh token; returns False if it already was
+
+        The primary key makes this the authority on reuse: of two requests
+        racing to rotate the same token, only one insert succeeds.
+        """
+        jti = token[api_settings.JTI_CLAIM]
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(
+                    jti=jti,
+                    user_id=token.get(api_settings.USER_ID_CLAIM),
+                    expires_at=datetime_from_epoch(token['exp'])
+                )
+        except IntegrityError:
+            return False
+
+        version = cls._bump_version()
+        with cls._lock:
+            if cls._filter is not None:
+                cls._filter.add(jti)
+                if version == cls._version + 1:
+                    # Nobody else revoked anything meanwhile; still in sync
+                    cls._version = version
+        return True
+
+    @classmethod
+    def _bump_version(cls):
+        cache.add(cls.VERSION_KEY, 0, None)
+        try:
+            return cache.incr(cls.VERSION_KEY)
+        except ValueError:
+            # Evicted in between; any change makes other processes catch up
+            cache.set(cls.VERSION_KEY, 1, None)
+            return 1
+
+    @classmethod
+    def prune(cls, batch_size=1000):
+        """
+        Delete revocations of tokens that have expired anyway; returns the count
+        """
+        now = timezone.now()
+        deleted = 0
+        while True:
+            jtis = list(RevokedToken.objects.filter(expires_at__lte=now).values_list('jti', flat=True)[:batch_size])
+            if not jtis:
+                return deleted
+            deleted += RevokedToken.objects.filter(jti__in=jtis).delete()[0]
@@ -0,0 +1,16 @@
+# apps/users/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .authentication import CachedUsers
+from .models import User
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def handle_user_change(sender, instance, **kwargs):
+    """
+    Drop the cached copy of a saved, deactivated or deleted user
+    """
+    CachedUsers.invalidate(instance.pk)
+    # Again once committed, in case a request cached the old row meanwhile
+    transaction.on_commit(lambda: CachedUsers.invalidate(instance.pk))
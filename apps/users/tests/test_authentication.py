@@ -0,0 +1,74 @@
+# apps/users/tests/test_authentication.py
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.users.authentication import CachedUsers
+from apps.users.models import User
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser@example.com',
+            email='testuser@example.com',
+            name='Test User',
+            password='testpass123',
+            role='GUEST'
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def user_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [query['sql'] for query in queries if 'FROM "users"' in query['sql']]
+
+    def test_repeat_requests_skip_the_user_lookup(self):
+        url = reverse('notification-list')
+        self.assertEqual(len(self.user_queries(url)), 1)
+        self.assertEqual(self.user_queries(url), [])
+
+    def test_saving_the_user_invalidates_the_cache(self):
+        url = reverse('notification-list')
+        self.user_queries(url)
+
+        self.user.name = 'Renamed'
+        self.user.save()
+        self.assertEqual(len(self.user_queries(url)), 1)
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_claims_only_endpoint_never_loads_the_user(self):
+        self.assertEqual(self.user_queries(reverse('notification-unread-count')), [])
+
+    def test_cached_users_leave_the_password_out(self):
+        self.user_queries(reverse('notification-list'))
+
+        user, password_hash = CachedUsers.get(self.user.id)
+        self.assertIn('password', user.get_deferred_fields())
+        self.assertNotEqual(password_hash, self.user.password)
+
+        # Saving the rebuilt user must not blank the password
+        user.name = 'Renamed'
+        user.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'Renamed')
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    def test_local_cache_only_without_a_shared_cache(self):
+        self.user_queries(reverse('notification-list'))
+        self.assertIsNone(cache.get(CachedUsers._key(self.user.id)))
+
+        with mock.patch('apps.users.authentication.is_shared_cache', return_value=True):
+            CachedUsers.set(self.user)
+            entry = cache.get(CachedUsers._key(self.user.id))
+        self.assertNotIn(self.user.password, entry[1])
+        self.assertNotIn('password', entry[0])
@@ -0,0 +1,78 @@
+# apps/users/tests/test_revocation.py
+import datetime
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.users.models import RevokedToken, User
+from apps.users.revocation import BloomFilter, RevokedTokens
+
+class TokenRotationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser@example.com',
+            email='testuser@example.com',
+            name='Test User',
+            password='testpass123',
+            role='GUEST'
+        )
+        RevokedTokens.reset()
+
+    def refresh(self, token):
+        return self.client.post(reverse('token-refresh'), {'refresh_token': str(token)}, format='json')
+
+    def test_rotated_token_cannot_be_reused(self):
+        token = RefreshToken.for_user(self.user)
+
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rotated = response.data['tokens']['refresh']
+        self.assertNotEqual(rotated, str(token))
+        self.assertTrue(RevokedToken.objects.filter(jti=token['jti'], user_id=self.user.id).exists())
+
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data['message'], 'Refresh token has already been used')
+
+        self.assertEqual(self.refresh(rotated).status_code, status.HTTP_200_OK)
+
+    def test_unrevoked_tokens_are_checked_without_a_query(self):
+        self.assertEqual(self.refresh(RefreshToken.for_user(self.user)).status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(RevokedTokens.is_revoked(RefreshToken.for_user(self.user)['jti']))
+
+    @override_settings(AUTH_REVOKED_TOKEN_SYNC_INTERVAL=0)
+    def test_revocations_from_other_processes_are_picked_up(self):
+        token = RefreshToken.for_user(self.user)
+        self.assertFalse(RevokedTokens.is_revoked(token['jti']))
+
+        # As another worker would: insert the row, then bump the shared version
+        RevokedToken.objects.create(jti=token['jti'], expires_at=timezone.now() + datetime.timedelta(days=1))
+        RevokedTokens._bump_version()
+
+        self.assertEqual(self.refresh(token).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class RevokedTokenStoreTests(TestCase):
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        items = [f'jti-{index}' for index in range(1000)]
+        for item in items:
+            bloom.add(item)
+
+        self.assertTrue(all(item in bloom for item in items))
+        false_positives = sum(f'other-{index}' in bloom for index in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_prune_deletes_expired_revocations(self):
+        now = timezone.now()
+        RevokedToken.objects.create(jti='expired', expires_at=now - datetime.timedelta(minutes=1))
+        RevokedToken.objects.create(jti='live', expires_at=now + datetime.timedelta(days=1))
+
+        call_command('prune_revoked_tokens', batch_size=1, stdout=StringIO())
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['live'])
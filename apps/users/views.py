@@ -1,9 +1,12 @@
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
+from .authentication import CachedUsers
 from .models import User
+from .revocation import RevokedTokens
 from .serializers import (
     UserSerializer, 
     UserDetailSerializer,
@@ -127,6 +130,10 @@ class SocialLoginView(APIView):
 class TokenRefreshView(APIView):
     """
     API endpoint for refreshing JWT token
+
+    With ``ROTATE_REFRESH_TOKENS`` each refresh token is exchanged for a new
+    one, and with ``BLACKLIST_AFTER_ROTATION`` the old one is revoked, so
+    presenting it again is rejected as reuse.
     """
     permission_classes = [permissions.AllowAny]
     serializer_class = TokenRefreshSerializer
@@ -138,6 +145,17 @@ class TokenRefreshView(APIView):
                 refresh_token = serializer.validated_data['refresh_token']
                 token = RefreshToken(refresh_token)
                 
+                if RevokedTokens.is_revoked(token[api_settings.JTI_CLAIM]):
+                    return self.reused()
+                
+                if api_settings.ROTATE_REFRESH_TOKENS:
+                    if api_settings.BLACKLIST_AFTER_ROTATION and not RevokedTokens.revoke(token):
+                        # Another request rotated this token first
+                        return self.reused()
+                    token.set_jti()
+                    token.set_exp()
+                    token.set_iat()
+                
                 return Response({
                     'status': 'success',
                     'tokens': {
@@ -153,6 +171,12 @@ class TokenRefreshView(APIView):
                 }, status=status.HTTP_401_UNAUTHORIZED)
                 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    def reused(self):
+        return Response({
+            'status': 'error',
+            'message': 'Refresh token has already been used'
+        }, status=status.HTTP_401_UNAUTHORIZED)
 
 class UserProfileView(generics.RetrieveAPIView):
     """
@@ -174,6 +198,11 @@ class ProfileUpdateView(generics.UpdateAPIView):
     def get_object(self):
         return self.request.user
     
+    def perform_update(self, serializer):
+        user = serializer.save()
+        # Don't let later requests authenticate as the stale cached copy
+        CachedUsers.invalidate(user.pk)
+    
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -93,10 +94,66 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
 
+# Cache
+# Paid-user sets, unread counts, notification preferences and authenticated
+# users are cached here and invalidated from both the web server and the
+# notification workers, so deployments running more than one process must
+# set REDIS_URL. Without it each process has a private cache and those
+# entries are kept for at most LOCAL_CACHE_TIMEOUT seconds.
+
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+LOCAL_CACHE_TIMEOUT = 5
+
+
+# Notification streams
+# Notifications are created by both the web server and the
+# process_notification_jobs worker, so live streams only see all of them
+# when every process publishes through Redis. InMemoryBroker is only
+# correct when everything runs in one process.
+
+if REDIS_URL:
+    NOTIFICATION_BROKER = 'apps.notifications.broker.RedisBroker'
+    NOTIFICATION_BROKER_OPTIONS = {'url': REDIS_URL}
+else:
+    NOTIFICATION_BROKER = 'apps.notifications.broker.InMemoryBroker'
+    NOTIFICATION_BROKER_OPTIONS = {}
+
+
+# Push notifications
+# Pushes go out through an HTTP push gateway. There is deliberately no
+# fallback: without PUSH_GATEWAY_URL the PUSH delivery worker refuses to
+# run and push deliveries stay queued, rather than being marked sent.
+
+PUSH_GATEWAY_URL = os.environ.get('PUSH_GATEWAY_URL')
+
+if PUSH_GATEWAY_URL:
+    NOTIFICATION_PUSH_PROVIDER = 'apps.notifications.push.HTTPPushProvider'
+    NOTIFICATION_PUSH_PROVIDER_OPTIONS = {
+        'url': PUSH_GATEWAY_URL,
+        'api_key': os.environ.get('PUSH_GATEWAY_API_KEY'),
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -143,7 +200,7 @@ AUTH_USER_MODEL = 'users.User'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',